@@ -2,6 +2,7 @@
 eBook_turner_w2.py
 e-book page turner for android with BLE ver.2 by @pado3
 target device: Seeed studio XIAO nRF52840 Sense (w/LSM6DS3TR-C)
+               or XIAO nRF52840 (without W tap)
 
 r1.0 2023/02/15 initial release
 r1.1 2023/02/19 minor modification. append, translate and correct comments
@@ -9,110 +10,139 @@ r1.2 2023/02/19 fix typo
 r1.3 2023/02/20 fix typo
 r1.4 2023/02/21 fix typo
 r1.5 2023/02/21 fix typo
+r1.6 2026/10/17 add absolute pointer (digitizer) to click with W tap in 1 report
+r1.7 2026/10/17 BACK is sent on release, POWER at hold time. no 0.5s blocking
+r1.8 2026/10/17 switch events by keypad (turner/keyin.py), no press is lost
+r1.9 2026/10/17 hold FWD/REV to repeat (turner/repeat.py), BACK+FWD/REV skip
+r1.10 2026/10/17 IMU config by burst writes with register shadow at 400kHz
+r2.0 2026/10/17 1 file for Sense & not Sense (-woTap r1.9a merged), sensor
+                libraries are imported only with IMU. startup budget check
+r2.1 2026/10/17 battery gauge (turner/battery.py) every 60s, not in pager
+r2.2 2026/10/17 power state & wake source telemetry (turner/telemetry.py)
+r2.3 2026/10/17 dispatch on wake source, tap status is read only on INT1 wake
+r2.4 2026/10/17 adaptive light sleep timer (turner/keepalive.py), tls~tls_max
+r2.5 2026/10/17 connection interval 15ms while pages go on, 30ms, 150ms in idle
+r2.6 2026/10/17 advertising burst & back off to bonded tablet (turner/reconnect.py)
+r2.7 2026/10/17 leveled log to RAM ring buffer (turner/log.py), sent only with USB
+r2.8 2026/10/17 non-blocking LED blink (turner/led.py), no 0.2s sleep in pager
+r2.9 2026/10/17 asyncio tasks while connected, light sleep when all are idle
+r2.10 2026/10/17 IMU gestures (turner/gesture.py): tilt & flick by 6D, wake-up
+r2.11 2026/10/17 IMU 12.5Hz while idle, 208Hz at wake-up (turner/imupower.py)
+r2.12 2026/10/17 mouse path by screen profile (turner/mousepath.py), 1 report
+                 per connection interval
+r2.13 2026/10/17 IMU register map in a packed bytes table (turner/imu.py),
+                 descriptors only for fields in use
+r2.14 2026/10/17 snapshot of battery level over reload (turner/snapshot.py),
+                 no ADC reads at resume
+r2.15 2026/10/17 W tap close to a switch edge is dropped as its click
+                 (turner/tapguard.py)
+r2.16 2026/10/17 link lost in session: advertising again for grace[s] with the
+                 HID service and peripherals alive, no reload
 
 memo.
 Reader & Kindle : forward page with volume decrement, reverse with increment
 Kinoppy : forward page with volume increment, reverse with decrement
 読書尚友 & なろうリーダ : selectable
 FWD:D3+4, REV:D8+9, BACK/POWER:D5+6, mode:D7 (3,8,5,7:input, 4,9,6:interrupt)
-mouse click almost center of screen : INT1 with double tap
+hold FWD/REV : repeat pages, faster while holding
+BACK+FWD/REV : skip SKIP_PAGES pages (BACK is not sent when released)
+mouse click almost center of screen : INT1 with double tap (Sense only)
+  (touch with absolute pointer, or relative mouse moves if USE_ABS_POINTER=0
+  planned for SCREEN of turner/mousepath.py)
+gesture='tilt' etc. of ebook_turner(): tilt or flick turns pages (Sense only)
+  (detected in IMU, sources are read only on INT1 wake. turner/gesture.py)
+while connected, asyncio tasks: input (light sleep), HID, LED, battery, conn
+  and IMU power (Sense only)
+link lost while connected: advertising again for grace[s] of ebook_turner(),
+  then deep sleep. BACK does not stop it (the reader wakes it up), POWER
+  does. the loss is noticed at the next wake (tls_max[s] at most)
+IMU is detected by board.IMU_PWR. turner/imu.py, turner/imupower.py,
+turner/tapguard.py and turner/pointer.py are imported only with IMU
+run from main.py, with this file and turner/ precompiled to .mpy (README)
 D3, D8:internal pullup (typ.13k)
 D5:external pullup 100k(use interrupt with deep sleep)
 D7:external pullup 100k(internal is too small when Kinoppy keep low)
 external LED Anode:D1(always True), Kathode:D0 (reverse logic same as internal)
 '''
+import time
+T_START = time.monotonic()  # start of code, for startup budget
 import alarm
 import analogio     # use .AnalogIn() only
+import asyncio
 import board
 import digitalio
+import gc           # use .collect() and .mem_free() only
 import microcontroller
-import supervisor   # use .reload() only
-import time
+import supervisor   # use .reload() and .ticks_ms() only
+from micropython import const
 from adafruit_ble import BLERadio
 from adafruit_ble.advertising.standard import ProvideServicesAdvertisement
 from adafruit_ble.services.standard import BatteryService
 from adafruit_ble.services.standard.hid import HIDService
 from adafruit_hid.consumer_control import ConsumerControl
-# libraries related to sensor
-import busio        # use .I2C() only
-from adafruit_bus_device.i2c_device import I2CDevice
-from adafruit_hid.mouse import Mouse
-from adafruit_lsm6ds.lsm6ds3trc import LSM6DS3TRC   # use CHIP_ID only
-from adafruit_register.i2c_bit import RWBit
-from adafruit_register.i2c_bits import RWBits
-from adafruit_register.i2c_bit import ROBit
-from micropython import const
-
+from turner.battery import BatteryGauge, millivolt
+from turner.connparam import ConnPolicy
+from turner.keepalive import KeepAlive
+from turner.keyin import KeyInput, FWD, REV, BACK, MODE, ticks_diff
+from turner.led import LedEngine
+from turner.log import RingLog
+from turner.reconnect import BondRecord, schedule
+from turner.repeat import KeyRepeat
+from turner.sched import ActionQueue, Timers
+from turner.snapshot import Snapshot
+from turner.telemetry import Telemetry, ADV, SLEEP, ACTIVE, DEEP
+# libraries related to sensor are imported in define_sensor() and
+# ebook_turner() only with IMU
+T_IMPORT = time.monotonic() - T_START
+
+
+# console log of the loop, to RAM ring buffer, sent only when USB connected
+# const(0) removes the log calls of the level at compile time
+LOG_INFO = const(1)     # actions: keycodes, sends, battery, interval
+LOG_DEBUG = const(0)    # every wake: sleep, tap status, no keycode
+log = RingLog()
 
 # LED logic of XIAO is reversed and often confusing, so make clarify
 LED_ON = False
 LED_OFF = True
 
-
-# IMU interrupt configuration and readout registers
-class ImuInt1Control:
-    def __init__(self, i2c):
-        self.i2c_device = i2c  # self.i2c_device required by RWBit class
-    # see ST_LSM6DS3TR-C datasheet
-    # R/W resisters. #:used in this project
-    INT1_CTRL = RWBits(8, const(0x0D), 0)
-    CTRL1_XL = RWBits(8, const(0x10), 0)    # ODR_XL is upper 4bit
-    CTRL2_G = RWBits(8, const(0x11), 0)
-    CTRL3_C = RWBits(8, const(0x12), 0)     # use 1bit as SW_RESET
-    CTRL4_C = RWBits(8, const(0x13), 0)
-    CTRL5_C = RWBits(8, const(0x14), 0)
-    CTRL6_C = RWBits(8, const(0x15), 0)     # use 1bit as XL_HM_MODE
-    CTRL7_C = RWBits(8, const(0x16), 0)     # use 1bit as G_HM_MODE
-    CTRL8_XL = RWBits(8, const(0x17), 0)
-    CTRL9_XL = RWBits(8, const(0x18), 0)
-    CTRL10_C = RWBits(8, const(0x19), 0)
-    MASTER_CONFIG = RWBits(8, const(0x1A), 0)
-    TAP_CFG = RWBits(8, const(0x58), 0)     #
-    TAP_THS_6D = RWBits(8, const(0x59), 0)  #
-    INT_DUR2 = RWBits(8, const(0x5A), 0)    #
-    WAKE_UP_THS = RWBits(8, const(0x5B), 0)     #
-    WAKE_UP_DUR = RWBits(8, const(0x5C), 0)
-    FREE_FALL = RWBits(8, const(0x5D), 0)
-    MD1_CFG = RWBits(8, const(0x5E), 0)     #
-    MD2_CFG = RWBits(8, const(0x5F), 0)
-    ODR_XL = RWBits(4, const(0x10), 4)      # Accelerometer Output Data Rate
-    SW_RESET = RWBit(const(0x12), 0)        # CTRL3_C bit0
-    XL_HM_MODE = RWBit(const(0x15), 4)      # CTRL6_C bit4
-    G_HM_MODE = RWBit(const(0x16), 7)       # CTRL7_C bit7
-    # Read only registers in bit. #:used in this project
-    # WAKE_UP_SRC
-    FF_IA = ROBit(const(0x1B), 5)
-    SLEEP_STATE_IA = ROBit(const(0x1B), 4)
-    WU_IA = ROBit(const(0x1B), 3)
-    X_WU = ROBit(const(0x1B), 2)
-    Y_WU = ROBit(const(0x1B), 1)
-    Z_WU = ROBit(const(0x1B), 0)
-    # TAP_SRC
-    TAP_IA = ROBit(const(0x1C), 6)
-    SINGLE_TAP = ROBit(const(0x1C), 5)
-    DOUBLE_TAP = ROBit(const(0x1C), 4)      # W tap detection
-    TAP_SIGN = ROBit(const(0x1C), 3)
-    X_TAP = ROBit(const(0x1C), 2)
-    Y_TAP = ROBit(const(0x1C), 1)
-    Z_TAP = ROBit(const(0x1C), 0)
-    # D6D_SRC
-    DEN_DRDY = ROBit(const(0x1D), 7)
-    D6D_IA = ROBit(const(0x1D), 6)
-    ZH = ROBit(const(0x1D), 5)
-    ZL = ROBit(const(0x1D), 4)
-    YH = ROBit(const(0x1D), 3)
-    YL = ROBit(const(0x1D), 2)
-    ZH = ROBit(const(0x1D), 1)
-    ZL = ROBit(const(0x1D), 0)
-
+# pages turned with BACK+FWD or BACK+REV, sent back to back
+SKIP_PAGES = 10
+
+# startup budget. code start to advertising[s], free heap at advertising[B]
+BOOT_TIME = 0.5
+BOOT_MEM_FREE = 40000
+# free heap after define_sensor() (imports and IMU register descriptors)[B]
+SENSOR_MEM_FREE = 46000
+
+# keycodes, standard: https://www.usb.org/sites/default/files/hut1_21_0.pdf
+# default order: Reader/Kindle mode
+KEYCODES = (
+    0xEA,   # Volume Decrement p.120, FWD in Reader/Kindle mode
+    0xE9,   # Volume Increment p.120, FWD in Kinoppy mode
+    0x224,  # AC BACK p.124
+    0x30,   # Power p.117
+)
+
+# W tap action. True: touch by absolute pointer, False: relative mouse moves
+USE_ABS_POINTER = True
+# screen profile of the reader for relative mouse moves (turner/mousepath.py)
+SCREEN = 'poke_pro'
+# touch position in ratio of screen, same as the tuned mouse moves below
+TAP_X = 0.50
+TAP_Y = 0.46
+
+# source of wake from light_sleep(), None when not slept (events waiting)
+WAKE_SWITCH = 1     # PinAlarm of FWD, REV, BACK
+WAKE_TAP = 2        # PinAlarm of IMU_INT1
+WAKE_TIMER = 3      # TimeAlarm: keep alive, long press of BACK or repeat
 
 # protect VBATT from over voltage in battery operation (>3.6V)
 # cannot set low during deep sleep. Do not fall into deep sleep while charging.
 def vbatt_port_guard():
     # set P0.14 to LOW
     ebat = digitalio.DigitalInOut(board.READ_BATT_ENABLE)
-    ebat.direction = digitalio.Direction.OUTPUT
-    ebat.value = False  # MUST be set low in battery operatoin
+    ebat.switch_to_output(value=False)  # MUST be low in battery operatoin
     time.sleep(0.1)     # wait for ebat pin to GND
 
 
@@ -135,6 +165,22 @@ def battery_charge_mode(mode='LOW'):
         chgl.direction = digitalio.Direction.INPUT  # set to Hi-Z explicitly
 
 
+# BACK/POWER switch. keep time of press event to tell short press from long
+# without blocking: BACK is sent on release, POWER when held for t_long
+class BackSwitch:
+    def __init__(self, t_long=0.5):
+        self.t_long = t_long    # [s] hold time for POWER
+        self.t_press = None     # ticks_ms of press event, None: released
+
+    # [ms] held time at ticks_ms ts
+    def held(self, ts):
+        return ticks_diff(ts, self.t_press)
+
+    # [s] time left until long press
+    def left(self):
+        return self.t_long - self.held(supervisor.ticks_ms()) / 1000
+
+
 # LED settings
 def define_led():
     led_array = []  # 0:RED, 1:GREEN, 2:BLUE, 3:additional
@@ -156,80 +202,64 @@ def define_led():
     return led_array
 
 
-# Switch settings
+# Switch settings. events are debounced and queued by keypad in background
+# key 0:Forward, 1:Reverse, 2:BACK/POWER, 3:mode (see turner/keyin.py)
+# keypad reports only a key held at its first scan, mode switch is read
+# once before it takes the pin
 def define_switch():
-    sw_array = []   # 0:Forward, 1:Reverse, 2:BACK/POWER, 3:mode
-    sw_pins = [board.D3, board.D8, board.D5, board.D7]
-    for pin in sw_pins[:2]:     # internal pullup for D3, D8
-        sw_pin = digitalio.DigitalInOut(pin)
-        sw_pin.direction = digitalio.Direction.INPUT
-        sw_pin.pull = digitalio.Pull.UP     # note: 13kohm
-        sw_array.append(sw_pin)
-    for pin in sw_pins[2:]:     # external pullup for D5, D7
-        sw_pin = digitalio.DigitalInOut(pin)
-        sw_pin.direction = digitalio.Direction.INPUT
-        # sw_pin.pull = digitalio.Pull.UP   # external 100kohm
-        sw_array.append(sw_pin)
-    return sw_array
-
-
-# define and initialize sensor as W-tap detector, return interrupt object
-def define_sensor():
-    # define IMU power and turn on
-    imupwr = digitalio.DigitalInOut(board.IMU_PWR)
-    imupwr.direction = digitalio.Direction.OUTPUT
-    imupwr.value = True
-    time.sleep(0.1)
-    imu_i2c = busio.I2C(board.IMU_SCL, board.IMU_SDA)
-    imu = LSM6DS3TRC(imu_i2c)   # use for get I2C address(0x6A) only
-    imu_device = I2CDevice(imu_i2c, imu.CHIP_ID)   # CHIP_ID: I2C address
-    int1c = ImuInt1Control(imu_device)
-    # reset IMU and set low/normal power mode
-    int1c.SW_RESET = 1
-    int1c.XL_HM_MODE = 1
-    int1c.G_HM_MODE = 1
-    # INT1 settings. (*):tuning factor, others:fixed parameter
-    # upper 4bit of 10h=ODR_XL is important for response & current.
-    # ODR: Output Data Rate. I set 208Hz (~5ms), max freq in normal power mode
-    int1c.CTRL1_XL = 0x58       # 10h, 0101 1000 Power-up, 208Hz(*), FS+-4g
-    int1c.TAP_CFG = 0x8E        # 58h, 1000 1110 INT_EN, keep ODR, XYZ
-    int1c.TAP_THS_6D = 0x0A     # 59h, 0000 1010 ths:10/32(=1.25g)(*)
-    # INT_DUR2, ODR_XL time is 1/f at CTRL1_XL. GAP~.5s, Q~.04s, DURmax~.08s
-    int1c.INT_DUR2 = 0x3A       # 5Ah, 0011 1010 duration, quiet setting (all*)
-    int1c.WAKE_UP_THS = 0x88    # 5Bh, 1000 1000 S&W tap EN, wakeup ths:8/64(*)
-    int1c.MD1_CFG = 0x08        # 5Eh, 0000 1001 routing W tap only
-    '''
-    # sample parameters by chuck '22/5 on Seeed forum (same as AN5130 of STM)
-    # title: 'XIAO BLE Sense - LSM6DS3 INT1 Single Tap Interrupt'
-    int1c.CTRL1_XL = 0x60       # 10h, 0110 0000 416Hz(~2.5ms), FS_XL+-2g
-    int1c.TAP_CFG = 0x8E        # 58h, 1000 1110 INT_EN, SLOPE_FDS, XYZ
-    int1c.TAP_THS_6D = 0x8C     # 59h, 1000 1100 6D, ths:12/32(=0.75g) (why 6D?)
-    int1c.INT_DUR2 = 0x7F       # 5Ah, 0111 1111 GAP~.6s, Q~.03, DURmax~.06s
-    int1c.WAKE_UP_THS = 0x80    # 5Bh, 1000 0000 S&W EN, ths:none
-    int1c.MD1_CFG = 0x08        # 5Eh, 0000 1000 W to INT1
-    '''
-    return int1c
-
-
-# calculate battery level in percent and set low battery alart
-def battery_percent(readout, led_array):
-    # vbat[mV] = raw*3300[mV]*((1M+510k)/510k)/2^16 in linear region (Vdd>3.3V)
-    vbat = readout * (3300 / 65536) * (1510 / 510)
-    # experimentally, 100% : 3.7V~23900raw, 0% : 2.5V~21400raw
-    # see: https://twitter.com/pado3/status/1613699618092744704/photo/3
-    pc = int(100 * (readout - 21400) / (23900 - 21400))
-    print('VBATT:{:.0f}mV, {}%, '.format(vbat, pc), end='')
-    # percentage limitation in BatteryService : uint8, 0~100
-    if pc > 100:
-        pc = 100
-    elif pc < 0:
-        pc = 0
-    # low battery alart
-    if pc < 20:     # below 20% (~3.3V), RED LED always ON
-        led_array[0].value = LED_ON
+    mode = digitalio.DigitalInOut(board.D7)     # external pullup
+    kinoppy = not mode.value
+    mode.deinit()
+    keys = KeyInput()
+    keys.pressed[MODE] = kinoppy
+    return keys
+
+
+# define and initialize sensor as W-tap & gesture detector, return
+# interrupt object. None without IMU (XIAO nRF52840 without Sense)
+def define_sensor(gesture='wtap'):
+    if not hasattr(board, 'IMU_PWR'):
+        return None
+    from turner.imu import define_imu
+    return define_imu(gesture)
+
+
+# update battery level when due, and set low battery alart
+def battery_update(gauge, leds, force=False):
+    if not gauge.update(force):
+        return
+    if LOG_INFO:
+        log.write('VBATT:{:.0f}mV, {}%, ', millivolt(gauge.raw),
+                  gauge.percent)
+    battery_alert(gauge, leds)
+
+
+def battery_alert(gauge, leds):
+    if gauge.percent < 20:  # below 20% (~3.3V), RED LED always ON
+        leds.set(0, True)
     else:
-        led_array[0].value = LED_OFF
-    return pc
+        leds.set(0, False)
+
+
+# check startup time & free heap against the budget, before advertising
+def boot_check():
+    gc.collect()
+    t_boot = time.monotonic() - T_START
+    mem = gc.mem_free()
+    print('import {:.0f}ms, boot {:.0f}ms, mem_free {}B, '.format(
+        T_IMPORT * 1000, t_boot * 1000, mem), end='')
+    if t_boot > BOOT_TIME or mem < BOOT_MEM_FREE:
+        print('over startup budget ({:.0f}ms, {}B)! '.format(
+            BOOT_TIME * 1000, BOOT_MEM_FREE), end='')
+
+
+# check free heap after define_sensor() against the budget
+def sensor_check():
+    gc.collect()
+    mem = gc.mem_free()
+    print('sensor mem_free {}B, '.format(mem), end='')
+    if mem < SENSOR_MEM_FREE:
+        print('over sensor budget ({}B)! '.format(SENSOR_MEM_FREE), end='')
 
 
 # ble disconnection
@@ -241,106 +271,210 @@ def ble_disconnection(ble):
 
 
 # illumination until advertising
-def ble_wait_connection(i, led_array):
+def ble_wait_connection(i, leds):
     if i % 100 == 0:
-        led_array[1].value = LED_ON
+        leds.flash(1, 0.02)     # blink short
     if i % 10 == 0:
-        led_array[2].value = LED_ON
+        leds.flash(2, 0.02)
         print('{}'.format(60 - int(i/10)), end='')
     else:
         print('.', end='')
-    time.sleep(0.02)    # blink short
-    led_array[1].value = LED_OFF
-    led_array[2].value = LED_OFF
-    time.sleep(0.08)
-
-
-# ble advertisement
-def ble_advertisement(ble, advertisement, tadv, sw_array, led_array):
-    ble.start_advertising(advertisement)
+    leds.sleep(0.1)     # LEDs are turned off on time
+
+
+# POWER: BACK held for bsw.t_long, by switch events. the others are thrown
+# away
+def power_held(keys, bsw):
+    for key, pressed, ts in keys.events():
+        if key == BACK:
+            bsw.t_press = ts if pressed else None
+    return bsw.t_press is not None and bsw.left() <= 0
+
+
+# ble advertisement, in stages of interval (short burst to bonded tablet,
+# then slower) for tadv[s] in total. lost: link lost in session, BACK does
+# not stop it (pressed to wake the turner), POWER does
+def ble_advertisement(ble, advertisement, tadv, keys, leds, tel, bond,
+                      lost=False):
+    tel.enter(ADV)
+    bsw = BackSwitch()
+    if keys.pressed[BACK]:  # held from the session, its press was taken
+        bsw.t_press = supervisor.ticks_ms()
+    off = False
     i = 0
-    while not ble.connected and i <= tadv*10:   # wait for connection tadv[s]+a
-        ble_wait_connection(i, led_array)   # spend 0.1 sec
-        i += 1
-        if not sw_array[2].value:   # BACK/POWER is pressed
+    for seconds, interval in schedule(tadv, bond.bonded, lost):
+        ble.start_advertising(advertisement, interval=interval)
+        i_end = i + seconds*10
+        while not ble.connected and i < i_end:  # wait for connection
+            ble_wait_connection(i, leds)    # spend 0.1 sec
+            i += 1
+            if lost:
+                off = power_held(keys, bsw)
+            else:
+                off = keys.state(BACK)  # BACK/POWER is pressed
+            if off:
+                break
+        ble.stop_advertising()
+        if ble.connected or off:
             break
-    ble.stop_advertising()
+    tel.enter(ACTIVE)
 
 
-# check W tap status and return its keycode
-def check_sensor(int1c, keycode=0x00):
-    wt = int1c.DOUBLE_TAP
-    print('W_TAP: {}, '.format(wt), end='')
-    if wt:
-        keycode = 0x40  # instead of 'Menu' in USB HID Usage Tables p.117
-    return keycode
+# keycodes of FWD & REV by mode switch
+def page_keycodes(keys):
+    if keys.pressed[MODE]:      # Kinoppy mode, swap FWD & REV
+        return KEYCODES[1], KEYCODES[0]
+    return KEYCODES[0], KEYCODES[1]
 
 
-# check key status and return its keycode
-def check_switch(sw_array, keycode=0x00):
-    # standard: https://www.usb.org/sites/default/files/hut1_21_0.pdf
-    # default order: Reader/Kindle mode
-    keycodes = [
-        0xEA,   # Volume Decrement p.120, FWD in Reader/Kindle mode
-        0xE9,   # Volume Increment p.120, FWD in Kinoppy mode
-        0x224,  # AC BACK p.124
-        0x30,   # Power p.117
-    ]
-    if not sw_array[3].value:       # Kinoppy mode, swap FWD & REV
-        keycodes[0], keycodes[1] = keycodes[1], keycodes[0]
-    if not sw_array[0].value:       # FWD is pressed
-        keycode = keycodes[0]
-    elif not sw_array[1].value:     # REV is pressed
-        keycode = keycodes[1]
-    elif not sw_array[2].value:     # BACK is pressed
-        keycode = keycodes[2]
-        time.sleep(0.5)
-        if not sw_array[2].value:   # pressed long
-            keycode = keycodes[3]   # Power off
+# read gesture sources of IMU (W tap, tilt, flick) and return its keycode
+def check_sensor(int1c, keys, keycode=0x00):
+    gesture = int1c.gesture()
+    if LOG_DEBUG:
+        log.write('gesture: {} {}, ', gesture, bytes(int1c.src))
+    if gesture in (FWD, REV):
+        fwd, rev = page_keycodes(keys)
+        keycode = fwd if gesture == FWD else rev
+    elif gesture is not None:   # W tap
+        keycode = 0x40  # instead of 'Menu' in USB HID Usage Tables p.117
     return keycode
 
 
-# get sensor & switch status and return its key code
-def get_keycode(int1c, sw_array):
-    keycode = 0x00  # initialize
-    keycode = check_sensor(int1c, keycode)
-    # switch click sometimes recognized as tap
-    keycode = check_switch(sw_array, keycode)  # overwrite keycode
-    return keycode
+# take switch events in order and return list of their keycodes. edges
+# of FWD, REV and BACK are told to tap guard tg
+def check_switch(keys, bsw, rpt, tg=None):
+    keylist = []
+    for key, pressed, ts in keys.events():
+        if tg is not None and key != MODE:
+            tg.edge(ts)
+        fwd, rev = page_keycodes(keys)
+        if key in (FWD, REV) and pressed and keys.pressed[BACK]:   # chord
+            keylist.extend([fwd if key == FWD else rev] * SKIP_PAGES)
+            bsw.t_press = None      # neither BACK nor POWER at release
+            if LOG_INFO:
+                log.write('skip {} pages, ', SKIP_PAGES)
+        elif key == FWD and pressed:
+            keylist.append(fwd)
+            rpt.press(FWD, ts)
+        elif key == REV and pressed:
+            keylist.append(rev)
+            rpt.press(REV, ts)
+        elif key in (FWD, REV):     # released
+            rpt.release(key)
+        elif key == BACK and pressed:   # wait release or long press
+            bsw.t_press = ts
+            if LOG_INFO:
+                log.write('BACK pressed, ')
+        elif key == BACK and bsw.t_press is not None:   # released
+            if bsw.held(ts) < bsw.t_long * 1000:
+                keylist.append(KEYCODES[2])
+            else:
+                keylist.append(KEYCODES[3])     # Power off
+            bsw.t_press = None
+    if bsw.t_press is not None and bsw.left() <= 0:     # pressed long
+        keylist.append(KEYCODES[3])     # Power off
+        bsw.t_press = None
+    if rpt.due():   # FWD or REV is held, repeat
+        fwd, rev = page_keycodes(keys)
+        keylist.append(fwd if rpt.key == FWD else rev)
+    return keylist
+
+
+# source of wake, to read only what woke up
+def wake_source(wake):
+    if isinstance(wake, alarm.time.TimeAlarm):
+        return WAKE_TIMER
+    if isinstance(wake, alarm.pin.PinAlarm):
+        if getattr(board, 'IMU_INT1', None) is wake.pin:
+            return WAKE_TAP
+        return WAKE_SWITCH
+    return None
+
+
+# get switch events (and gesture only when INT1 woke up) and return list
+# of key codes. switch events are in queue of keypad, no pin is read here
+def get_keycodes(source, int1c, keys, bsw, rpt, tg=None):
+    ts = supervisor.ticks_ms()  # of INT1 wake
+    keylist = check_switch(keys, bsw, rpt, tg)
+    if source != WAKE_TAP:  # timer, switch: no I2C
+        return keylist
+    keycode = check_sensor(int1c, keys)
+    # switch click sometimes recognized as tap, ignore tap with switch
+    if keycode and not keylist and not any(keys.pressed[:3]):
+        if keycode != 0x40 or tg is None or tg.tap(ts):
+            keylist.append(keycode)
+        elif LOG_INFO:
+            log.write('tap by switch click ignored, ')
+    return keylist
 
 
 # set interrupt and goto light sleep
 # tls[sec]:light sleep timer for keep alive BLE
-def light_sleep(tls, led_array):
+# while BACK is held, wake at long press time. while FWD/REV is held, wake
+# at next repeat. return the alarm of wakeup
+def light_sleep(tls, leds, keys, int1c, bsw, rpt, tel):
     # set pin alarm. pullup for each pin is valid in light sleep
-    fwd_alarm = alarm.pin.PinAlarm(pin=board.D4, value=False)
-    rev_alarm = alarm.pin.PinAlarm(pin=board.D9, value=False)
-    back_alarm = alarm.pin.PinAlarm(pin=board.D6, value=False)
-    int1_alarm = alarm.pin.PinAlarm(pin=board.IMU_INT1, value=True)
-    time_alarm = alarm.time.TimeAlarm(monotonic_time=time.monotonic() + tls)
-    print('(suya~)', end='')
-    led_array[3].value = LED_ON     # external LED on while light sleep
-    alarm.light_sleep_until_alarms(
-        fwd_alarm, rev_alarm, back_alarm, int1_alarm, time_alarm)
-    led_array[3].value = LED_OFF
+    # wake on press of released switch, and on release of held one
+    fwd_alarm = alarm.pin.PinAlarm(pin=board.D4, value=keys.pressed[FWD])
+    rev_alarm = alarm.pin.PinAlarm(pin=board.D9, value=keys.pressed[REV])
+    back_alarm = alarm.pin.PinAlarm(pin=board.D6, value=keys.pressed[BACK])
+    t_wake = tls
+    if bsw.t_press is not None:     # BACK is held
+        t_wake = min(t_wake, bsw.left())
+    if rpt.key is not None:     # FWD or REV is held
+        t_wake = min(t_wake, rpt.left())
+    t_alarm = time.monotonic() + max(0, t_wake)
+    time_alarm = alarm.time.TimeAlarm(monotonic_time=t_alarm)
+    alarms = [fwd_alarm, rev_alarm, back_alarm, time_alarm]
+    if int1c is not None:
+        alarms.append(alarm.pin.PinAlarm(pin=board.IMU_INT1, value=True))
+    if LOG_DEBUG:
+        log.write('(suya~)')
+    log.end()
+    log.flush()     # only when USB is connected
+    leds.set(3, True)   # external LED on while light sleep
+    tel.enter(SLEEP)
+    wake = alarm.light_sleep_until_alarms(*alarms)
+    tel.enter(ACTIVE)
+    tel.wake(wake)
+    leds.set(3, False)
+    return wake
 
 
 # deep sleep illumination (all LED turn off)
-def deepsleep_led(led_array):
-    for led in led_array:
-        led.value = LED_ON
-        time.sleep(0.1)
-        led.value = LED_OFF
-        time.sleep(0.1)
-
-
-# set interrupt and goto pseudo deep sleep
-# (true deep sleep of my XIAO nRF52840 has 2mA leak current)
+def deepsleep_led(leds):
+    steps = []
+    for i in range(len(leds.leds)):
+        steps += [(i, True, 0.1), (i, False, 0.1)]
+    leds.play(steps)
+    leds.sleep()    # nothing else to do before sleep
+
+
+# light sleep in place of deep sleep, counted as DEEP in telemetry
+def pseudo_deep_sleep(tel, *alarms):
+    tel.enter(DEEP)
+    wake = alarm.light_sleep_until_alarms(*alarms)
+    tel.enter(ACTIVE)
+    tel.wake(wake)
+    return wake
+
+
+# set interrupt and goto pseudo deep sleep (light sleep, then reload)
+# (true deep sleep of my XIAO nRF52840 has 2mA leak current through VBATT
+# divider, the guard cannot be held low: preserve_dios of
+# exit_and_deep_sleep_until_alarms() is not implemented on nRF)
 # when charging, don't deep sleep for protect VBATT pin (P0.31)
-def deep_sleep(ble, int1c, sw_array, led_array):
+# telemetry and snapshot are written to sleep_memory before reload
+def deep_sleep(ble, int1c, keys, leds, tel, gauge):
+    log.end()
+    log.flush()     # RAM is lost by reload
+    snap = Snapshot()
+    snap.raw, snap.percent = gauge.raw, gauge.percent
     ble_disconnection(ble)
-    deepsleep_led(led_array)
-    int1c.ODR_XL = 0x0  # IMU Accelerometer power down (85uA -> 3uA typ.)
+    keys.deinit()   # stop scan, read D5 directly below
+    deepsleep_led(leds)
+    if int1c is not None:
+        int1c.power_down()
     # power sw alarm needs external pullup for deep sleep although D9 in para.
     pwsw_alarm = alarm.pin.PinAlarm(pin=board.D6, value=False)
     # check charge status (board.CHARGE_STATUS = P0.17)
@@ -353,107 +487,362 @@ def deep_sleep(ble, int1c, sw_array, led_array):
         print('do not charge. DEEP sleep until pwsw or start charge.', end='')
         chg_alarm = alarm.pin.PinAlarm(pin=board.CHARGE_STATUS, value=False)
         # goto pseudo deepsleep for protect battery monitor pins
-        # alarm.exit_and_deep_sleep_until_alarms(pwsw_alarm, chg_alarm)
-        alarm.light_sleep_until_alarms(pwsw_alarm, chg_alarm)
+        wake = pseudo_deep_sleep(tel, pwsw_alarm, chg_alarm)
+        if wake is None or wake.pin is board.CHARGE_STATUS:
+            snap.raw = 0    # read again
     else:
         print('charge now. LIGHT sleep until pwsw or stop charge.')
         chg_alarm = alarm.pin.PinAlarm(pin=board.CHARGE_STATUS, value=True)
-        alarm.light_sleep_until_alarms(pwsw_alarm, chg_alarm)
+        pseudo_deep_sleep(tel, pwsw_alarm, chg_alarm)
+        snap.raw = 0    # charged, read again
         # check power switch in parallel to pwsw_alarm pin (D5+6)
-        pwsw = sw_array[2].value
+        pwsw = digitalio.DigitalInOut(board.D5).value   # external pullup
         if pwsw:  # if pwsw is open, wakeup with charge off
-            deepsleep_led(led_array)
+            deepsleep_led(leds)
             print('charge finished. DEEP sleep until pwsw or start charge.')
             # change alarm logic to charge ON
             chg_alarm =\
                 alarm.pin.PinAlarm(pin=board.CHARGE_STATUS, value=False)
             # goto pseudo deepsleep for protect battery monitor pins
-            # alarm.exit_and_deep_sleep_until_alarms(pwsw_alarm, chg_alarm)
-            alarm.light_sleep_until_alarms(pwsw_alarm, chg_alarm)
+            pseudo_deep_sleep(tel, pwsw_alarm, chg_alarm)
     # print('wakeup with power sw. software reset', end='')
     print('wakeup with power sw or charge on. software reset', end='')
+    tel.flush()
+    snap.save()     # pins are reset by reload, IMU too
     supervisor.reload()     # forced reboot
 
 
+# pack keylist into [[keycode, count]], same keycodes in a row are sent
+# back to back in as few connection events as possible
+def pack(keylist):
+    packed = []
+    for keycode in keylist:
+        if packed and packed[-1][0] == keycode:
+            packed[-1][1] += 1
+        else:
+            packed.append([keycode, 1])
+    return packed
+
+
+# send keycode count times without wait. report reaches the TX queue of
+# BLE and send_report waits only when the queue is full. other tasks run
+# between reports
+async def send_keycode(keycode, count, cc):
+    t0 = supervisor.ticks_ms()
+    for i in range(count):
+        cc.send(keycode)
+        await asyncio.sleep(0)
+    if LOG_INFO:
+        log.write('send keydata via bluetooth. ')
+    if LOG_INFO and count > 1:
+        dt = max(1, ticks_diff(supervisor.ticks_ms(), t0))
+        log.write('{} pages in {}ms ({:.0f} pages/s). ', count, dt,
+                  count * 1000 / dt)
+
+
+# wait after a mouse report: a connection event of conn (read at each
+# report, it changes by ConnPolicy), up to 30ms while idle (150ms). r1.x
+# sent 2 reports (a move over 127) per 60ms
+async def mouse_wait(conn):
+    interval = 30
+    if conn is not None:
+        interval = min(interval, conn.connection_interval)
+    await asyncio.sleep(interval / 1000)
+
+
 # send page turner actions via BLE
-def pager(keycode, ms, cc, bs, rbat, led_array):
-    led_array[2].value = LED_ON     # blue LED
-    # set battery level before send
-    bs.level = battery_percent(rbat.value, led_array)
+# count: times to send keycode back to back, blink[sec]: BLUE LED on time,
+# turned off by LED task while sleeping or handling next input
+# ap: AbsPointer, or None to use relative mouse moves (ms: Mouse) of mp:
+# (home, target) reports of mousepath.plan(), conn: BLE connection
+async def pager(keycode, count, ms, mp, ap, cc, leds, blink=0.2, conn=None):
+    leds.set(2, True)   # blue LED
     # send command
-    if keycode == 0x40:     # instead of 'Menu'
-        # goto upper left from any position (BOOX Poke Pro:1072x1448)
-        # cursor should move little by little. need to tune with target reader
-        for i in range(10):
-            ms.move(-108, -145)
-            time.sleep(0.06)    # perhaps related to scan frequency
+    if keycode == 0x40 and ap is not None:  # touch almost center
+        ap.tap(TAP_X, TAP_Y)
+        if LOG_INFO:
+            log.write('touch via bluetooth. ')
+    elif keycode == 0x40:   # instead of 'Menu'
+        # goto upper left from any position, a report per connection event
+        home, target = mp
+        for dx, dy in home:
+            ms.move(dx, dy)
+            await mouse_wait(conn)
         # goto almost center. blink LED for notificate
-        led_array[2].value = LED_OFF
-        for i in range(5):
-            ms.move(108, 133)   # y parameter tuned with real reader
-            time.sleep(0.06)
-        led_array[2].value = LED_ON
-        ms.click(Mouse.LEFT_BUTTON)
+        leds.set(2, False)
+        for dx, dy in target:
+            ms.move(dx, dy)
+            await mouse_wait(conn)
+        leds.set(2, True)
+        ms.click(ms.LEFT_BUTTON)
         ms.release_all()
-        print('mouse control via bluetooth.', end='')
+        if LOG_INFO:
+            log.write('mouse control via bluetooth. ')
     else:
-        cc.send(keycode)
-        print('send keydata via bluetooth.', end='')
-    time.sleep(0.2)     # blink BLUE LED short
-    led_array[2].value = LED_OFF
+        await send_keycode(keycode, count, cc)
+    leds.flash(2, blink)    # blink BLUE LED short, without waiting
+
+
+# input producer: light sleep when all tasks are idle (nothing to send, the
+# others wait for their timers), then put actions of switch events & tap
+# to the queue. keypad is polled while HID task sends
+async def input_task(keys, int1c, ip, tg, bsw, rpt, ka, leds, tel, timers,
+                     queue, stop):
+    while not stop.is_set():
+        if LOG_DEBUG:
+            log.write('connected! ')
+        source = None
+        if not keys.update():
+            if not queue.idle():    # woken by HID task when it is done
+                await timers.sleep('input', keys.interval)
+                continue
+            # keep alive, interval, LEDs. no timer: keep alive
+            t_sleep = timers.left(ka.interval)
+            if t_sleep == 0:    # let the task of passed timer run first
+                await asyncio.sleep(0)
+                continue
+            source = wake_source(
+                light_sleep(t_sleep, leds, keys, int1c, bsw, rpt, tel))
+            timers.wake('conn')     # timer restarts at every wake
+            if source == WAKE_SWITCH:   # debounce, until keypad finds it
+                t_end = supervisor.ticks_ms() + 50
+                while not keys.update() \
+                        and ticks_diff(t_end, supervisor.ticks_ms()) > 0:
+                    await asyncio.sleep(keys.interval)
+        keylist = get_keycodes(source, int1c, keys, bsw, rpt, tg)
+        if ip is not None and (keylist or source == WAKE_TAP):
+            if ip.activity() and LOG_INFO:  # handled, tap ODR
+                log.write('IMU active, ')
+            timers.wake('imu')  # timeout from here
+        if keylist:
+            ka.activity()   # timer back to reading pace
+        elif LOG_DEBUG:
+            log.write('there is no keycode (may wakeup by timer)')
+        # short blink while repeating, to see each page
+        blink = 0.2 if rpt.key is None else 0.02
+        for keycode, count in pack(keylist):    # in order of events
+            taken = queue.put(keycode, count, blink)
+            if LOG_INFO and not taken:
+                log.write('queue full, {} actions dropped, ', queue.dropped)
+        timers.wake('battery')  # runs after HID task
+        await asyncio.sleep(0)  # let the others run
+
+
+# log of connection interval request: requested[ms] or failed
+def interval_log(cp, interval):
+    if interval:
+        log.write('interval {}ms requested, ', interval)
+    elif cp.error is not None:
+        log.write('interval request failed: {}, ', cp.error)
+        cp.error = None
+
+
+# HID sender: send actions of the queue in order. power off stops all,
+# with the link lost too (off is set)
+async def hid_task(queue, ms, mp, ap, cc, leds, cp, ble, timers, stop, off):
+    while True:
+        keycode, count, blink = await queue.get()
+        if keycode == 0x30 and not ble.connected:   # no grace, deep sleep
+            off.set()
+            stop.set()
+            return
+        if not ble.connected:   # link lost, conn task stops all
+            timers.wake('conn')
+            continue
+        if LOG_INFO:
+            log.write('keycode: 0x{:X} x{}, ', keycode, count)
+        await pager(keycode, count, ms, mp, ap, cc, leds, blink,
+                    ble.connections[0])
+        timers.wake('led')
+        if keycode == 0x30:    # power off
+            off.set()
+            stop.set()
+            return
+        interval = cp.activity(count)   # fast interval for next pages
+        if LOG_INFO:
+            interval_log(cp, interval)
+        timers.wake('conn')     # next step of interval from here
+        if not queue.items:
+            timers.wake('input')
+
+
+# LED animator: switch LEDs on time
+async def led_task(leds, timers):
+    while True:
+        leds.update()
+        await timers.sleep('led', leds.left())
+
+
+# battery sampler: battery level every 60s, read after a wake (after page
+# turn not to delay it), never wakes by itself
+async def battery_task(gauge, leds, timers):
+    while True:
+        await timers.sleep('battery')
+        battery_update(gauge, leds)
+
+
+# IMU power: low-power ODR after timeout without input
+async def imu_task(ip, timers):
+    while True:
+        await timers.sleep('imu', ip.left())
+        if ip.update() and LOG_INFO:
+            log.write('IMU idle, ')
+
+
+# connection watchdog: keep alive timer, interval steps by idle time, bond
+# record and disconnection (checked at every wake). HID needs bonding, a
+# link without it (bond removed on the tablet) clears the record
+async def conn_task(ble, ka, cp, bond, timers, stop):
+    while ble.connected:
+        t_sleep = ka.interval
+        left = cp.left()
+        if left is not None:
+            t_sleep = min(t_sleep, left)
+        keep_alive = t_sleep == ka.interval
+        t_turn = ka.t_turn
+        t0 = supervisor.ticks_ms()
+        await timers.sleep('conn', t_sleep)
+        if ble.connected:
+            bond.save(ble.connections[0].paired)
+        # idle: keep alive timer passed without page turn
+        t_slept = ticks_diff(supervisor.ticks_ms(), t0) / 1000
+        if keep_alive and t_slept >= t_sleep and ka.t_turn == t_turn:
+            ka.idle()
+            if LOG_DEBUG:
+                log.write('idle, next {:.0f}s', ka.interval)
+        interval = cp.update()  # longer interval while idle
+        if LOG_INFO:
+            interval_log(cp, interval)
+    if LOG_INFO:
+        log.write('disconnected')
+    stop.set()
+
+
+# run the tasks while connected, return at disconnection or power off
+# (True)
+async def connected(ble, keys, int1c, ip, tg, ms, mp, ap, cc, leds, tel,
+                    gauge, bond, tls, tls_max):
+    bsw = BackSwitch()
+    rpt = KeyRepeat()
+    ka = KeepAlive(tls, tls_max)
+    cp = ConnPolicy()   # connection interval by reading or idle
+    interval = cp.start(ble.connections[0])
+    if LOG_INFO:
+        log.write('connected, ')
+        interval_log(cp, interval)
+    rpt.limit(ble.connections[0].connection_interval)   # 1 page per event
+    timers = Timers()
+    queue = ActionQueue()
+    stop = asyncio.Event()
+    off = asyncio.Event()   # power off
+    # input last: the others have set their timers before its first sleep
+    tasks = [
+        asyncio.create_task(hid_task(queue, ms, mp, ap, cc, leds, cp, ble,
+                                     timers, stop, off)),
+        asyncio.create_task(led_task(leds, timers)),
+        asyncio.create_task(battery_task(gauge, leds, timers)),
+        asyncio.create_task(conn_task(ble, ka, cp, bond, timers, stop)),
+    ]
+    if ip is not None:
+        ip.activity()   # timeout from connection
+        tasks.append(asyncio.create_task(imu_task(ip, timers)))
+    tasks.append(asyncio.create_task(input_task(
+        keys, int1c, ip, tg, bsw, rpt, ka, leds, tel, timers, queue, stop)))
+    await stop.wait()
+    for task in tasks:
+        task.cancel()
+    return off.is_set()
 
 
 # function to turn pages in e-books
-# tadv[sec]:wait time for advertisement, tls[sec]:light sleep timer
-def ebook_turner(tadv=60, tls=60):
+# tadv[sec]:wait time for advertisement, tls[sec]:light sleep timer while
+# reading, tls_max[sec]:its ceiling while idle (also longest time to notice
+# disconnection without touch), gesture: name of turner/gesture.py CONFIGS,
+# imu_idle[sec]: no input until IMU low-power ODR (None: always tap ODR),
+# tap_guard[sec]: W tap this close to a switch edge is its click (0: off),
+# grace[sec]: advertising after link loss before deep sleep (0: at once)
+def ebook_turner(tadv=60, tls=60, tls_max=900, gesture='wtap', imu_idle=30,
+                 tap_guard=0.1, grace=60):
+    # power state telemetry in sleep_memory. dump it when USB is connected
+    tel = Telemetry()
+    if supervisor.runtime.usb_connected:
+        tel.dump()
+    # state before deep sleep and reload (battery level)
+    snap = Snapshot()
     # for battery operation, shuld set p0.14 to low
     vbatt_port_guard()
     # set battery charge mode to HIGH because I use 600mAh battery
     battery_charge_mode('HIGH')
     # define pin configurations
-    led_array = define_led()
-    sw_array = define_switch()
-    # define and initialize sensor as W-tap detector, get interrupt object
-    int1c = define_sensor()
+    leds = LedEngine(define_led(), LED_ON)
+    keys = define_switch()
+    # define and initialize sensor as W-tap & gesture detector, get
+    # interrupt object
+    int1c = define_sensor(gesture)
+    sensor_check()
     # battery monitor
     rbat = analogio.AnalogIn(board.VBATT)   # VBATT raw R/O, 0-65535
     # bluetooth HID and Battery device description
     ble = BLERadio()
     ble.name = 'eBook_turner_w2'
     # ble.tx_power = -20    # not implemented. this app don't need 0dBm
-    hid = HIDService()
+    ms = mp = ap = ip = tg = None
+    if int1c is None:   # page turn only, default descriptor
+        hid = HIDService()
+    else:   # W tap: absolute pointer or mouse
+        from turner.imupower import ImuPower
+        from turner.pointer import HID_DESCRIPTOR, AbsPointer
+        from turner.tapguard import TapGuard
+        ip = ImuPower(int1c, imu_idle)
+        tg = TapGuard(tap_guard)
+        hid = HIDService(hid_descriptor=HID_DESCRIPTOR)
+        if USE_ABS_POINTER:
+            ap = AbsPointer(hid.devices)
+        else:
+            from adafruit_hid.mouse import Mouse
+            from turner.mousepath import SCREENS, plan
+            ms = Mouse(hid.devices)
+            mp = plan(SCREENS[SCREEN], TAP_X, TAP_Y)
     advertisement = ProvideServicesAdvertisement(hid)
     cc = ConsumerControl(hid.devices)
-    ms = Mouse(hid.devices)
     bs = BatteryService()
-    # initial battery level
-    bs.level = battery_percent(rbat.value, led_array)
+    # battery level, updated every 60s after page turn
+    gauge = BatteryGauge(rbat, bs)
+    if snap.raw:    # level before deep sleep, read in 60s
+        gauge.restore(snap.raw, snap.percent)
+        battery_alert(gauge, leds)
+    else:
+        battery_update(gauge, leds, force=True)
+    log.end()
+    log.flush()
     # Disconnect if already connected for properly paring
     ble_disconnection(ble)
-    # adv
+    boot_check()
+    # adv. short burst first when a tablet was bonded
+    bond = BondRecord()
     print('advertising ', end='')
-    ble_advertisement(ble, advertisement, tadv, sw_array, led_array)
+    ble_advertisement(ble, advertisement, tadv, keys, leds, tel, bond)
     if not ble.connected:
         print(' cannot connect.')
-        deep_sleep(ble, int1c, sw_array, led_array)
-    # key operation
-    while ble.connected:
-        print('\nconnected! ', end='')
-        # light sleep until interrupt by key or tap
-        light_sleep(tls, led_array)
-        keycode = get_keycode(int1c, sw_array)
-        print('keycode: 0x{:X}, '.format(keycode), end='')
-        if keycode:     # is not 0x00
-            pager(keycode, ms, cc, bs, rbat, led_array)
-        else:
-            print('there is no keycode (may wakeup by timer)', end='')
-        if keycode == 0x30:    # power off
-            deep_sleep(ble, int1c, sw_array, led_array)
-    print('\ndisconnected')
-    deep_sleep(ble, int1c, sw_array, led_array)
+        deep_sleep(ble, int1c, keys, leds, tel, gauge)
+    # key operation by asyncio tasks until disconnection or power off.
+    # link lost: advertise again for grace[s], without reload
+    while True:
+        off = asyncio.run(connected(ble, keys, int1c, ip, tg, ms, mp, ap,
+                                    cc, leds, tel, gauge, bond, tls, tls_max))
+        if off or not grace:
+            break
+        print('link lost. advertising ', end='')
+        ble_advertisement(ble, advertisement, grace, keys, leds, tel, bond,
+                          lost=True)
+        if not ble.connected:   # grace passed or POWER
+            print(' cannot reconnect.')
+            break
+    deep_sleep(ble, int1c, keys, leds, tel, gauge)
 
 
 if __name__ == '__main__':
     tadv = 60   # wait time for advertisement in sec
     tls = 60    # light sleep timer in sec
-    ebook_turner(tadv, tls)
+    tls_max = 900   # ceiling of light sleep timer while idle in sec
+    ebook_turner(tadv, tls, tls_max)
@@ -0,0 +1,10 @@
+'''
+main.py
+start eBook_turner_w2. the firmware is imported from ebook_turner_w2.mpy
+(precompiled, see README) or ebook_turner_w2.py, so that only this small
+file is compiled at power on
+'''
+from ebook_turner_w2 import ebook_turner
+
+# tadv: wait for advertisement, tls: sleep timer, tls_max: its ceiling
+ebook_turner(tadv=60, tls=60, tls_max=900)
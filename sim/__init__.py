@@ -0,0 +1,8 @@
+'''
+sim
+host-side simulator of eBook_turner_w2.
+stub CircuitPython modules (sim/stubs) + virtual time & hardware (sim.world)
+'''
+from .harness import run    # noqa: F401
+from .scenario import Scenario, Press, Tap, Disconnect, Mode  # noqa: F401
+from .scenario import Tilt, Flick, Bump  # noqa: F401
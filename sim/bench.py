@@ -0,0 +1,672 @@
+'''
+bench.py
+latency benchmark of the firmware on the simulator.
+usage: python -m sim.bench [-f firmware.py ...] [-b board] [-s scenario ...]
+                          [-g gesture ...] [-k name=value,... ...]
+                          [--seed N]
+       python -m sim.bench --mem [-g gesture ...]
+
+memo.
+wake->HID : light_sleep() wake to first cc.send/ms.click of that wake [ms]
+            (touch of absolute pointer counts as ms.click)
+input->HID: button press (or tap) to the cc.send/ms.click it caused [ms]
+input->air: button press (or tap) to air time of the first HID report of
+            that action, i.e. the tablet has it [ms]
+HID burst : first HID call of a wake to air time of its last report [ms]
+sleeps    : blocking time.sleep calls (count and total ms) per wake
+dropped   : presses & taps which never produced a cc.send/ms.click
+pages/s   : HID actions per second in bursts of inputs (mashing FWD),
+            from first press of the burst to its last action
+peak      : most HID actions in 1s (holding FWD to repeat)
+batch     : wakes which send 2 or more pages (skip with BACK+FWD), pages,
+            first cc.send to air time of last report, connection events used
+boot I2C  : I2C transactions, bytes and bus time from power on to advertising
+boot import: libraries and firmware modules (the firmware file too)
+             loaded before advertising, load time and heap (rough cost
+             table in harness.IMPORT_COST, FIRMWARE_* by code size)
+per wake  : by wake source (switch pin, IMU INT1, timer), I2C transactions
+            and awake time (wake to next sleep, CPU on) per wake
+power     : wakes per hour, and average current projected from residency of
+            advertising, light sleep (connected), awake and pseudo deep
+            sleep with assumed currents of sim.telemetry.CURRENT. they
+            include connection events at 30ms interval, the difference of
+            the actual intervals is added with CE_CHARGE per event, and
+            IMU_CURRENT of the accelerometer ODR minus its 208Hz
+advertise : time to connect (first adv_start of a boot, or after link loss,
+            to connect) and charge of advertising for each, CURRENT['ADV']
+            at 100ms interval and ADV_CHARGE per advertising event for
+            other intervals
+crosstalk : switch clicks taken as W tap by the IMU (Press.tap), pointer
+            actions without a W tap of the scenario before them (false
+            clicks), their pointer reports and radio time (first report
+            to air time of the last one). ebook_turner(tap_guard=0) to
+            compare without the filter
+resume    : POWER switch to connected, from the wake by D6 (power sw) while
+            disconnected to the next connect [s]
+recovery  : link lost by the tablet (scenario Disconnect) to the next
+            connect without POWER switch [s], and to its first advertising
+            (lost link noticed at a wake). a D6 wake or the end of the
+            scenario before the connect is a link not recovered
+interval  : connection interval requests (accepted) and updates
+console   : print() writes, bytes and their time per wake (harness
+            CONSOLE_CALL, CONSOLE_BYTE. bytes cost only with USB)
+log       : RingLog.write() calls of enabled LOG_* lines, bytes and their
+            time per wake (harness LOG_CALL, LOG_BYTE), on battery too
+battery   : ADC reads and BatteryService level notifications per page
+gesture   : -g name of turner/gesture.py CONFIGS (Sense only, default wtap).
+            INT1 wakes, those without any HID action (flat again, bumps),
+            those with action but no tap or gesture (bumps taken as
+            gestures), ODR of the longest time and its current
+-k        : keyword arguments of ebook_turner() for a run (e.g. imu_idle=10),
+            each -k is a variant, like -g
+HID limit : pages/s when every connection event is full of press & release
+            reports, packets_per_event / conn_interval / 2 (shortest
+            interval of the run)
+--mem     : gc.mem_free() after define_sensor() of each gesture (Sense),
+            with firmware imports and register descriptors
+            (sim.world.DESCRIPTOR_HEAP). fails below MEM_GUARD
+inputs are matched to HID actions in order of time, so a dropped press
+also shows up as latency of the next one.
+'''
+import argparse
+import ast
+import math
+import os
+
+from . import harness
+from . import scenario as S
+from . import telemetry
+
+# (firmware, board). same firmware on XIAO nRF52840 Sense and not Sense
+FIRMWARES = [('ebook_turner_w2.py', 'sense'), ('ebook_turner_w2.py', 'plain')]
+# name: (builder, needs IMU)
+SCENARIOS = {
+    'reading': (lambda seed: S.reading(seed, pages=200), False),
+    'taps': (lambda seed: S.reading(seed, pages=100, taps=0.3), True),
+    'mash': (lambda seed: S.mash(seed), False),
+    'back': (lambda seed: S.back_and_fwd(seed), False),
+    'hold': (lambda seed: S.hold(seed), False),
+    'skip': (lambda seed: S.skip(seed), False),
+    'overlap': (lambda seed: S.overlap(seed), True),
+    'tilt': (lambda seed: S.gesture(seed, 'tilt'), True),
+    'flick': (lambda seed: S.gesture(seed, 'flick'), True),
+    'pickup': (lambda seed: S.pickup(seed), True),
+    'knock': (lambda seed: S.pickup(seed, hands=False), True),
+    'idle': (lambda seed: S.idle(seed), False),
+    'crosstalk': (lambda seed: S.crosstalk(seed), True),
+    'reconnect': (lambda seed: S.reconnect(seed), False),
+    'glitch': (lambda seed: S.glitch(seed), False),
+}
+ACTIONS = ('cc', 'click')
+# [mC] charge of an empty connection event of nRF52840 at 0dBm (approx.)
+CE_CHARGE = 0.005
+# [mC] charge of a connectable advertising event on 3 channels (approx.)
+ADV_CHARGE = 0.015
+# [mA] LSM6DS3TR-C accelerometer by ODR [Hz] (datasheet typ., low-power
+# mode below 104Hz, 0: power down). sim.telemetry.CURRENT assumes 208Hz
+IMU_CURRENT = {0: 0.003, 12.5: 0.009, 26: 0.015, 52: 0.025, 104: 0.044,
+               208: 0.085, 416: 0.160}
+# [byte] regression guard of free heap after define_sensor() in the heap
+# model (sim.world.HEAP, harness.IMPORT_COST), not a budget of the board:
+# the firmware checks gc.mem_free() against ebook_turner_w2.SENSOR_MEM_FREE
+MEM_GUARD = 48000
+
+
+def is_action(rec):
+    if rec[1] in ACTIONS:
+        return True
+    # touch (Tip Switch on) of digitizer
+    return rec[1] == 'report' and rec[2] == 0x0D and rec[4][0] & 0x01
+
+
+# nearest-rank percentile
+def percentile(values, p):
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    return values[max(0, math.ceil(p / 100 * len(values)) - 1)]
+
+
+# split trace into wakes: (wake time, source, records until next sleep)
+def wakes(trace):
+    out = []
+    current = None
+    for rec in trace:
+        if rec[1] == 'wake':
+            current = (rec[0], rec[2], [])
+            out.append(current)
+        elif rec[1] in ('light_sleep', 'deep_sleep', 'vm_reset'):
+            current = None
+        elif current is not None:
+            current[2].append(rec)
+    return out
+
+
+# match inputs of the scenario to HID actions in order of time. latency to
+# the action, and to air time of the first HID report at or after it
+def input_latency(scenario, trace, window=2.0):
+    inputs = sorted([ev.t for ev in scenario.presses()
+                     if ev.button in ('FWD', 'REV', 'BACK')]
+                    + [ev.t for ev in scenario.taps()]
+                    + [ev.t for ev in scenario.gestures()])
+    actions = [rec[0] for rec in trace if is_action(rec)]
+    air = [(rec[0], rec[4]) for rec in trace
+           if rec[1] == 'notify' and rec[2] == 'hid' and rec[4]]
+    latency = []
+    latency_air = []
+    i = j = 0
+    for t in inputs:
+        while i < len(actions) and actions[i] < t:
+            i += 1
+        if i < len(actions) and actions[i] - t <= window:
+            latency.append(actions[i] - t)
+            while j < len(air) and air[j][0] < actions[i]:
+                j += 1
+            if j < len(air):
+                latency_air.append(air[j][1] - t)
+            i += 1
+    return inputs, latency, latency_air
+
+
+# bursts: inputs closer than gap, 3 or more. returns (pages/s, presses/s)
+def throughput(inputs, actions, gap=1.0):
+    bursts = []
+    for t in inputs:
+        if bursts and t - bursts[-1][-1] < gap:
+            bursts[-1].append(t)
+        else:
+            bursts.append([t])
+    bursts = [b for b in bursts if len(b) >= 3]
+    pages = []
+    presses = []
+    for i, b in enumerate(bursts):
+        t_next = bursts[i + 1][0] if i + 1 < len(bursts) else float('inf')
+        acts = [t for t in actions if b[0] <= t < t_next]
+        if len(acts) > 1:
+            pages.append(len(acts) / (acts[-1] - b[0]))
+            presses.append(len(b) / (b[-1] - b[0]))
+    if not pages:
+        return float('nan'), float('nan')
+    return sum(pages) / len(pages), sum(presses) / len(presses)
+
+
+# most actions in window seconds
+def peak(actions, window=1.0):
+    best = 0
+    j = 0
+    for i, t in enumerate(actions):
+        while actions[j] <= t - window:
+            j += 1
+        best = max(best, i - j + 1)
+    return best / window
+
+
+# wake source of a wake record
+def source_of(name):
+    if name == 'TimeAlarm':
+        return 'timer'
+    return 'IMU' if name == 'IMU_INT1' else 'switch'
+
+
+# per wake source: {source: (wakes, I2C transactions, awake seconds)}
+def per_wake(trace):
+    out = {}
+    source = None
+    for rec in trace:
+        if rec[1] == 'wake':
+            source = source_of(rec[2])
+            t_wake = rec[0]
+            n, i2c, on = out.get(source, (0, 0, 0.0))
+            out[source] = (n + 1, i2c, on)
+        elif source is None:
+            continue
+        elif rec[1] == 'i2c':
+            n, i2c, on = out[source]
+            out[source] = (n, i2c + 1, on)
+        elif rec[1] in ('light_sleep', 'deep_sleep', 'vm_reset'):
+            n, i2c, on = out[source]
+            out[source] = (n, i2c, on + rec[0] - t_wake)
+            source = None
+    return out
+
+
+# [(t, state)] at each change of telemetry state, from power on (ACTIVE)
+def state_changes(trace):
+    out = [(0.0, 'ACTIVE')]
+    connected = False
+    for rec in trace:
+        if rec[1] == 'connect':
+            connected = True
+            continue
+        if rec[1] == 'disconnect':
+            connected = False
+            continue
+        if rec[1] == 'adv_start':
+            new = 'ADV'
+        elif rec[1] == 'light_sleep':
+            new = 'SLEEP' if connected else 'DEEP'
+        elif rec[1] in ('adv_stop', 'wake', 'vm_reset'):
+            new = 'ACTIVE'
+        else:
+            continue
+        out.append((rec[0], new))
+    return out
+
+
+# seconds in power states of sim.telemetry.STATES, from the trace
+def residency(trace, end):
+    seconds = dict.fromkeys(telemetry.STATES, 0.0)
+    changes = state_changes(trace) + [(end, None)]
+    for (t0, state), (t1, _) in zip(changes, changes[1:]):
+        seconds[state] += t1 - t0
+    return seconds
+
+
+# [mA] difference of connection event current from the 30ms interval of
+# sim.telemetry.CURRENT, averaged over the run
+def radio_current(trace, end, scenario, base=0.030):
+    charge = 0.0
+    interval = t0 = None
+    for rec in trace + [(end, 'end')]:
+        if interval is not None and rec[1] in ('conn_update', 'disconnect',
+                                               'end'):
+            charge += CE_CHARGE * (rec[0] - t0) * (1 / interval - 1 / base)
+            interval = None
+        if rec[1] == 'connect':
+            interval, t0 = scenario.conn_interval, rec[0]
+        elif rec[1] == 'conn_update':
+            interval, t0 = rec[2], rec[0]
+    return charge / end
+
+
+# [mA] difference of IMU current from 208Hz averaged over the run, and
+# {ODR: seconds}. power down (ODR 0) is in CURRENT['DEEP'] already
+def imu_current(trace, end, base=208):
+    charge = 0.0
+    seconds = {}
+    odr = t0 = None
+    for rec in trace + [(end, 'imu_odr', None)]:
+        if rec[1] != 'imu_odr':
+            continue
+        if odr:
+            charge += (IMU_CURRENT[odr] - IMU_CURRENT[base]) * (rec[0] - t0)
+            seconds[odr] = seconds.get(odr, 0.0) + rec[0] - t0
+        odr, t0 = rec[2], rec[0]
+    return charge / end, seconds
+
+
+# INT1 wakes: (wakes, without HID action, with action but no tap or
+# gesture within window before, i.e. noise taken as a gesture)
+def imu_wakes(scenario, trace, window=0.5):
+    inputs = [ev.t for ev in scenario.taps() + scenario.gestures()]
+    n = idle = noise = 0
+    for t, source, recs in wakes(trace):
+        if source_of(source) != 'IMU':
+            continue
+        n += 1
+        if not any(is_action(rec) for rec in recs):
+            idle += 1
+        elif not any(0 <= t - t_in <= window for t_in in inputs):
+            noise += 1
+    return n, idle, noise
+
+
+# advertising of each boot: [(time to connect or None, charge [mC])]
+def advertising(trace, base=0.1):
+    out = []
+    t_first = interval = None
+    charge = 0.0
+    for rec in trace:
+        if rec[1] == 'adv_start':
+            if t_first is None:
+                t_first, charge = rec[0], 0.0
+            interval, t0 = rec[2], rec[0]
+        elif rec[1] in ('adv_stop', 'connect') and interval is not None:
+            charge += (rec[0] - t0) * (telemetry.CURRENT['ADV'] + ADV_CHARGE
+                                       * (1 / interval - 1 / base))
+            interval = None
+        if rec[1] == 'connect' and t_first is not None:
+            out.append((rec[0] - t_first, charge))
+            t_first = None
+        elif rec[1] == 'vm_reset' and t_first is not None:
+            out.append((None, charge))
+            t_first = None
+    return out
+
+
+# pointer actions (mouse click, touch) without a scenario tap within window
+# before them: (false clicks, their pointer reports, radio time [s]).
+# a pointer sequence is the reports closer than gap
+def false_clicks(scenario, trace, window=0.6, gap=0.5):
+    taps = [ev.t for ev in scenario.taps()]
+    groups = []     # [first report, last air, reports, action]
+    last = None
+    for rec in trace:
+        if rec[1] == 'report' and rec[2] != 0x0C:   # not consumer control
+            if not groups or rec[0] - groups[-1][1] > gap:
+                groups.append([rec[0], rec[0], 0, None])
+            last = groups[-1]
+            last[2] += 1
+        elif rec[1] == 'notify' and rec[2] == 'hid' and last is not None:
+            last[1] = max(last[1], rec[4] or rec[0])
+            last = None
+        if is_action(rec) and rec[1] != 'cc' and groups \
+                and groups[-1][3] is None:
+            groups[-1][3] = rec[0]
+    false = [g for g in groups if g[3] is not None and not any(
+        0 <= g[3] - t <= window for t in taps)]
+    return (len(false), sum(g[2] for g in false),
+            sum(g[1] - g[0] for g in false))
+
+
+# POWER switch to connected [s]: wake by D6 while disconnected (pseudo deep
+# sleep) to the next connect
+def resume(trace):
+    out = []
+    connected = False
+    t_wake = None
+    for rec in trace:
+        if rec[1] == 'connect':
+            connected = True
+            if t_wake is not None:
+                out.append(rec[0] - t_wake)
+                t_wake = None
+        elif rec[1] == 'disconnect':
+            connected = False
+        elif rec[1] == 'wake' and rec[2] == 'D6' and not connected:
+            t_wake = rec[0]
+    return out
+
+
+# link lost by the host to connect without POWER switch: [(noticed [s],
+# recovered [s])], None when a D6 wake or the end came first
+def recovery(trace):
+    out = []
+    lost = None
+    for rec in trace:
+        if rec[1] == 'disconnect' and rec[2] == 'host':
+            lost = [rec[0], None, None]
+            out.append(lost)
+        elif lost is None:
+            continue
+        elif rec[1] == 'adv_start' and lost[1] is None:
+            lost[1] = rec[0] - lost[0]
+        elif rec[1] == 'connect':
+            lost[2] = rec[0] - lost[0]
+            lost = None
+        elif rec[1] == 'wake' and rec[2] == 'D6':
+            lost = None
+    return [(noticed, recovered) for _, noticed, recovered in out]
+
+
+# wakes with 2 or more pages: [(pages, seconds, connection events)]
+def batches(trace):
+    out = []
+    for t, source, recs in wakes(trace):
+        cc = [rec[0] for rec in recs if rec[1] == 'cc']
+        air = [rec[4] for rec in recs
+               if rec[1] == 'notify' and rec[2] == 'hid' and rec[4]]
+        if len(cc) >= 2 and air:
+            out.append((len(cc), air[-1] - cc[0], len(set(air))))
+    return out
+
+
+def analyze(world):
+    trace = world.trace
+    result = {}
+    wake_hid = []
+    sleeps = []
+    sleep_time = []
+    burst = []
+    reports = 0
+    for t, source, recs in wakes(trace):
+        acts = [rec[0] for rec in recs if is_action(rec)]
+        if acts:
+            wake_hid.append(acts[0] - t)
+        hid = [rec for rec in recs if rec[1] in ACTIONS + ('move', 'report')]
+        air = [rec[4] for rec in recs
+               if rec[1] == 'notify' and rec[2] == 'hid' and rec[4]]
+        if hid and air:
+            burst.append(air[-1] - hid[0][0])
+        reports += sum(1 for rec in recs if rec[1] == 'report')
+        ss = [rec[2] for rec in recs if rec[1] == 'sleep']
+        sleeps.append(len(ss))
+        sleep_time.append(sum(ss))
+    inputs, latency, latency_air = input_latency(world.scenario, trace)
+    actions = [rec[0] for rec in trace if is_action(rec)]
+    result['pages_s'], result['presses_s'] = throughput(inputs, actions)
+    adv = [rec[0] for rec in trace if rec[1] == 'adv_start']
+    result['wakes'] = len(sleeps)
+    result['wake_hid'] = wake_hid
+    result['input_hid'] = latency
+    result['input_air'] = latency_air
+    result['burst'] = burst
+    result['reports'] = reports
+    result['inputs'] = len(inputs)
+    result['dropped'] = len(inputs) - len(latency)
+    result['sleeps'] = sum(sleeps) / max(1, len(sleeps))
+    result['sleep_ms'] = 1000 * sum(sleep_time) / max(1, len(sleep_time))
+    result['boot_adv'] = adv[0] if adv else float('nan')
+    i2c = [rec for rec in trace
+           if rec[1] == 'i2c' and rec[0] < result['boot_adv']]
+    result['boot_i2c'] = (len(i2c), sum(rec[3] for rec in i2c),
+                          sum(rec[4] for rec in i2c))
+    imports = [rec for rec in trace
+               if rec[1] == 'import' and rec[0] < result['boot_adv']]
+    result['boot_import'] = (len(imports), sum(rec[3] for rec in imports),
+                             sum(rec[4] for rec in imports))
+    result['notify'] = sum(1 for rec in trace if rec[1] == 'notify')
+    result['adc'] = sum(1 for rec in trace if rec[1] == 'adc')
+    result['bas'] = sum(1 for rec in trace
+                        if rec[1] == 'notify' and rec[2] == 'bas')
+    result['console'] = world.console
+    result['peak'] = peak(actions)
+    result['batch'] = batches(trace)
+    result['per_wake'] = per_wake(trace)
+    for kind in ('console', 'log'):
+        result[kind + '_wake'] = [
+            (len(c), sum(rec[2] for rec in c), sum(rec[3] for rec in c))
+            for c in ([rec for rec in recs if rec[1] == kind]
+                      for _, _, recs in wakes(trace))]
+    result['residency'] = residency(trace, world.now)
+    result['advertising'] = advertising(trace)
+    result['resume'] = resume(trace)
+    result['recovery'] = recovery(trace)
+    result['click_taps'] = sum(1 for ev in world.scenario.presses()
+                               if ev.tap == 'double')
+    result['false_clicks'] = false_clicks(world.scenario, trace)
+    result['hours'] = world.now / 3600
+    result['radio'] = radio_current(trace, world.now, world.scenario)
+    result['imu'], result['imu_odr'] = imu_current(trace, world.now)
+    result['imu_wakes'] = imu_wakes(world.scenario, trace)
+    result['interval'] = (
+        sum(1 for rec in trace if rec[1] == 'conn_param'),
+        sum(1 for rec in trace if rec[1] == 'conn_param' and rec[3]),
+        sum(1 for rec in trace if rec[1] == 'conn_update'))
+    sc = world.scenario
+    interval = min([sc.conn_interval] + [rec[2] for rec in trace
+                                         if rec[1] == 'conn_update'])
+    result['limit'] = sc.packets_per_event / interval / 2
+    return result
+
+
+def ms(values, p):
+    return '{:7.1f}'.format(1000 * percentile(values, p))
+
+
+def report(name, r):
+    print('{}'.format(name))
+    print('  wakes {:5d}  inputs {:5d}  dropped {:4d}  notifications {:6d}'
+          '  boot->adv {:.3f}s  console {}B'.format(
+              r['wakes'], r['inputs'], r['dropped'], r['notify'],
+              r['boot_adv'], r['console']))
+    for label, key in (('wake->HID ', 'wake_hid'), ('input->HID', 'input_hid'),
+                       ('input->air', 'input_air'), ('HID burst ', 'burst')):
+        v = r[key]
+        print('  {} [ms] p50{} p90{} p99{} max{}  (n={})'.format(
+            label, ms(v, 50), ms(v, 90), ms(v, 99), ms(v, 100), len(v)))
+    print('  blocking time.sleep per wake: {:.2f} calls, {:.1f}ms'
+          '  HID reports per action: {:.2f}'.format(
+              r['sleeps'], r['sleep_ms'],
+              r['reports'] / max(1, len(r['wake_hid']))))
+    if r['pages_s'] == r['pages_s']:    # not nan
+        print('  burst throughput: {:.2f} pages/s for {:.2f} presses/s'.format(
+            r['pages_s'], r['presses_s']))
+    res = r['residency']
+    avg = telemetry.average_current(res) + r['radio'] + r['imu']
+    print('  power: {:.1f} wakes/h, {:.3f}mA average ({}, interval'
+          ' {:+.3f}mA), {:.0f} days with {}mAh'.format(
+              r['wakes'] / r['hours'], avg, ' '.join(
+                  '{} {:.2f}%'.format(k, 100 * v / sum(res.values()))
+                  for k, v in res.items()),
+              r['radio'], telemetry.CAPACITY / avg / 24,
+              telemetry.CAPACITY))
+    adv = r['advertising']
+    ttc = [t for t, _ in adv if t is not None]
+    if len(adv) > 1:
+        print('  advertise: time to connect [s] p50 {:.2f} p90 {:.2f} max'
+              ' {:.2f}, {} failed, {:.1f}mC each  (n={})'.format(
+                  percentile(ttc, 50), percentile(ttc, 90),
+                  percentile(ttc, 100), len(adv) - len(ttc),
+                  sum(c for _, c in adv) / len(adv), len(adv)))
+    if r['click_taps']:
+        print('  crosstalk: {} clicks taken as tap, {} false clicks ({:.1f}%'
+              ' of inputs), {} pointer reports, {:.0f}ms radio'.format(
+                  r['click_taps'], r['false_clicks'][0],
+                  100 * r['false_clicks'][0] / max(1, r['inputs']),
+                  r['false_clicks'][1], 1000 * r['false_clicks'][2]))
+    rs = r['resume']
+    if rs:
+        print('  resume: POWER to connected [s] p50 {:.3f} p90 {:.3f} max'
+              ' {:.3f}  (n={})'.format(percentile(rs, 50), percentile(rs, 90),
+                                      percentile(rs, 100), len(rs)))
+    rc = r['recovery']
+    if rc:
+        ok = [t for _, t in rc if t is not None]
+        seen = [t for t, _ in rc if t is not None]
+        print('  recovery: link lost to connected [s] p50 {:.2f} p90 {:.2f}'
+              ' max {:.2f}, noticed p50 {:.2f}, {} of {} not recovered'
+              .format(percentile(ok, 50), percentile(ok, 90),
+                      percentile(ok, 100), percentile(seen, 50),
+                      len(rc) - len(ok), len(rc)))
+    if r['imu_odr']:
+        odr = max(r['imu_odr'], key=r['imu_odr'].get)
+        print('  gesture: {} INT1 wakes, {} without action, {} by noise,'
+              ' ODR {:g}Hz, IMU {:+.3f}mA'.format(
+                  *r['imu_wakes'], odr, r['imu']))
+    if r['interval'][0]:
+        print('  interval: {} requests, {} accepted, {} updates'.format(
+            *r['interval']))
+    for kind in ('console', 'log'):
+        cw = r[kind + '_wake']
+        n = max(1, len(cw))
+        print('  {} per wake: {:.2f} writes, {:.1f} bytes, {:.3f}ms'.format(
+            kind, sum(c[0] for c in cw) / n, sum(c[1] for c in cw) / n,
+            1000 * sum(c[2] for c in cw) / n))
+    pages = max(1, len(r['wake_hid']))
+    print('  battery: {:.2f} ADC reads, {:.2f} level notifications'
+          ' per page'.format(r['adc'] / pages, r['bas'] / pages))
+    if r['boot_import'][0]:
+        print('  boot import: {} libraries, {:.0f}ms, {}B'.format(
+            r['boot_import'][0], 1000 * r['boot_import'][1],
+            r['boot_import'][2]))
+    if r['boot_i2c'][0]:
+        print('  boot I2C: {} transactions, {} bytes, {:.2f}ms'.format(
+            r['boot_i2c'][0], r['boot_i2c'][1], 1000 * r['boot_i2c'][2]))
+    pw = r['per_wake']
+    print('  per wake: ' + ', '.join(
+        '{} {} I2C {:.2f} awake {:.1f}ms'.format(
+            k, pw[k][0], pw[k][1] / pw[k][0], 1000 * pw[k][2] / pw[k][0])
+        for k in ('switch', 'IMU', 'timer') if k in pw))
+    b = r['batch']
+    if b:
+        n = len(b)
+        pages = sum(x[0] for x in b) / n
+        span = sum(x[1] for x in b) / n
+        print('  batch: {:.1f} pages in {:.1f}ms over {:.1f} conn events,'
+              ' {:.1f} pages/s (HID limit {:.1f})  (n={})'.format(
+                  pages, 1000 * span, sum(x[2] for x in b) / n,
+                  pages / max(span, 1e-6), r['limit'], n))
+    print('  peak {:.1f} pages/s (HID limit {:.1f})'.format(
+        r['peak'], r['limit']))
+
+
+# keyword arguments of ebook_turner() for each run: -g x -k. {} is the
+# default run of main.py. gestures only on Sense
+def variants(args, board):
+    gestures = [{'gesture': g} for g in args.gesture or []
+                if board == 'sense'] or [{}]
+    kwargs = [dict((k, ast.literal_eval(v)) for k, v in
+                   (item.split('=') for item in arg.split(',')))
+              for arg in args.kwargs or []] or [{}]
+    return [dict(g, **k) for g in gestures for k in kwargs]
+
+
+# {gesture: free heap} after define_sensor() on Sense
+def sensor_mem(firmware, gestures):
+    out = {}
+    for g in gestures:
+        world = harness.run(firmware, S.Scenario(end=1.0), 'sense',
+                            call=('define_sensor', {'gesture': g}))
+        out[g] = world.heap_free
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[2])
+    parser.add_argument('-f', '--firmware', action='append')
+    parser.add_argument('-b', '--board', choices=('sense', 'plain'),
+                        help='board of -f firmware (default: by file name)')
+    parser.add_argument('-s', '--scenario', action='append',
+                        choices=sorted(SCENARIOS))
+    parser.add_argument('-g', '--gesture', action='append',
+                        help='gesture configuration (Sense only)')
+    parser.add_argument('-k', '--kwargs', action='append',
+                        metavar='NAME=VALUE,...',
+                        help='arguments of ebook_turner() (variant)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--usb', action='store_true',
+                        help='USB connected (console is sent)')
+    parser.add_argument('--echo', action='store_true',
+                        help='show console output of the firmware')
+    parser.add_argument('--mem', action='store_true',
+                        help='check free heap after define_sensor()')
+    args = parser.parse_args(argv)
+    if args.mem:
+        fw = (args.firmware or [os.path.join(harness.ROOT,
+                                             FIRMWARES[0][0])])[0]
+        mem = sensor_mem(fw, args.gesture or ['wtap'])
+        for g, free in mem.items():
+            print('define_sensor(gesture={!r}): mem_free {}B (guard {}B)'
+                  .format(g, free, MEM_GUARD))
+        if min(mem.values()) < MEM_GUARD:
+            parser.exit(1, 'under MEM_GUARD\n')
+        return
+    if args.firmware:
+        firmwares = [(fw, args.board or harness.board_of(fw))
+                     for fw in args.firmware]
+    else:
+        firmwares = [(os.path.join(harness.ROOT, fw), board)
+                     for fw, board in FIRMWARES
+                     if args.board in (None, board)]
+    for fw, board in firmwares:
+        for name in args.scenario or SCENARIOS:
+            build, needs_imu = SCENARIOS[name]
+            if needs_imu and board != 'sense':
+                continue
+            for variant in variants(args, board):
+                sc = build(args.seed)
+                sc.usb = args.usb
+                call = None
+                label = name
+                if variant:
+                    call = ('ebook_turner', variant)
+                    label = '{} [{}]'.format(name, ' '.join(
+                        '{}={}'.format(k, v) for k, v in variant.items()))
+                world = harness.run(fw, sc, board, call=call, echo=args.echo)
+                report('{} ({}) / {}'.format(os.path.basename(fw), board,
+                                             label), analyze(world))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,274 @@
+'''
+harness.py
+run the firmware on CPython with the stub modules in sim/stubs and virtual
+time of sim.world. code.py like execution: the firmware file is executed as
+__main__, and executed again after supervisor.reload() or deep sleep.
+'''
+import ast
+import contextlib
+import importlib.abc
+import importlib.machinery
+import importlib.util
+import os
+import runpy
+import sys
+import tokenize
+
+from . import world as _world
+
+SIM_DIR = os.path.dirname(os.path.abspath(__file__))
+STUBS = os.path.join(SIM_DIR, 'stubs')
+ROOT = os.path.dirname(SIM_DIR)
+# stub modules which have same name as builtin or stdlib modules.
+# path finder never reaches them, so they are loaded explicitly
+SHADOWED = ('time', 'gc')
+# load time [s] and heap [byte] of library modules, rough values of the
+# .mpy bundle on nRF52840 to compare import variants (not measured).
+# built-in modules are free, the firmware and its modules cost FIRMWARE_*
+IMPORT_COST = {
+    'asyncio': (0.045, 11000),      # with core, task, event, funcs
+    'adafruit_ble': (0.040, 9000),
+    'adafruit_ble.advertising': (0.010, 3000),
+    'adafruit_ble.advertising.standard': (0.015, 4000),
+    'adafruit_ble.services': (0.003, 600),
+    'adafruit_ble.services.standard': (0.008, 2500),
+    'adafruit_ble.services.standard.hid': (0.025, 7000),
+    'adafruit_hid': (0.002, 400),
+    'adafruit_hid.consumer_control': (0.003, 700),
+    'adafruit_hid.mouse': (0.003, 900),
+    'adafruit_bus_device': (0.001, 100),
+    'adafruit_bus_device.i2c_device': (0.004, 900),
+    'adafruit_register': (0.001, 100),
+    'adafruit_register.i2c_bit': (0.003, 600),
+    'adafruit_register.i2c_bits': (0.004, 800),
+    'adafruit_lsm6ds': (0.035, 9000),
+    'adafruit_lsm6ds.lsm6ds3trc': (0.003, 600),
+}
+# firmware file and its modules (turner/*.py) precompiled to .mpy: load
+# time [s] and heap [byte] per byte of code, i.e. the source without
+# comments, docstrings and indentation, string and bytes constants by their
+# value (rough, bytecode and constants are loaded to RAM on nRF52840, not
+# measured)
+FIRMWARE_LOAD = 2e-6
+FIRMWARE_HEAP = 0.8
+
+
+# bytes of a token, constants by their value (escapes, quotes and prefix
+# are not kept)
+def _token_size(tok):
+    if tok.type == tokenize.STRING:
+        try:
+            return len(ast.literal_eval(tok.string))
+        except ValueError:      # f-string
+            pass
+    return len(tok.string)
+
+
+# bytes of code of a python source: tokens except comments and docstrings
+def code_size(path):
+    n = 0
+    start = True    # at the start of a statement
+    with open(path, 'rb') as f:
+        for tok in tokenize.tokenize(f.readline):
+            if tok.type in (tokenize.COMMENT, tokenize.NL, tokenize.ENCODING,
+                            tokenize.INDENT, tokenize.DEDENT):
+                continue
+            if tok.type == tokenize.NEWLINE:
+                start = True
+                continue
+            if not (start and tok.type == tokenize.STRING):     # docstring
+                n += _token_size(tok) + 1
+            start = False
+    return n
+
+
+def firmware_cost(path):
+    n = code_size(path)
+    return n * FIRMWARE_LOAD, int(n * FIRMWARE_HEAP)
+
+
+def _stub_names():
+    names = set()
+    for entry in os.listdir(STUBS):
+        path = os.path.join(STUBS, entry)
+        if entry.endswith('.py'):
+            names.add(entry[:-3])
+        elif os.path.isfile(os.path.join(path, '__init__.py')):
+            names.add(entry)
+    return names
+
+
+# modules of firmware side: stubs and modules under the firmware directory
+def _is_firmware_module(name, module, fw_dir, stubs):
+    if name.split('.')[0] in stubs:
+        return True
+    path = getattr(module, '__file__', None) or ''
+    return path.startswith(fw_dir) and not path.startswith(SIM_DIR)
+
+
+def _purge(fw_dir, stubs):
+    for name, module in list(sys.modules.items()):
+        if _is_firmware_module(name, module, fw_dir, stubs):
+            del sys.modules[name]
+    for name in SHADOWED:
+        path = os.path.join(STUBS, name + '.py')
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+
+
+# loader which charges IMPORT_COST to the world before executing the module
+class _CostLoader(importlib.abc.Loader):
+    def __init__(self, loader, name):
+        self.loader = loader
+        self.name = name
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        if self.name in IMPORT_COST:
+            cost = IMPORT_COST[self.name]
+        else:
+            cost = firmware_cost(module.__file__)
+        _world.current().load(self.name, *cost)
+        self.loader.exec_module(module)
+        if self.name in TIMED:
+            TIMED[self.name](module)
+
+
+# IMPORT_COST of libraries and FIRMWARE_* of modules under fw_dir
+class _ImportCost(importlib.abc.MetaPathFinder):
+    def __init__(self, fw_dir):
+        # top level modules and packages of the firmware directory
+        self.own = {os.path.splitext(entry)[0] for entry in os.listdir(fw_dir)
+                    if entry.endswith('.py') or os.path.isfile(
+                        os.path.join(fw_dir, entry, '__init__.py'))}
+        self.own.discard(os.path.basename(SIM_DIR))
+
+    def find_spec(self, name, path, target=None):
+        if name not in IMPORT_COST and name.split('.')[0] not in self.own:
+            return None
+        spec = importlib.machinery.PathFinder.find_spec(name, path)
+        if spec is not None:
+            spec.loader = _CostLoader(spec.loader, name)
+        return spec
+
+
+# cost of RingLog.write() of turner/log.py on the board [s]: per call
+# (format, ticks_ms, slices of the ring on the VM) and per byte put into
+# the buffer (approx.). flush() goes to print(), charged as console
+LOG_CALL = 60e-6
+LOG_BYTE = 1e-6
+
+
+# RingLog.write() recorded as 'log' and charged to the virtual clock
+def _timed_log(module):
+    write = module.RingLog.write
+
+    def timed(self, fmt, *args):
+        n = self.n
+        write(self, fmt, *args)
+        w = _world.current()
+        dt = LOG_CALL + LOG_BYTE * (self.n - n)
+        w.record('log', self.n - n, dt)
+        w.advance_to(w.now + dt)
+    module.RingLog.write = timed
+
+
+# firmware modules whose calls cost time on the board: name: patch
+TIMED = {'turner.log': _timed_log}
+
+
+# cost of print() on the board [s]: per write (VM call, string building,
+# serial layer) and per byte to USB CDC when USB is connected (approx.)
+CONSOLE_CALL = 100e-6
+CONSOLE_BYTE = 10e-6
+
+
+# console output of the firmware. counted, timed and echoed when asked
+class _Console:
+    def __init__(self, world, echo):
+        self.world = world
+        self.echo = echo
+
+    def write(self, s):
+        if not s:
+            return 0
+        n = len(s.encode())
+        w = self.world
+        w.console += n
+        w.console_writes += 1
+        dt = CONSOLE_CALL + (CONSOLE_BYTE * n if w.scenario.usb else 0)
+        w.record('console', n, dt)
+        if self.echo:
+            sys.__stdout__.write(s)
+        w.advance_to(w.now + dt)
+        return len(s)
+
+    def flush(self):
+        pass
+
+
+@contextlib.contextmanager
+def _environment(world, fw_dir, echo):
+    stubs = _stub_names()
+    saved = {name: module for name, module in sys.modules.items()
+             if _is_firmware_module(name, module, fw_dir, stubs)}
+    saved.update({name: sys.modules[name] for name in SHADOWED
+                  if name in sys.modules})
+    for name in saved:
+        del sys.modules[name]
+    sys.path[:0] = [STUBS, fw_dir]
+    finder = _ImportCost(fw_dir)
+    sys.meta_path.insert(0, finder)
+    _world._current = world
+    try:
+        with contextlib.redirect_stdout(_Console(world, echo)):
+            yield lambda: _purge(fw_dir, stubs)
+    finally:
+        _world._current = None
+        sys.meta_path.remove(finder)
+        for name, module in list(sys.modules.items()):
+            if _is_firmware_module(name, module, fw_dir, stubs) \
+                    or name in SHADOWED:
+                del sys.modules[name]
+        sys.modules.update(saved)
+        del sys.path[:2]
+
+
+def board_of(firmware):
+    return 'plain' if 'woTap' in os.path.basename(firmware) else 'sense'
+
+
+# run firmware on scenario until scenario.end, return the World.
+# call: (function name, kwargs) to call instead of running as __main__
+def run(firmware, scenario, board=None, call=None, echo=False):
+    firmware = os.path.abspath(firmware)
+    world = _world.World(scenario, board or board_of(firmware))
+    with _environment(world, os.path.dirname(firmware), echo) as restart:
+        while True:
+            restart()
+            world.load(os.path.basename(firmware), *firmware_cost(firmware))
+            try:
+                if call is None:
+                    runpy.run_path(firmware, run_name='__main__')
+                else:
+                    name = os.path.splitext(os.path.basename(firmware))[0]
+                    spec = importlib.util.spec_from_file_location(
+                        name.replace('-', '_'), firmware)
+                    module = importlib.util.module_from_spec(spec)
+                    spec.loader.exec_module(module)
+                    getattr(module, call[0])(**call[1])
+                # code.py finished: REPL waits forever
+                world.record('code_done')
+                world.advance_to(world.end + 1)
+            except _world.Halt:
+                break
+            except _world.Reload:
+                world.wake_alarm = None
+                world.reset_vm('reload')
+            except _world.DeepSleepReset:
+                world.reset_vm('deep_sleep')
+    return world
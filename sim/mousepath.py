@@ -0,0 +1,62 @@
+'''
+mousepath.py
+relative mouse paths of turner/mousepath.py against the fixed path of r1.x.
+usage: python -m sim.mousepath [-i interval_ms ...] [-x 0.50] [-y 0.46]
+
+memo.
+reports: HID reports of the moves (adafruit_hid splits a move over +-127).
+time: first move to click, a report per connection event (the firmware
+waits min(interval, 30ms) after each), r1.x waits 60ms after each move.
+landing: where the r1.x path clicks on the screen of the profile, in ratio
+(home is short on screens larger than 1080x1450).
+'''
+import argparse
+
+from turner.mousepath import SCREENS, plan
+
+# r1.x: 10 moves to home, 5 moves to the point
+LEGACY = [(-108, -145)] * 10 + [(108, 133)] * 5
+LEGACY_WAIT = 60    # [ms] after each move
+WAIT_MAX = 30       # [ms] after each report, mouse_wait() of the firmware
+
+
+def reports(moves, step=127):
+    return sum(-(-max(abs(dx), abs(dy)) // step) for dx, dy in moves)
+
+
+# click point of r1.x path from the lower right corner, in ratio of screen
+def legacy_landing(screen):
+    width, height, gain = screen
+    x, y = width * gain, height * gain
+    for dx, dy in LEGACY:
+        x = min(width * gain, max(0, x + dx))
+        y = min(height * gain, max(0, y + dy))
+    return x / (width * gain), y / (height * gain)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[2])
+    parser.add_argument('-i', '--interval', type=float, action='append',
+                        help='connection interval [ms] (default 15 30 150)')
+    parser.add_argument('-x', type=float, default=0.50)
+    parser.add_argument('-y', type=float, default=0.46)
+    args = parser.parse_args(argv)
+    intervals = args.interval or [15, 30, 150]
+    n_old = reports(LEGACY)
+    t_old = len(LEGACY) * LEGACY_WAIT
+    print('r1.x: {} reports, {}ms'.format(n_old, t_old))
+    print('  profile      screen     reports  saved  ' + '  '.join(
+        '{:>5g}ms saved'.format(i) for i in intervals) + '   r1.x lands')
+    for name, screen in SCREENS.items():
+        home, target = plan(screen, args.x, args.y)
+        n = len(home) + len(target)
+        times = [n * min(i, WAIT_MAX) for i in intervals]
+        print('  {:10s} {:>4d}x{:<4d} {:3d}+{:<3d} {:5d}  '.format(
+            name, screen[0], screen[1], len(home), len(target),
+            n_old - n) + '  '.join('{:5.0f} {:6.0f}'.format(
+                t, t_old - t) for t in times)
+            + '   ({:.2f}, {:.2f})'.format(*legacy_landing(screen)))
+
+
+if __name__ == '__main__':
+    main()
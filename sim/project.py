@@ -0,0 +1,246 @@
+'''
+project.py
+battery life projection: usage traces replayed through the firmware.
+usage: python -m sim.project [usage.csv ...] [--synth days] [-b board]
+                             [-k name=value,... ...] [--capacity mAh]
+                             [--current NAME=mA ...] [--seed N]
+
+memo.
+usage.csv: t,event[,arg] per line ('#' comment). t in seconds from power
+on, or date & time (ISO 8601, from the first line + 5s). events:
+fwd, rev, back  press of the switch (arg: duration [s], default 0.12)
+power           press of POWER (BACK) to wake the turner up
+tap             W tap on the case (Sense)
+tablet_off      tablet BT off (screen off), the link is lost
+tablet_on       tablet BT on again, it reconnects when the turner advertises
+charge_on/off   USB charger, no battery drain in between
+end             end of the trace (default: last event + 60s)
+--synth makes days of sim.scenario.usage() instead (2 sessions a day,
+charged every 7 days).
+the trace runs on the simulator in virtual time (4 weeks in ~10s a
+variant, the tablet off is skipped by sim.world.Ble.scanned()), the
+current is integrated by component over the time on battery:
+state   CURRENT of telemetry state (ADV, SLEEP, ACTIVE, DEEP) without LEDs
+        and IMU, radio at 30ms connection interval / 100ms advertising
+LED     LED_RED, LED_GREEN, LED_BLUE, D0 (external) while driven on
+IMU     sim.bench.IMU_CURRENT of the accelerometer ODR while powered
+radio   difference of connection events at the actual interval (CE_CHARGE)
+        and advertising events at the actual interval (ADV_CHARGE)
+per page: charge on battery over HID actions, so idle and advertising
+between sessions are included. days: capacity over charge a day on
+battery. each -k is a variant (e.g. -k tls=120 -k imu_idle=None).
+'''
+import argparse
+import ast
+import datetime
+import os
+import time
+
+from . import bench
+from . import harness
+from . import scenario as S
+from . import telemetry
+
+# [mA] assumed currents of components
+CURRENT = {
+    'ADV': 1.7,         # advertising at 100ms, CPU idle
+    'SLEEP': 0.6,       # light sleep, connected at 30ms
+    'ACTIVE': 8.0,      # CPU and radio
+    'DEEP': 0.3,        # pseudo deep sleep
+    'LED_RED': 0.68,    # (3.3 - 1.8V) / 2.2k
+    'LED_GREEN': 0.11,  # (3.3 - 2.2V) / 10k
+    'LED_BLUE': 0.27,   # (3.3 - 2.7V) / 2.2k
+    'D0': 0.1,          # external LED, 10k
+}
+LEDS = ('LED_RED', 'LED_GREEN', 'LED_BLUE', 'D0')     # active low
+COMPONENTS = ('state', 'LED', 'IMU', 'radio')
+PRESS = {'fwd': 'FWD', 'rev': 'REV', 'back': 'BACK', 'power': 'BACK'}
+MAH = 3600.0    # [mA s]
+
+
+def _time(text, origin):
+    try:
+        return float(text)
+    except ValueError:
+        t = datetime.datetime.fromisoformat(text).timestamp()
+        if origin[0] is None:
+            origin[0] = t - 5.0
+        return t - origin[0]
+
+
+# Scenario of a usage CSV
+def load(path):
+    events = []
+    charging = []
+    origin = [None]
+    off = on = end = None
+    t = 0.0
+    with open(path) as f:
+        for n, line in enumerate(f, 1):
+            line = line.split('#')[0].strip()
+            if not line:
+                continue
+            item = [s.strip() for s in line.split(',')]
+            t, name = _time(item[0], origin), item[1].lower()
+            arg = float(item[2]) if len(item) > 2 and item[2] else None
+            if name in PRESS:
+                events.append(S.Press(t, PRESS[name], arg or (
+                    0.2 if name == 'power' else 0.12)))
+            elif name == 'tap':
+                events.append(S.Tap(t))
+            elif name == 'tablet_off':
+                off = S.Disconnect(t)
+                events.append(off)
+            elif name == 'tablet_on' and off is not None:
+                off.off, off = t - off.t, None
+            elif name == 'charge_on':
+                on = t
+            elif name == 'charge_off' and on is not None:
+                charging.append((on, t))
+                on = None
+            elif name == 'end':
+                end = t
+            elif name not in ('tablet_on', 'charge_off'):
+                raise ValueError('{}:{}: unknown event {!r}'.format(
+                    path, n, name))
+    end = end if end is not None else t + 60.0
+    if off is not None:
+        off.off = end - off.t
+    if on is not None:
+        charging.append((on, end))
+    return S.Scenario(events, end=end, host_delay=0.0, scan=(0.030, 0.300),
+                      charge=charging)
+
+
+# [(t, component, mA)] changes of current of each part of the board
+def changes(trace, scenario, current):
+    out = [(t, 'state', current[state])
+           for t, state in bench.state_changes(trace)]
+    radio = {'CE': 0.0, 'ADV': 0.0}
+    imu = {'power': False, 'odr': 0}
+    for rec in trace:
+        t, kind = rec[0], rec[1]
+        if kind == 'pin' and rec[2] in LEDS:
+            out.append((t, rec[2], 0.0 if rec[3] else current[rec[2]]))
+        elif kind == 'vm_reset':
+            out.extend((t, name, 0.0) for name in LEDS)
+        elif kind in ('imu_power', 'imu_odr'):
+            imu['power' if kind == 'imu_power' else 'odr'] = rec[2]
+            out.append((t, 'IMU', bench.IMU_CURRENT[imu['odr']]
+                        if imu['power'] else 0.0))
+        elif kind in ('connect', 'conn_update', 'disconnect', 'adv_start',
+                      'adv_stop'):
+            if kind == 'connect':
+                radio['ADV'] = 0.0
+                radio['CE'] = bench.CE_CHARGE * (
+                    1 / scenario.conn_interval - 1 / 0.030)
+            elif kind == 'conn_update':
+                radio['CE'] = bench.CE_CHARGE * (1 / rec[2] - 1 / 0.030)
+            elif kind == 'disconnect':
+                radio['CE'] = 0.0
+            elif kind == 'adv_start':
+                radio['ADV'] = bench.ADV_CHARGE * (1 / rec[2] - 1 / 0.1)
+            else:
+                radio['ADV'] = 0.0
+            out.append((t, 'radio', radio['CE'] + radio['ADV']))
+    out.sort(key=lambda c: c[0])
+    return out
+
+
+# [s] of (t0, t1) out of the charging periods
+def _on_battery(t0, t1, charging):
+    return t1 - t0 - sum(max(0.0, min(t1, c1) - max(t0, c0))
+                         for c0, c1 in charging)
+
+
+# ({component: mAh}, seconds on battery)
+def integrate(changes, end, charging):
+    level = {}
+    charge = dict.fromkeys(COMPONENTS, 0.0)
+    t0 = 0.0
+    for t, name, ma in changes + [(end, None, 0.0)]:
+        dt = _on_battery(t0, min(t, end), charging)
+        if dt > 0:
+            for part, value in level.items():
+                charge[part if part in COMPONENTS else 'LED'] += value * dt
+        t0 = max(t0, min(t, end))
+        if name is not None:
+            level[name] = ma
+    return ({k: v / MAH for k, v in charge.items()},
+            _on_battery(0.0, end, charging))
+
+
+def project(world, current, capacity):
+    sc = world.scenario
+    charge, seconds = integrate(changes(world.trace, sc, current), sc.end,
+                                sc.charge)
+    total = sum(charge.values())
+    pages = sum(1 for rec in world.trace if bench.is_action(rec))
+    per_day = total / seconds * 86400 if seconds else 0.0
+    return {
+        'charge': charge, 'total': total, 'pages': pages,
+        'avg': total * MAH / seconds if seconds else 0.0,
+        'per_page': total / pages * 1000 if pages else float('nan'),
+        'per_day': per_day,
+        'days': capacity / per_day if per_day else float('inf'),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[2])
+    parser.add_argument('file', nargs='*', help='usage CSV')
+    parser.add_argument('--synth', type=int, metavar='DAYS',
+                        help='synthetic usage instead of files')
+    parser.add_argument('-f', '--firmware',
+                        default=os.path.join(harness.ROOT,
+                                             'ebook_turner_w2.py'))
+    parser.add_argument('-b', '--board', choices=('sense', 'plain'),
+                        default='sense')
+    parser.add_argument('-k', '--kwargs', action='append',
+                        metavar='NAME=VALUE,...',
+                        help='arguments of ebook_turner() (variant)')
+    parser.add_argument('--capacity', type=float,
+                        default=telemetry.CAPACITY, help='[mAh]')
+    parser.add_argument('--current', action='append', default=[],
+                        metavar='NAME=mA', help='e.g. SLEEP=0.5, D0=0')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+    current = dict(CURRENT)
+    for item in args.current:
+        name, value = item.split('=')
+        if name not in current:
+            parser.error('unknown current {}'.format(name))
+        current[name] = float(value)
+    builds = []
+    if args.synth:
+        builds.append(('synth {}d'.format(args.synth), lambda: S.usage(
+            args.seed, days=args.synth, charge=(7, 2.0))))
+    for path in args.file:
+        builds.append((path, lambda path=path: load(path)))
+    if not builds:
+        parser.error('no usage (file or --synth)')
+    args.gesture = None
+    for name, build in builds:
+        sc = build()
+        charging = sum(c1 - c0 for c0, c1 in sc.charge)
+        print('{}: {:.1f} days, {} inputs, {} tablet off, charged {:.1f}h'
+              .format(name, sc.end / 86400, len(sc.presses() + sc.taps()),
+                      len(sc.host_off), charging / 3600))
+        print('  variant              pages  uAh/page  mAh/day  avg mA'
+              '    days  state    LED    IMU  radio [mAh]  sim')
+        for variant in bench.variants(args, args.board):
+            t0 = time.time()
+            world = harness.run(args.firmware, build(), args.board, call=(
+                'ebook_turner', variant) if variant else None)
+            r = project(world, current, args.capacity)
+            label = ' '.join('{}={}'.format(k, v)
+                             for k, v in variant.items()) or 'default'
+            print('  {:20s} {:5d} {:9.1f} {:8.2f} {:7.3f} {:7.1f} '.format(
+                label, r['pages'], r['per_page'], r['per_day'], r['avg'],
+                r['days']) + ' '.join('{:6.1f}'.format(r['charge'][c])
+                                      for c in COMPONENTS)
+                + '  {:9.1f}s'.format(time.time() - t0))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,381 @@
+'''
+scenario.py
+scripted user & host behaviour for the simulator.
+all times are in seconds of virtual time from power on.
+'''
+import random
+from dataclasses import dataclass, field
+
+
+# button press. tap: physical shock of the click seen by IMU
+# (None, 'single' or 'double'). 'double' is the press & release clicks taken
+# as W tap, reported QUIET after the release shock. bounce: contact chatter
+# time at both edges
+@dataclass
+class Press:
+    t: float
+    button: str = 'FWD'
+    duration: float = 0.12
+    tap: str = None
+    bounce: float = 0.0
+
+    def install(self, world, pulses):
+        t0, t1 = self.t, self.t + self.duration
+        if self.bounce:
+            # chatter: 3 short opens after press and 3 short closes after release
+            step = self.bounce / 6
+            for i in range(3):
+                pulses[self.button].append((t0 + 2 * i * step, t0 + (2 * i + 1) * step))
+                pulses[self.button].append((t1 + (2 * i + 1) * step, t1 + (2 * i + 2) * step))
+            t0 += self.bounce
+        pulses[self.button].append((t0, t1))
+        if self.tap is not None and world.imu is not None:
+            double = self.tap == 'double'
+            t_tap = t1 + 0.04 if double else self.t + 0.005
+            world.schedule(t_tap, lambda: world.imu.tap(double))
+
+
+# knock on the device (double tap when double is True)
+@dataclass
+class Tap:
+    t: float
+    double: bool = True
+
+    def install(self, world, pulses):
+        if world.imu is not None:
+            world.schedule(self.t, lambda: world.imu.tap(self.double))
+
+
+# board tilted to edge ('YH': Y axis down, see world.Imu.orient) and back
+# to flat after hold seconds, turns a page with tilt gestures
+@dataclass
+class Tilt:
+    t: float
+    edge: str = 'YH'
+    hold: float = 1.0
+
+    def install(self, world, pulses):
+        if world.imu is not None:
+            world.schedule(self.t, lambda: world.imu.orient(self.edge))
+            world.schedule(self.t + self.hold,
+                           lambda: world.imu.orient('ZH'))
+
+
+# flick of the wrist, g [g] of slope. turns a page with flick gestures
+@dataclass
+class Flick:
+    t: float
+    g: float = 1.5
+    axis: str = 'X'
+
+    def install(self, world, pulses):
+        if world.imu is not None:
+            world.schedule(self.t, lambda: world.imu.shake(self.g, self.axis))
+
+
+# unintended shock (device put on a table, bag), not an input
+@dataclass
+class Bump(Flick):
+    g: float = 0.8
+
+
+# link lost at t (RF glitch or BT turned off on the tablet). the tablet
+# does not accept a new connection for off seconds
+@dataclass
+class Disconnect:
+    t: float
+    off: float = 0.0
+
+    def install(self, world, pulses):
+        world.schedule(self.t, lambda: world.ble.disconnect(by='host'))
+
+
+# slide switch to Kinoppy mode (low) from t0 to t1
+@dataclass
+class Mode:
+    t0: float
+    t1: float = float('inf')
+
+    def install(self, world, pulses):
+        pulses['MODE'].append((self.t0, self.t1))
+
+
+@dataclass
+class Scenario:
+    events: list = field(default_factory=list)
+    end: float = 600.0
+    host_delay: float = 1.5         # adv start to connect. None: never
+    scan: tuple = None      # (window, interval) [s] of the tablet scan.
+                            # connect at first adv event in a window after
+                            # host_delay. None: just after host_delay
+    host_off: list = field(default_factory=list)    # [(t0, t1)] BT off
+    paired: bool = True     # False: bond removed on the tablet
+    conn_interval: float = 0.030    # chosen by the tablet
+    interval_range: tuple = (0.0075, 0.4)  # accepted by the tablet [s]
+    accept_update: bool = True      # False: rejects parameter updates
+    update_events: int = 6          # request to instant [conn events]
+    packets_per_event: int = 4
+    tx_queue: int = 3
+    battery_raw: int = 23000        # VBATT raw at t=0
+    battery_drain: float = 0.0      # [raw/s]
+    battery_noise: float = 40.0     # [raw] sd of ADC noise (radio TX, LEDs)
+    charge: list = field(default_factory=list)      # [(t0, t1)] charging
+    usb: bool = False               # USB host attached (console readable)
+
+    def __post_init__(self):
+        for ev in self.events:
+            if isinstance(ev, Disconnect) and ev.off:
+                self.host_off.append((ev.t, ev.t + ev.off))
+
+    def presses(self):
+        return [ev for ev in self.events if isinstance(ev, Press)]
+
+    def taps(self):
+        return [ev for ev in self.events if isinstance(ev, Tap)]
+
+    def gestures(self):
+        return [ev for ev in self.events if isinstance(ev, (Tilt, Flick))
+                and not isinstance(ev, Bump)]
+
+
+# reading session: page turns with gaps like a real reader.
+# pages FWD presses, some REV (back a page) and some double taps
+def reading(seed=1, pages=100, gap=(3.0, 30.0), rev=0.1, taps=0.0,
+            start=5.0, **kw):
+    rnd = random.Random(seed)
+    events = []
+    t = start
+    for _ in range(pages):
+        t += rnd.uniform(*gap)
+        r = rnd.random()
+        if r < taps:
+            events.append(Tap(t))
+        elif r < taps + rev:
+            events.append(Press(t, 'REV', rnd.uniform(0.08, 0.2)))
+        else:
+            events.append(Press(t, 'FWD', rnd.uniform(0.08, 0.2)))
+    kw.setdefault('end', t + 10)
+    return Scenario(events, **kw)
+
+
+# nervous reader: bursts of FWD presses every period seconds
+def mash(seed=1, bursts=10, presses=8, period=0.15, start=5.0, gap=10.0,
+         **kw):
+    rnd = random.Random(seed)
+    events = []
+    t = start
+    for _ in range(bursts):
+        t += gap
+        for i in range(presses):
+            events.append(Press(t + i * period, 'FWD',
+                                rnd.uniform(0.05, period * 0.6)))
+    kw.setdefault('end', t + presses * period + 10)
+    return Scenario(events, **kw)
+
+
+# reading session where the IMU takes some switch clicks for a W tap
+# (clicks: ratio of presses), with real double taps (taps) in between
+def crosstalk(seed=1, pages=100, gap=(3.0, 30.0), clicks=0.3, taps=0.2,
+              start=5.0, **kw):
+    rnd = random.Random(seed)
+    events = []
+    t = start
+    for _ in range(pages):
+        t += rnd.uniform(*gap)
+        if rnd.random() < taps:
+            events.append(Tap(t))
+        else:
+            events.append(Press(t, 'FWD', rnd.uniform(0.08, 0.2), tap=(
+                'double' if rnd.random() < clicks else None)))
+    kw.setdefault('end', t + 10)
+    return Scenario(events, **kw)
+
+
+# BACK presses: short ones (BACK) with FWD presses right after them
+def back_and_fwd(seed=1, count=20, start=5.0, gap=8.0, **kw):
+    rnd = random.Random(seed)
+    events = []
+    t = start
+    for _ in range(count):
+        t += gap
+        events.append(Press(t, 'BACK', rnd.uniform(0.08, 0.2)))
+        events.append(Press(t + 0.3, 'FWD', rnd.uniform(0.08, 0.15)))
+    kw.setdefault('end', t + 10)
+    return Scenario(events, **kw)
+
+
+# holding FWD to repeat pages, for duration seconds
+def hold(seed=1, count=10, duration=(1.0, 4.0), start=5.0, gap=10.0, **kw):
+    rnd = random.Random(seed)
+    events = []
+    t = start
+    for _ in range(count):
+        t += gap
+        events.append(Press(t, 'FWD', rnd.uniform(*duration)))
+    kw.setdefault('end', t + duration[1] + 10)
+    return Scenario(events, **kw)
+
+
+# chord: FWD presses while BACK is held, to skip pages
+def skip(seed=1, count=10, presses=2, start=5.0, gap=10.0, **kw):
+    rnd = random.Random(seed)
+    events = []
+    t = start
+    for _ in range(count):
+        t += gap
+        events.append(Press(t, 'BACK', 0.3 + 0.4 * presses))
+        for i in range(presses):
+            events.append(Press(t + 0.2 + 0.4 * i, 'FWD',
+                                rnd.uniform(0.08, 0.2)))
+    kw.setdefault('end', t + 10)
+    return Scenario(events, **kw)
+
+
+# inputs which come while the previous ones are sent: skip chords, each
+# followed by FWD, REV and a double tap within a few connection events
+def overlap(seed=1, count=20, start=5.0, gap=8.0, **kw):
+    rnd = random.Random(seed)
+    events = []
+    t = start
+    for _ in range(count):
+        t += gap
+        events.append(Press(t, 'BACK', 0.35))
+        events.append(Press(t + 0.1, 'FWD', rnd.uniform(0.05, 0.1)))
+        t1 = t + 0.35 + rnd.uniform(0.0, 0.05)
+        events.append(Press(t1, 'FWD', rnd.uniform(0.05, 0.1)))
+        events.append(Press(t1 + rnd.uniform(0.03, 0.1), 'REV',
+                            rnd.uniform(0.05, 0.1)))
+        events.append(Tap(t1 + rnd.uniform(0.25, 0.4)))
+    kw.setdefault('end', t + 10)
+    return Scenario(events, **kw)
+
+
+# reading session with pages turned by gestures of kind ('tilt': YH, some
+# YL to go back, or 'flick'), and bumps of noise in between
+def gesture(seed=1, kind='tilt', pages=60, gap=(3.0, 30.0), rev=0.1,
+            bumps=0.3, start=5.0, **kw):
+    rnd = random.Random(seed)
+    events = []
+    t = start
+    for _ in range(pages):
+        t += rnd.uniform(*gap)
+        if rnd.random() < bumps:
+            events.append(Bump(t - rnd.uniform(1.0, 2.0),
+                               rnd.uniform(0.3, 1.2), rnd.choice('XYZ')))
+        if kind == 'flick':
+            events.append(Flick(t, rnd.uniform(1.2, 2.5)))
+        else:
+            edge = 'YL' if rnd.random() < rev else 'YH'
+            events.append(Tilt(t, edge, rnd.uniform(0.4, 1.5)))
+    kw.setdefault('end', t + 10)
+    return Scenario(events, **kw)
+
+
+# device left alone for pause seconds, then picked up (handling shock of
+# g) and tapped after reach seconds. hands=False: tapped where it lies
+def pickup(seed=1, count=20, pause=(60.0, 600.0), reach=(0.5, 3.0),
+           hands=True, start=5.0, **kw):
+    rnd = random.Random(seed)
+    events = []
+    t = start
+    for _ in range(count):
+        t += rnd.uniform(*pause)
+        if hands:
+            events.append(Bump(t, rnd.uniform(0.6, 1.2), rnd.choice('XYZ')))
+        events.append(Tap(t + rnd.uniform(*reach)))
+        t += reach[1]
+    kw.setdefault('end', t + 10)
+    return Scenario(events, **kw)
+
+
+# reading sessions with the device left alone for pause seconds between
+# them (and after the last one)
+def idle(seed=1, sessions=3, pages=30, gap=(3.0, 30.0), pause=3 * 3600.0,
+         start=5.0, **kw):
+    rnd = random.Random(seed)
+    events = []
+    t = start
+    for _ in range(sessions):
+        for _ in range(pages):
+            t += rnd.uniform(*gap)
+            events.append(Press(t, 'FWD', rnd.uniform(0.08, 0.2)))
+        t += pause
+    kw.setdefault('end', t)
+    return Scenario(events, **kw)
+
+
+# sessions of reading: the tablet is switched off (screen off, BT off) and
+# on, and the reader presses POWER to wake the turner, which reconnects to
+# the bonded tablet scanning in background
+def reconnect(seed=1, sessions=10, pages=10, gap=(3.0, 30.0), off=60.0,
+              start=5.0, **kw):
+    rnd = random.Random(seed)
+    events = []
+    t = start
+    for _ in range(sessions):
+        for _ in range(pages):
+            t += rnd.uniform(*gap)
+            events.append(Press(t, 'FWD', rnd.uniform(0.08, 0.2)))
+        t += 5.0
+        events.append(Disconnect(t, off))
+        t += off + rnd.uniform(0.0, 5.0)
+        events.append(Press(t, 'BACK', 0.2))    # POWER sw to wake up
+        t += 1.0
+    kw.setdefault('end', t + 70)
+    kw.setdefault('host_delay', 0.0)
+    kw.setdefault('scan', (0.030, 0.300))
+    return Scenario(events, **kw)
+
+
+# link losses while reading (RF glitch, BT off on the tablet for off
+# seconds). the reader goes on pressing FWD and never presses POWER, so a
+# lost link comes back only if the turner advertises by itself
+def glitch(seed=1, losses=10, pages=10, gap=(3.0, 30.0), off=(0.0, 10.0),
+           start=5.0, **kw):
+    rnd = random.Random(seed)
+    events = []
+    t = start
+    for _ in range(losses):
+        for _ in range(pages):
+            t += rnd.uniform(*gap)
+            events.append(Press(t, 'FWD', rnd.uniform(0.08, 0.2)))
+        events.append(Disconnect(t + rnd.uniform(1.0, gap[0]),
+                                 rnd.uniform(*off)))
+    kw.setdefault('end', t + 70)
+    kw.setdefault('host_delay', 0.0)
+    kw.setdefault('scan', (0.030, 0.300))
+    return Scenario(events, **kw)
+
+
+# days of usage: reading sessions at hours of the day (hour, pages), the
+# tablet is off between them and the reader presses POWER at each session.
+# charge: (every days, hours) on USB charger after the evening session
+def usage(seed=1, days=7, sessions=((8.0, 40), (22.0, 80)), gap=(3.0, 60.0),
+          rev=0.05, taps=0.0, charge=None, start=5.0, **kw):
+    rnd = random.Random(seed)
+    events = []
+    charging = []
+    t = start
+    first = sessions[0][0]
+    for day in range(days):
+        for hour, pages in sessions:
+            t0 = start + day * 86400 + (hour - first) * 3600
+            if t0 > start:
+                t0 += rnd.uniform(0.0, 1800.0)
+                events.append(Disconnect(t + 5.0, t0 - t - 7.0))
+                events.append(Press(t0, 'BACK', 0.2))   # POWER sw
+                t = t0 + 1.0
+            for _ in range(pages):
+                t += rnd.uniform(*gap)
+                if taps and rnd.random() < taps:
+                    events.append(Tap(t))
+                else:
+                    button = 'REV' if rnd.random() < rev else 'FWD'
+                    events.append(Press(t, button, rnd.uniform(0.08, 0.2)))
+        if charge and (day + 1) % charge[0] == 0:
+            charging.append((t + 600.0, t + 600.0 + charge[1] * 3600))
+    kw.setdefault('end', start + days * 86400)
+    kw.setdefault('host_delay', 0.0)
+    kw.setdefault('scan', (0.030, 0.300))
+    kw.setdefault('charge', charging)
+    return Scenario(events, **kw)
@@ -0,0 +1,61 @@
+'''
+adafruit_ble (stub)
+BLERadio and BLEConnection on top of the simulated link (sim.world.Ble)
+'''
+from sim.world import current
+
+
+class BLEConnection:
+    def __init__(self, world):
+        self._world = world
+
+    @property
+    def connected(self):
+        return self._world.ble.connected
+
+    @property
+    def paired(self):
+        return self._world.ble.connected and self._world.scenario.paired
+
+    def pair(self, *, bond=True):
+        pass
+
+    def disconnect(self):
+        self._world.ble.disconnect()
+
+    @property
+    def connection_interval(self):
+        return self._world.ble.interval * 1000     # [ms]
+
+    # request to the central. the value read back changes when (and if) the
+    # central applies it
+    @connection_interval.setter
+    def connection_interval(self, value):
+        self._world.ble.request_interval(value / 1000)
+
+
+class BLERadio:
+    def __init__(self, adapter=None):
+        self._world = current()
+        self.name = 'CIRCUITPY'
+
+    def start_advertising(self, advertisement, scan_response=None,
+                          interval=0.1, timeout=None):
+        self._world.ble.start_advertising(interval)
+
+    def stop_advertising(self):
+        self._world.ble.stop_advertising()
+
+    @property
+    def advertising(self):
+        return self._world.ble.advertising
+
+    @property
+    def connected(self):
+        return self._world.ble.connected
+
+    @property
+    def connections(self):
+        if self._world.ble.connected:
+            return (BLEConnection(self._world),)
+        return ()
@@ -0,0 +1,12 @@
+'''
+adafruit_ble.advertising (stub)
+'''
+
+
+class Advertisement:
+    def __init__(self):
+        self.complete_name = None
+        self.connectable = True
+
+    def __bytes__(self):
+        return b'\x02\x01\x06'
@@ -0,0 +1,12 @@
+'''
+adafruit_ble.advertising.standard (stub)
+'''
+from . import Advertisement
+
+
+class ProvideServicesAdvertisement(Advertisement):
+    def __init__(self, *services):
+        super().__init__()
+        self.services = services
+        if services:
+            self.appearance = getattr(services[0], 'appearance', None)
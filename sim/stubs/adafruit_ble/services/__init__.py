@@ -0,0 +1,7 @@
+'''
+adafruit_ble.services (stub)
+'''
+
+
+class Service:
+    pass
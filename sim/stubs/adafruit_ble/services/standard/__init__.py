@@ -0,0 +1,23 @@
+'''
+adafruit_ble.services.standard (stub)
+'''
+from sim.world import current
+from .. import Service
+
+
+class BatteryService(Service):
+    def __init__(self):
+        self._world = current()
+        self._level = 0
+
+    @property
+    def level(self):
+        return self._level
+
+    # every write is notified to the subscribed host
+    @level.setter
+    def level(self, value):
+        if not 0 <= value <= 100:
+            raise ValueError('level out of range')
+        self._level = value
+        self._world.ble.notify('bas', 1)
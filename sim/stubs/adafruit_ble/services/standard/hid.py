@@ -0,0 +1,142 @@
+'''
+adafruit_ble.services.standard.hid (stub)
+devices are made from the top level collections of the report descriptor
+'''
+from sim.world import current
+from .. import Service
+
+DEFAULT_HID_DESCRIPTOR = (
+    b'\x05\x01'     # Usage Page (Generic Desktop Ctrls)
+    b'\x09\x06'     # Usage (Keyboard)
+    b'\xA1\x01'     # Collection (Application)
+    b'\x85\x01'     #   Report ID (1)
+    b'\x05\x07'     #   Usage Page (Kbrd/Keypad)
+    b'\x19\xE0'     #   Usage Minimum (0xE0)
+    b'\x29\xE7'     #   Usage Maximum (0xE7)
+    b'\x15\x00'     #   Logical Minimum (0)
+    b'\x25\x01'     #   Logical Maximum (1)
+    b'\x75\x01'     #   Report Size (1)
+    b'\x95\x08'     #   Report Count (8)
+    b'\x81\x02'     #   Input (Data,Var,Abs)
+    b'\x81\x01'     #   Input (Const,Array,Abs)
+    b'\x19\x00'     #   Usage Minimum (0x00)
+    b'\x29\x89'     #   Usage Maximum (0x89)
+    b'\x15\x00'     #   Logical Minimum (0)
+    b'\x25\x89'     #   Logical Maximum (137)
+    b'\x75\x08'     #   Report Size (8)
+    b'\x95\x06'     #   Report Count (6)
+    b'\x81\x00'     #   Input (Data,Array,Abs)
+    b'\x05\x08'     #   Usage Page (LEDs)
+    b'\x19\x01'     #   Usage Minimum (Num Lock)
+    b'\x29\x05'     #   Usage Maximum (Kana)
+    b'\x15\x00'     #   Logical Minimum (0)
+    b'\x25\x01'     #   Logical Maximum (1)
+    b'\x75\x01'     #   Report Size (1)
+    b'\x95\x05'     #   Report Count (5)
+    b'\x91\x02'     #   Output (Data,Var,Abs)
+    b'\x95\x03'     #   Report Count (3)
+    b'\x91\x01'     #   Output (Const,Array,Abs)
+    b'\xC0'         # End Collection
+    b'\x05\x01'     # Usage Page (Generic Desktop Ctrls)
+    b'\x09\x02'     # Usage (Mouse)
+    b'\xA1\x01'     # Collection (Application)
+    b'\x09\x01'     #   Usage (Pointer)
+    b'\xA1\x00'     #   Collection (Physical)
+    b'\x85\x02'     #     Report ID (2)
+    b'\x05\x09'     #     Usage Page (Button)
+    b'\x19\x01'     #     Usage Minimum (0x01)
+    b'\x29\x05'     #     Usage Maximum (0x05)
+    b'\x15\x00'     #     Logical Minimum (0)
+    b'\x25\x01'     #     Logical Maximum (1)
+    b'\x95\x05'     #     Report Count (5)
+    b'\x75\x01'     #     Report Size (1)
+    b'\x81\x02'     #     Input (Data,Var,Abs)
+    b'\x95\x01'     #     Report Count (1)
+    b'\x75\x03'     #     Report Size (3)
+    b'\x81\x01'     #     Input (Const,Array,Abs)
+    b'\x05\x01'     #     Usage Page (Generic Desktop Ctrls)
+    b'\x09\x30'     #     Usage (X)
+    b'\x09\x31'     #     Usage (Y)
+    b'\x15\x81'     #     Logical Minimum (-127)
+    b'\x25\x7F'     #     Logical Maximum (127)
+    b'\x75\x08'     #     Report Size (8)
+    b'\x95\x02'     #     Report Count (2)
+    b'\x81\x06'     #     Input (Data,Var,Rel)
+    b'\x09\x38'     #     Usage (Wheel)
+    b'\x15\x81'     #     Logical Minimum (-127)
+    b'\x25\x7F'     #     Logical Maximum (127)
+    b'\x75\x08'     #     Report Size (8)
+    b'\x95\x01'     #     Report Count (1)
+    b'\x81\x06'     #     Input (Data,Var,Rel)
+    b'\xC0'         #   End Collection
+    b'\xC0'         # End Collection
+    b'\x05\x0C'     # Usage Page (Consumer)
+    b'\x09\x01'     # Usage (Consumer Control)
+    b'\xA1\x01'     # Collection (Application)
+    b'\x85\x03'     #   Report ID (3)
+    b'\x75\x10'     #   Report Size (16)
+    b'\x95\x01'     #   Report Count (1)
+    b'\x15\x01'     #   Logical Minimum (1)
+    b'\x26\x8C\x02' #   Logical Maximum (652)
+    b'\x19\x01'     #   Usage Minimum (Consumer Control)
+    b'\x2A\x8C\x02' #   Usage Maximum (AC Send)
+    b'\x81\x00'     #   Input (Data,Array,Abs)
+    b'\xC0'         # End Collection
+)
+
+
+class ReportIn:
+    def __init__(self, world, usage_page, usage, report_id, length):
+        self._world = world
+        self.usage_page = usage_page
+        self.usage = usage
+        self.report_id = report_id
+        self.report_length = length
+
+    def send_report(self, report):
+        if len(report) != self.report_length:
+            raise ValueError('Report must be %d bytes' % self.report_length)
+        self._world.record('report', self.usage_page, self.usage, bytes(report))
+        self._world.ble.notify('hid', len(report) + 1)
+
+
+# minimal report descriptor parser: (usage_page, usage, report_id, in bytes)
+def parse_descriptor(desc):
+    apps = []
+    page = usage = report_id = size = count = 0
+    depth = 0
+    i = 0
+    while i < len(desc):
+        prefix = desc[i]
+        n = (0, 1, 2, 4)[prefix & 0x03]
+        data = int.from_bytes(desc[i + 1:i + 1 + n], 'little')
+        tag = prefix & 0xFC
+        i += 1 + n
+        if tag == 0x04:
+            page = data
+        elif tag == 0x08 and depth == 0:
+            usage = data
+        elif tag == 0x84:
+            report_id = data
+            apps[-1][2] = data
+        elif tag == 0x74:
+            size = data
+        elif tag == 0x94:
+            count = data
+        elif tag == 0xA0:
+            if depth == 0:
+                apps.append([page, usage, 0, 0])
+            depth += 1
+        elif tag == 0xC0:
+            depth -= 1
+        elif tag == 0x80:
+            apps[-1][3] += size * count
+    return [(p, u, r, bits // 8) for p, u, r, bits in apps]
+
+
+class HIDService(Service):
+    def __init__(self, hid_descriptor=DEFAULT_HID_DESCRIPTOR):
+        self._world = current()
+        self.hid_descriptor = hid_descriptor
+        self.devices = [ReportIn(self._world, *app)
+                        for app in parse_descriptor(hid_descriptor)]
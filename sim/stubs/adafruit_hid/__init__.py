@@ -0,0 +1,13 @@
+'''
+adafruit_hid (stub)
+'''
+
+
+def find_device(devices, *, usage_page, usage, timeout=None):
+    if hasattr(devices, 'send_report'):
+        devices = [devices]
+    for device in devices:
+        if device.usage_page == usage_page and device.usage == usage \
+                and hasattr(device, 'send_report'):
+            return device
+    raise ValueError('Could not find matching HID device.')
@@ -0,0 +1,27 @@
+'''
+adafruit_hid.consumer_control (stub)
+'''
+import struct
+from sim.world import current
+from . import find_device
+
+
+class ConsumerControl:
+    def __init__(self, devices, timeout=None):
+        self._world = current()
+        self._consumer_device = find_device(devices, usage_page=0x0C, usage=0x01)
+        self._report = bytearray(2)
+        self.release()  # no-op report to test the device, like the library
+
+    def send(self, consumer_code):
+        self._world.record('cc', consumer_code)
+        self.press(consumer_code)
+        self.release()
+
+    def press(self, consumer_code):
+        struct.pack_into('<H', self._report, 0, consumer_code)
+        self._consumer_device.send_report(self._report)
+
+    def release(self):
+        self._report[0] = self._report[1] = 0x0
+        self._consumer_device.send_report(self._report)
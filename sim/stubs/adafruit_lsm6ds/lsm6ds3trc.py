@@ -0,0 +1,44 @@
+'''
+adafruit_lsm6ds.lsm6ds3trc (stub)
+constructor does the same kind of I2C traffic as the library:
+chip id check, reset, BDU and accelerometer/gyro rate & range setup
+'''
+from adafruit_bus_device import i2c_device
+
+_WHO_AM_I = 0x0F
+_CTRL1_XL = 0x10
+_CTRL2_G = 0x11
+_CTRL3_C = 0x12
+_CTRL9_XL = 0x18
+
+
+class LSM6DS3TRC:
+    CHIP_ID = 0x6A
+
+    def __init__(self, i2c_bus, address=0x6A):
+        self.i2c_device = i2c_device.I2CDevice(i2c_bus, address)
+        self._buf = bytearray(2)
+        if self._read(_WHO_AM_I) != self.CHIP_ID:
+            raise RuntimeError('Failed to find %s - check your wiring!' % self.__class__.__name__)
+        self._rmw(_CTRL3_C, 0x01, 0x01)     # reset
+        while self._read(_CTRL3_C) & 0x01:
+            pass
+        self._rmw(_CTRL3_C, 0x40, 0x40)     # BDU
+        self._rmw(_CTRL1_XL, 0xF0, 0x40)    # 104Hz
+        self._rmw(_CTRL2_G, 0xF0, 0x40)     # 104Hz
+        self._rmw(_CTRL1_XL, 0x0C, 0x00)    # 2G
+        self._rmw(_CTRL2_G, 0x0E, 0x00)     # 250DPS
+        self._rmw(_CTRL9_XL, 0xE0, 0xE0)    # enable axes
+
+    def _read(self, reg):
+        self._buf[0] = reg
+        with self.i2c_device as i2c:
+            i2c.write_then_readinto(self._buf, self._buf, out_end=1, in_start=1)
+        return self._buf[1]
+
+    def _rmw(self, reg, mask, value):
+        v = (self._read(reg) & ~mask) | value
+        self._buf[0] = reg
+        self._buf[1] = v
+        with self.i2c_device as i2c:
+            i2c.write(self._buf)
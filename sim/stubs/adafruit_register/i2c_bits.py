@@ -0,0 +1,63 @@
+'''
+adafruit_register.i2c_bits (stub)
+same read-modify-write behaviour as the library: 1 write+read and 1 write
+per assignment, 1 write+read per readout. each descriptor takes
+sim.world.DESCRIPTOR_HEAP of the heap
+'''
+from sim.world import DESCRIPTOR_HEAP, current
+
+
+class RWBits:
+    def __init__(self, num_bits, register_address, lowest_bit,
+                 register_width=1, lsb_first=True, signed=False):
+        current().alloc(DESCRIPTOR_HEAP['RWBits'])
+        self.bit_mask = ((1 << num_bits) - 1) << lowest_bit
+        if self.bit_mask >= 1 << (register_width * 8):
+            raise ValueError('Cannot have more bits than register size')
+        self.lowest_bit = lowest_bit
+        self.buffer = bytearray(1 + register_width)
+        self.buffer[0] = register_address
+        self.lsb_first = lsb_first
+        self.sign_bit = (1 << (num_bits - 1)) if signed else 0
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        with obj.i2c_device as i2c:
+            i2c.write_then_readinto(self.buffer, self.buffer, out_end=1, in_start=1)
+        reg = 0
+        order = range(len(self.buffer) - 1, 0, -1)
+        if not self.lsb_first:
+            order = reversed(order)
+        for i in order:
+            reg = (reg << 8) | self.buffer[i]
+        reg = (reg & self.bit_mask) >> self.lowest_bit
+        if reg & self.sign_bit:
+            reg -= 2 * self.sign_bit
+        return reg
+
+    def __set__(self, obj, value):
+        value <<= self.lowest_bit
+        with obj.i2c_device as i2c:
+            i2c.write_then_readinto(self.buffer, self.buffer, out_end=1, in_start=1)
+            reg = 0
+            order = range(len(self.buffer) - 1, 0, -1)
+            if not self.lsb_first:
+                order = range(1, len(self.buffer))
+            for i in order:
+                reg = (reg << 8) | self.buffer[i]
+            reg &= ~self.bit_mask
+            reg |= value
+            if not self.lsb_first:
+                reg_order = range(len(self.buffer) - 1, 0, -1)
+            else:
+                reg_order = range(1, len(self.buffer))
+            for i in reg_order:
+                self.buffer[i] = reg & 0xFF
+                reg >>= 8
+            i2c.write(self.buffer)
+
+
+class ROBits(RWBits):
+    def __set__(self, obj, value):
+        raise AttributeError()
@@ -0,0 +1,36 @@
+'''
+alarm (stub)
+'''
+from sim.world import DeepSleepReset, current
+from . import pin, time     # noqa: F401
+
+_world = current()
+sleep_memory = _world.sleep_memory
+wake_alarm = _world.wake_alarm
+if wake_alarm is not None:  # of the VM before deep sleep, as this VM's class
+    _cls = getattr(pin, type(wake_alarm).__name__, None) \
+        or getattr(time, type(wake_alarm).__name__)
+    wake_alarm = _cls.__new__(_cls)
+    wake_alarm.__dict__.update(_world.wake_alarm.__dict__)
+    _world.wake_alarm = wake_alarm
+
+
+def light_sleep_until_alarms(*alarms):
+    global wake_alarm
+    if not alarms:
+        raise ValueError('No alarms set.')
+    for a in alarms:
+        a._check(_world)
+    wake_alarm = _world.light_sleep(alarms)
+    return wake_alarm
+
+
+# VM restarts after wake. firmware is started again by the harness.
+# preserve_dios is not implemented on nRF (nordic port)
+def exit_and_deep_sleep_until_alarms(*alarms, preserve_dios=()):
+    if preserve_dios:
+        raise NotImplementedError('preserve_dios')
+    for a in alarms:
+        a._check(_world)
+    _world.light_sleep(alarms, kind='deep_sleep')
+    raise DeepSleepReset()
@@ -0,0 +1,24 @@
+'''
+alarm.pin (stub)
+'''
+
+
+class PinAlarm:
+    def __init__(self, pin, value, edge=False, pull=False):
+        self.pin = pin
+        self.value = value
+        self.edge = edge
+        self.pull = pull
+
+    def _check(self, world):
+        if self.pin.name in world.claimed:
+            raise ValueError('{} in use'.format(self.pin))
+
+    def when(self, world):
+        line = world.lines.get(self.pin.name)
+        if line is None:
+            return None
+        return line.next_time(world.now, self.value)
+
+    def describe(self):
+        return self.pin.name
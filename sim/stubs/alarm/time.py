@@ -0,0 +1,19 @@
+'''
+alarm.time (stub)
+'''
+
+
+class TimeAlarm:
+    def __init__(self, *, monotonic_time=None, epoch_time=None):
+        if monotonic_time is None:
+            monotonic_time = epoch_time - 946684800
+        self.monotonic_time = monotonic_time
+
+    def _check(self, world):
+        pass
+
+    def when(self, world):
+        return max(world.now, self.monotonic_time)
+
+    def describe(self):
+        return 'TimeAlarm'
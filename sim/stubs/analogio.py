@@ -0,0 +1,25 @@
+'''
+analogio.py (stub)
+a read of AnalogIn.value takes ADC_TIME (SAADC acquisition & conversion
+and interpreter overhead)
+'''
+from sim.world import current
+
+ADC_TIME = 40e-6
+
+
+class AnalogIn:
+    def __init__(self, pin):
+        self._world = current()
+        self._world.claim(pin)
+        self._pin = pin
+        self.reference_voltage = 3.3
+
+    def deinit(self):
+        self._world.release(self._pin)
+
+    @property
+    def value(self):
+        self._world.record('adc', self._pin.name)
+        self._world.advance_to(self._world.now + ADC_TIME)
+        return self._world.battery_raw()
@@ -0,0 +1,251 @@
+'''
+asyncio (stub)
+cooperative scheduler of CircuitPython asyncio (subset: run, create_task,
+sleep, sleep_ms, wait_for, Event, Task.cancel) on the virtual clock.
+
+memo.
+coroutines yield requests to the loop: _Sleep, Event or Task (await).
+each wait gets a token, the first of the registered wakers whose token is
+still valid resumes the task. wait_for is the one of MicroPython asyncio:
+a runner task awaits aw and cancels the sleep of the waiter (2 hops).
+one queue ordered by time as MicroPython asyncio: a passed timer runs
+before tasks which became runnable after it. when the first entry is in
+the future, the loop idles to it like the board (WFE in the idle poll),
+recorded as 'idle', not as time.sleep. times are in ms like ticks_ms
+of adafruit_ticks (no wrap here).
+exception of a task which nobody awaits is raised out of run(), so that
+bugs of the firmware are not lost in the sim.
+'''
+import heapq
+import types
+
+from sim.world import current
+
+
+def _ticks():
+    return int(current().now * 1000)
+
+
+class CancelledError(BaseException):
+    pass
+
+
+class TimeoutError(Exception):
+    pass
+
+
+class _Sleep:
+    def __init__(self, seconds):
+        self.seconds = seconds
+
+    def __await__(self):
+        yield self
+
+
+class Event:
+    def __init__(self):
+        self.state = False
+        self.waiting = []       # [(task, token)]
+
+    def set(self):
+        self.state = True
+        for task, token in self.waiting:
+            _loop.resume(task, token)
+        self.waiting = []
+
+    def clear(self):
+        self.state = False
+
+    def is_set(self):
+        return self.state
+
+    # generator based (no warning when a cancelled wait never started)
+    @types.coroutine
+    def wait(self):
+        if not self.state:
+            yield self
+        return True
+
+
+class Task:
+    def __init__(self, coro):
+        self.coro = coro
+        self.token = 0
+        self.started = False
+        self.done_ = False
+        self.result = None
+        self.exc = None
+        self.waiting = []       # [(task, token)] awaiting this task
+
+    def done(self):
+        return self.done_
+
+    def cancel(self):
+        if self.done_ or self is _loop.current:
+            return False
+        _loop.cancel(self)
+        return True
+
+    def __await__(self):
+        if not self.done_:
+            yield self
+        if self.exc is not None:
+            raise self.exc
+        return self.result
+
+
+class _Loop:
+    def __init__(self):
+        self.queue = []         # heap [(ms, seq, task, token, value, exc)]
+        self.seq = 0
+        self.current = None
+
+    def _push(self, ms, task, token, value=None, exc=None):
+        self.seq += 1
+        heapq.heappush(self.queue, (ms, self.seq, task, token, value, exc))
+
+    # run the task now (after the passed timers, like asyncio)
+    def resume(self, task, token, value=None, exc=None):
+        if task.done_ or task.token != token:
+            return
+        task.token += 1
+        self._push(_ticks(), task, task.token, value, exc)
+
+    def cancel(self, task):
+        task.token += 1         # drop registered wakers
+        self._push(_ticks(), task, task.token, None, CancelledError())
+
+    def step(self, task, value, exc):
+        self.current = task
+        try:
+            if exc is not None and not task.started:
+                task.coro.close()
+                raise exc
+            task.started = True
+            if exc is not None:
+                req = task.coro.throw(exc)
+            else:
+                req = task.coro.send(value)
+        except StopIteration as e:
+            self.finish(task, e.value, None)
+        except CancelledError as e:
+            self.finish(task, None, e)
+        except Exception as e:
+            self.finish(task, None, e)
+        else:
+            self.wait(task, req)
+        finally:
+            self.current = None
+
+    def wait(self, task, req):
+        now = _ticks()
+        if isinstance(req, _Sleep):
+            task.token += 1
+            self._push(now + max(0, int(req.seconds * 1000)), task,
+                       task.token)
+        elif isinstance(req, Event):
+            req.waiting.append((task, task.token))
+        elif isinstance(req, Task):
+            req.waiting.append((task, task.token))
+        else:
+            raise RuntimeError('unknown await: {!r}'.format(req))
+
+    def finish(self, task, result, exc):
+        task.done_ = True
+        task.result = result
+        task.exc = exc
+        waiting = [w for w in task.waiting if w[0].token == w[1]]
+        for waiter, token in waiting:
+            self.resume(waiter, token)
+        if exc is not None and not waiting \
+                and not isinstance(exc, CancelledError):
+            raise exc
+
+    def run_until(self, main):
+        w = current()
+        while not main.done_:
+            if not self.queue:
+                raise RuntimeError('all tasks wait forever')
+            ms, _, task, token, value, exc = heapq.heappop(self.queue)
+            if task.done_ or task.token != token:
+                continue    # woken by another waker, or cancelled
+            if ms > _ticks():
+                w.record('idle', ms / 1000 - w.now)
+                w.advance_to(ms / 1000)
+            task.token += 1
+            self.step(task, value, exc)
+
+
+_loop = _Loop()
+
+
+def create_task(coro):
+    task = Task(coro)
+    _loop.resume(task, task.token)
+    return task
+
+
+def sleep(seconds):
+    return _Sleep(seconds)
+
+
+def sleep_ms(ms):
+    return _Sleep(ms / 1000)
+
+
+# as asyncio/funcs.py of MicroPython: aw runs in its task, a runner task
+# awaits it and cancels the sleep of the waiter when it is done first
+async def wait_for(aw, timeout):
+    aw = aw if isinstance(aw, Task) else create_task(aw)
+    if timeout is None:
+        return await aw
+    status = None
+    result = None
+
+    async def runner(waiter, aw):
+        nonlocal status, result
+        try:
+            result = await aw
+            s = True
+        except GeneratorExit:   # closed by the GC of CPython, not on board
+            raise
+        except BaseException as er:
+            s = er
+        if status is None:  # the waiter is still waiting, cancel it
+            status = s
+            waiter.cancel()
+
+    runner_task = create_task(runner(_loop.current, aw))
+    try:
+        await sleep(timeout)
+    except CancelledError as er:
+        if status is True:      # aw is done, it cancelled the sleep
+            return result
+        elif status is None:    # cancelled by another task
+            status = True
+            runner_task.cancel()
+            aw.cancel()
+            raise er
+        else:                   # exception of aw
+            raise status
+    status = True   # timeout before aw
+    runner_task.cancel()
+    aw.cancel()
+    await runner_task
+    raise TimeoutError
+
+
+# one queue for the VM as MicroPython asyncio: tasks cancelled at the end
+# of a run finish in the next one
+def run(coro):
+    main = create_task(coro)
+    try:
+        _loop.run_until(main)
+    except BaseException:   # end of the VM, tasks never started are closed
+        for entry in _loop.queue:
+            if not entry[2].started:
+                entry[2].coro.close()
+        raise
+    if main.exc is not None:
+        raise main.exc
+    return main.result
@@ -0,0 +1,11 @@
+'''
+board.py (stub)
+pins of Seeed XIAO nRF52840 (Sense). IMU_* exist only on the Sense variant
+'''
+from sim.world import BOARD_PINS, SENSE_PINS, current
+
+_world = current()
+for _name in BOARD_PINS + SENSE_PINS:
+    if _name in _world.pins:
+        globals()[_name] = _world.pins[_name]
+board_id = 'Seeed_XIAO_nRF52840_Sense' if _world.imu else 'Seeed_XIAO_nRF52840'
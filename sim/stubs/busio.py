@@ -0,0 +1,75 @@
+'''
+busio.py (stub)
+I2C to the on-board IMU. every transfer takes virtual bus time
+(9 bit per byte incl. address, plus start/stop and interpreter overhead)
+'''
+from sim.world import current
+
+OVERHEAD = 60e-6    # call overhead of busio + start/stop condition [s]
+
+
+class I2C:
+    def __init__(self, scl, sda, *, frequency=100000, timeout=255):
+        self._world = current()
+        self._world.claim(scl)
+        self._world.claim(sda)
+        self._pins = (scl, sda)
+        self.frequency = frequency
+        self._locked = False
+
+    def deinit(self):
+        for pin in self._pins:
+            self._world.release(pin)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.deinit()
+
+    def try_lock(self):
+        if self._locked:
+            return False
+        self._locked = True
+        return True
+
+    def unlock(self):
+        self._locked = False
+
+    def _device(self, address):
+        imu = self._world.imu
+        if imu is None or address != imu.ADDRESS or not imu.powered:
+            raise OSError(19, 'No such device')
+        return imu
+
+    def _transfer(self, op, nbytes):
+        dt = OVERHEAD + 9 * (1 + nbytes) / self.frequency
+        self._world.record('i2c', op, nbytes, dt)
+        self._world.advance_to(self._world.now + dt)
+
+    def scan(self):
+        imu = self._world.imu
+        return [imu.ADDRESS] if imu is not None and imu.powered else []
+
+    def writeto(self, address, buffer, *, start=0, end=None):
+        buf = bytes(buffer[start:end])
+        self._transfer('w', len(buf))
+        if buf:
+            self._device(address).write(buf)
+        else:
+            self._device(address)   # probe
+
+    def readfrom_into(self, address, buffer, *, start=0, end=None):
+        end = len(buffer) if end is None else end
+        self._transfer('r', end - start)
+        buffer[start:end] = self._device(address).read(end - start)
+
+    def writeto_then_readfrom(self, address, out_buffer, in_buffer, *,
+                              out_start=0, out_end=None, in_start=0,
+                              in_end=None):
+        out = bytes(out_buffer[out_start:out_end])
+        in_end = len(in_buffer) if in_end is None else in_end
+        self._transfer('wr', len(out) + in_end - in_start)
+        dev = self._device(address)
+        dev.write(out)
+        in_buffer[in_start:in_end] = dev.read(in_end - in_start)
@@ -0,0 +1,81 @@
+'''
+digitalio.py (stub)
+'''
+from sim.world import current
+
+
+class Direction:
+    INPUT = 'INPUT'
+    OUTPUT = 'OUTPUT'
+
+
+class Pull:
+    UP = 'UP'
+    DOWN = 'DOWN'
+
+
+class DriveMode:
+    PUSH_PULL = 'PUSH_PULL'
+    OPEN_DRAIN = 'OPEN_DRAIN'
+
+
+class DigitalInOut:
+    def __init__(self, pin):
+        self._world = current()
+        self._world.claim(pin)
+        self._pin = pin
+        self._direction = Direction.INPUT
+        self.pull = None
+        self.drive_mode = DriveMode.PUSH_PULL
+
+    def deinit(self):
+        if self._pin is not None:
+            self._world.outputs.pop(self._pin.name, None)
+            self._world.release(self._pin)
+            self._pin = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.deinit()
+
+    def _check(self):
+        if self._pin is None:
+            raise ValueError('Object has been deinitialized and can no longer be used. Create a new object.')
+
+    @property
+    def direction(self):
+        return self._direction
+
+    @direction.setter
+    def direction(self, value):
+        self._check()
+        self._direction = value
+        if value == Direction.OUTPUT:
+            self._world.drive(self._pin, False)
+        else:
+            self._world.outputs.pop(self._pin.name, None)
+
+    # value is set with the direction, no glitch of False
+    def switch_to_output(self, value=False, drive_mode=DriveMode.PUSH_PULL):
+        self._check()
+        self._direction = Direction.OUTPUT
+        self._world.drive(self._pin, bool(value))
+        self.drive_mode = drive_mode
+
+    def switch_to_input(self, pull=None):
+        self.direction = Direction.INPUT
+        self.pull = pull
+
+    @property
+    def value(self):
+        self._check()
+        return self._world.level(self._pin)
+
+    @value.setter
+    def value(self, value):
+        self._check()
+        if self._direction != Direction.OUTPUT:
+            raise AttributeError('Cannot set value when direction is input.')
+        self._world.drive(self._pin, bool(value))
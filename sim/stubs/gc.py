@@ -0,0 +1,27 @@
+'''
+gc.py (stub)
+free heap of sim.world. it decreases with libraries and firmware modules
+loaded (harness.IMPORT_COST, FIRMWARE_*) and register descriptors, other
+objects of the firmware are not counted
+'''
+from sim.world import HEAP, current
+
+
+def collect():
+    pass
+
+
+def enable():
+    pass
+
+
+def disable():
+    pass
+
+
+def mem_free():
+    return current().heap_free
+
+
+def mem_alloc():
+    return HEAP - current().heap_free
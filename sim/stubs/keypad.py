@@ -0,0 +1,127 @@
+'''
+keypad.py (stub)
+Keys scanned every interval in the background. scanning is evaluated
+lazily from the pin lines of sim.world when the queue is accessed, with
+the same result and timestamps as a background scan.
+'''
+import bisect
+import math
+
+from sim.world import current
+
+
+class Event:
+    def __init__(self, key_number=0, pressed=True, timestamp=None):
+        self.key_number = key_number
+        self.pressed = pressed
+        self.timestamp = timestamp
+
+    @property
+    def released(self):
+        return not self.pressed
+
+    def __eq__(self, other):
+        return self.key_number == other.key_number \
+            and self.pressed == other.pressed
+
+    def __repr__(self):
+        return '<Event: key_number {} {}>'.format(
+            self.key_number, 'pressed' if self.pressed else 'released')
+
+
+class EventQueue:
+    def __init__(self, keys, max_events):
+        self._keys = keys
+        self._max = max_events
+        self._queue = []
+        self.overflowed = False
+
+    def _put(self, event):
+        if len(self._queue) >= self._max:
+            self.overflowed = True
+        else:
+            self._queue.append(event)
+
+    def get(self):
+        self._keys._scan()
+        return self._queue.pop(0) if self._queue else None
+
+    def get_into(self, event):
+        ev = self.get()
+        if ev is None:
+            return False
+        event.key_number = ev.key_number
+        event.pressed = ev.pressed
+        event.timestamp = ev.timestamp
+        return True
+
+    def clear(self):
+        self._keys._scan()
+        self._queue = []
+        self.overflowed = False
+
+    def __len__(self):
+        self._keys._scan()
+        return len(self._queue)
+
+    def __bool__(self):
+        return len(self) > 0
+
+
+class Keys:
+    def __init__(self, pins, *, value_when_pressed, pull=True, interval=0.02,
+                 max_events=64, debounce_threshold=1):
+        self._world = current()
+        for pin in pins:
+            self._world.claim(pin)
+        self._pins = pins
+        self._lines = [self._world.line(pin.name) for pin in pins]
+        self._value = value_when_pressed
+        self._interval = interval
+        self._t0 = self._world.now      # scan grid origin
+        self._t_last = self._world.now - interval   # last evaluated scan
+        self._state = [False] * len(pins)
+        self.key_count = len(pins)
+        self.events = EventQueue(self, max_events)
+
+    def deinit(self):
+        for pin in self._pins:
+            self._world.release(pin)
+        self._pins = ()
+        self._lines = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.deinit()
+
+    def reset(self):
+        self._scan()
+        self._state = [False] * len(self._lines)
+
+    # scan ticks where something may have changed: first tick after each edge
+    def _scan(self):
+        now = self._world.now
+        t_from = self._t_last
+        ticks = {self._tick(t_from + self._interval / 2)}
+        for line in self._lines:
+            i = bisect.bisect_right(line.edges, t_from)
+            j = bisect.bisect_right(line.edges, now)
+            ticks.update(self._tick(te) for te in line.edges[i:j])
+        for tick in sorted(t for t in ticks if t_from < t <= now):
+            for n, line in enumerate(self._lines):
+                # 1ns later: tick of an edge may be below it by rounding
+                pressed = line.level(tick + 1e-9) == self._value
+                if pressed != self._state[n]:
+                    self._state[n] = pressed
+                    ms = int(tick * 1000) & ((1 << 29) - 1)
+                    self.events._put(Event(n, pressed, ms))
+        last = self._tick(now)
+        if last > now:
+            last -= self._interval
+        self._t_last = max(t_from, last)
+
+    def _tick(self, t):
+        k = math.ceil((t - self._t0) / self._interval - 1e-9)
+        return self._t0 + k * self._interval
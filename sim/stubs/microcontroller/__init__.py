@@ -0,0 +1,11 @@
+'''
+microcontroller (stub)
+'''
+from sim.world import Reload, current
+from . import pin   # noqa: F401
+
+nvm = current().nvm
+
+
+def reset():
+    raise Reload()
@@ -0,0 +1,8 @@
+'''
+microcontroller.pin (stub)
+'''
+from sim.world import current
+
+_world = current()
+for _name in ('P0_13', 'P0_14', 'P0_17', 'P0_31'):
+    globals()[_name] = _world.pins[_name]
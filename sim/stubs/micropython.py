@@ -0,0 +1,14 @@
+'''
+micropython.py (stub)
+'''
+
+
+def const(x):
+    return x
+
+
+def native(f):
+    return f
+
+
+viper = native
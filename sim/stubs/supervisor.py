@@ -0,0 +1,25 @@
+'''
+supervisor.py (stub)
+'''
+from sim.world import Reload, current
+
+
+class _Runtime:
+    @property
+    def usb_connected(self):
+        return current().scenario.usb
+
+    @property
+    def serial_connected(self):
+        return current().scenario.usb
+
+
+runtime = _Runtime()
+
+
+def reload():
+    raise Reload()
+
+
+def ticks_ms():
+    return int(current().now * 1000) & ((1 << 29) - 1)
@@ -0,0 +1,23 @@
+'''
+time.py (stub)
+virtual clock. replaces the builtin time module for the firmware only
+'''
+from sim.world import current
+
+_world = current()
+
+
+def monotonic():
+    return _world.now
+
+
+def monotonic_ns():
+    return int(_world.now * 1e9)
+
+
+def sleep(seconds):
+    _world.sleep(seconds)
+
+
+def time():
+    return int(_world.now) + 946684800     # 2000/01/01 as epoch of RTC
@@ -0,0 +1,301 @@
+'''
+tapreplay.py
+replay of accelerometer traces through the tap detector of LSM6DS3TR-C.
+usage: python -m sim.tapreplay [trace.csv ...] [--synth hours] [--odr Hz]
+                               [--fs g] [--seed N] [--fn-weight w]
+                               [--guard s] [--click-air s]
+
+memo.
+needs numpy (host only, not on the board). trace.csv: header line, then
+t[s],x,y,z[g] at ODR, with optional 5th column label at the sample of an
+event: 'double' (wanted W tap), others ('click', 'bump', ...) are noise
+which may be taken as W tap. 'click' (press) and 'release' label the
+switch edges for the tap guard. record it with USB connected, e.g. the FIFO
+or the acceleration of adafruit_lsm6ds printed as CSV. --synth makes a
+trace instead: double taps, switch clicks at press & release (the click
+"sometimes recognized as tap" in ebook_turner_w2.py) and bumps.
+detector (AN5130 of ST): slope (a[n] - a[n-1]) / 2 of any axis over
+TAP_THS (FS/32 LSB) starts a shock, it must fall under within SHOCK, no
+shock within QUIET after it, and the second shock must start within DUR
+from the first. windows of INT_DUR2 in 1/ODR: SHOCK 0:4 else 8*SHOCK,
+QUIET 0:2 else 4*QUIET, DUR 0:16 else 32*DUR.
+all TAP_THS x SHOCK x QUIET x DUR are swept, over-threshold runs once per
+threshold, and the windows vectorized on the runs. a detection within
+WINDOW after a 'double' label is found, others are false positives.
+the winner is printed as calls of ImuInt1Control: configure() of INT_DUR2
+and masked update() of TAP_THS_6D (SIXD_THS, D4D_EN of 6D configurations
+of turner/gesture.py are kept) and CTRL1_XL (bandwidth bits are kept).
+tap guard (turner/tapguard.py): detections within --guard after a switch
+edge are dropped as in the firmware, FP and FN are counted after it and
+the best setting is chosen with it. false clicks it avoids cost
+--click-air of radio each (first pointer report to air of the last, see
+sim.bench -s crosstalk: ~11ms touch of absolute pointer, ~1s mouse path).
+'''
+import argparse
+
+import numpy as np
+
+# register codes of ODR_XL [Hz] and FS_XL [g] in CTRL1_XL
+ODR_CODE = {12.5: 1, 26: 2, 52: 3, 104: 4, 208: 5, 416: 6, 833: 7}
+FS_CODE = {2: 0, 16: 1, 4: 2, 8: 3}
+# hand tuned setting of turner/imu.py: TAP_THS_6D, INT_DUR2
+CURRENT = (0x0A, 0x3A)
+WINDOW = 0.6    # [s] label to detection (DUR max at 208Hz is 0.46s)
+GUARD = 0.1     # [s] tap_guard of ebook_turner()
+CLICK_AIR = 0.011   # [s] radio time of a false click (absolute pointer)
+
+
+# [samples] windows of INT_DUR2 fields
+def shock_samples(shock):
+    return 4 if shock == 0 else 8 * shock
+
+
+def quiet_samples(quiet):
+    return 2 if quiet == 0 else 4 * quiet
+
+
+def dur_samples(dur):
+    return 16 if dur == 0 else 32 * dur
+
+
+# trace of CSV: t, acc (n, 3) [g], [(t, label)]
+def load(path):
+    with open(path) as f:
+        header = f.readline().strip().split(',')
+    data = np.loadtxt(path, delimiter=',', skiprows=1, usecols=(0, 1, 2, 3),
+                      ndmin=2)
+    events = []
+    if len(header) > 4:
+        labels = np.loadtxt(path, delimiter=',', skiprows=1, usecols=4,
+                            dtype=str, ndmin=1)
+        events = [(data[i, 0], labels[i])
+                  for i in np.flatnonzero(labels != '')]
+    return data[:, 0], data[:, 1:4], events
+
+
+# add a shock of amplitude [g] at sample i on axis, ringing over 4 samples
+def _shock(acc, i, axis, amplitude, shape=(1.0, -0.6, 0.3, -0.1)):
+    n = min(len(shape), len(acc) - i)
+    acc[i:i + n, axis] += amplitude * np.asarray(shape[:n])
+
+
+# synthetic trace of hours at odr: gravity on Z, noise, slow handling, and
+# events every few seconds: double taps, switch clicks, bumps
+def synth(hours=1.0, odr=208, seed=1):
+    rnd = np.random.default_rng(seed)
+    n = int(hours * 3600 * odr)
+    t = np.arange(n) / odr
+    acc = rnd.normal(0.0, 0.004, (n, 3))
+    acc[:, 2] += 1.0
+    acc[:, 0] += 0.05 * np.sin(2 * np.pi * 0.1 * t)     # held in hand
+    events = []
+    s = 5.0
+    while True:
+        s += rnd.uniform(3.0, 30.0)
+        i = int(s * odr)
+        if i + odr >= n:
+            break
+        r = rnd.random()
+        if r < 0.3:     # W tap on the case, mostly Z
+            axis = 2 if rnd.random() < 0.8 else rnd.integers(2)
+            gap = int(rnd.uniform(0.12, 0.35) * odr)
+            _shock(acc, i, axis, rnd.uniform(1.5, 4.0))
+            _shock(acc, i + gap, axis, rnd.uniform(1.5, 4.0))
+            events.append((t[i], 'double'))
+        elif r < 0.9:   # switch press & release clicks
+            axis = rnd.integers(3)
+            gap = int(rnd.uniform(0.08, 0.2) * odr)
+            _shock(acc, i, axis, rnd.uniform(0.3, 1.6))
+            _shock(acc, i + gap, axis, rnd.uniform(0.2, 1.2))
+            events.append((t[i], 'click'))
+            events.append((t[i + gap], 'release'))
+        else:   # put on a table: longer shock
+            m = int(rnd.integers(5, 20))
+            acc[i:i + m] += rnd.normal(0.0, rnd.uniform(0.2, 0.8), (m, 3))
+            events.append((t[i], 'bump'))
+    return t, acc, events
+
+
+# over-threshold runs of slope: (starts, ends) [samples], ends exclusive
+def runs(peak, ths_g):
+    over = np.concatenate(([0], (peak > ths_g).astype(np.int8), [0]))
+    edge = np.diff(over)
+    return np.flatnonzero(edge == 1), np.flatnonzero(edge == -1)
+
+
+# first of consecutive True along the last axis, then every other one
+# (the second tap of a double tap cannot start the next one)
+def _alternate(pair):
+    c = np.cumsum(pair, axis=-1)
+    base = np.maximum.accumulate(np.where(pair, 0, c), axis=-1)
+    return pair & ((c - base) % 2 == 1)
+
+
+# double tap detections [sample] of all DUR for a SHOCK and QUIET
+def detect(starts, ends, shock, quiet):
+    if len(starts) < 2:
+        return [np.empty(0, int)] * 16
+    tap = ends - starts <= shock_samples(shock)
+    gap = starts[1:] - ends[:-1] >= quiet_samples(quiet)
+    span = starts[1:] - starts[:-1]
+    durs = np.array([dur_samples(d) for d in range(16)])
+    pair = (tap[:-1] & tap[1:] & gap)[None, :] & (span[None, :]
+                                                   <= durs[:, None])
+    pair = _alternate(pair)
+    return [ends[1:][p] - 1 for p in pair]
+
+
+# detections which the tap guard takes: no switch edge within guard before
+def guarded(det_t, edges, guard):
+    if not guard or not len(edges):
+        return det_t
+    i = np.searchsorted(edges, det_t, 'right') - 1
+    near = (i >= 0) & (det_t - edges[np.maximum(i, 0)] <= guard)
+    return det_t[~near]
+
+
+# (false positives, false negatives, false positives after a click)
+def score(det_t, doubles, clicks):
+    if len(doubles):
+        i = np.searchsorted(doubles, det_t, 'right') - 1
+        ok = (i >= 0) & (det_t - doubles[np.maximum(i, 0)] <= WINDOW)
+        found = len(np.unique(i[ok]))
+    else:
+        found = 0
+    fp = len(det_t) - found
+    fn = len(doubles) - found
+    by_click = 0
+    if len(clicks) and fp:
+        j = np.searchsorted(clicks, det_t, 'right') - 1
+        near = (j >= 0) & (det_t - clicks[np.maximum(j, 0)] <= WINDOW)
+        by_click = min(fp, int(np.count_nonzero(near)))
+    return fp, fn, by_click
+
+
+# {(ths, shock, quiet, dur): (fp, fn, fp by click, and the same after the
+# tap guard)} of the whole sweep
+def sweep(t, acc, events, fs=4, guard=GUARD):
+    slope = np.abs(np.diff(acc, axis=0, prepend=acc[:1])) / 2
+    peak = slope.max(axis=1)
+    doubles = np.array(sorted(s for s, label in events if label == 'double'))
+    clicks = np.array(sorted(s for s, label in events if label == 'click'))
+    edges = np.array(sorted(s for s, label in events
+                            if label in ('click', 'release')))
+    out = {}
+    for ths in range(1, 32):
+        starts, ends = runs(peak, ths * fs / 32)
+        for shock in range(4):
+            for quiet in range(4):
+                for dur, det in enumerate(detect(starts, ends, shock, quiet)):
+                    out[ths, shock, quiet, dur] = score(
+                        t[det], doubles, clicks) + score(
+                        guarded(t[det], edges, guard), doubles, clicks)
+    return out
+
+
+# registers of a setting {address: (mask, value)}, only the bits of tap
+def registers(setting, odr, fs):
+    ths, shock, quiet, dur = setting
+    return {0x10: (0xFC, ODR_CODE[odr] << 4 | FS_CODE[fs] << 2),
+            0x59: (0x1F, ths), 0x5A: (0xFF, dur << 4 | quiet << 2 | shock)}
+
+
+def split(tap_ths, int_dur2):
+    return (tap_ths & 0x1F, int_dur2 & 0x03, int_dur2 >> 2 & 0x03,
+            int_dur2 >> 4)
+
+
+# false clicks of a setting without and with the tap guard, per hour
+def guard_report(name, r, hours, guard, click_air):
+    fp, fn, _, gfp, gfn, _ = r
+    print('  {}: false clicks {:.1f}/h -> {:.1f}/h with guard {:g}s, W taps'
+          ' lost {:+d}, radio {:.0f}ms/h avoided'.format(
+              name, fp / hours, gfp / hours, guard, gfn - fn,
+              1000 * (fp - gfp) * click_air / hours))
+
+
+# best setting with the tap guard: fewest errors, then fewest false
+# positives, the current one if it is as good, then the highest threshold
+def report(result, odr, fs, fn_weight=1.0, top=5, hours=1.0, guard=GUARD,
+           click_air=CLICK_AIR):
+    current = split(*CURRENT)
+
+    def cost(k):
+        fp, fn = result[k][3:5]
+        return (fp + fn_weight * fn, fp, k != current, -k[0])
+    best = min(result, key=cost)
+    print('  setting (TAP_THS SHOCK QUIET DUR)     FP   FN  FP by click'
+          '  guard FP   FN')
+    ranked = sorted(result, key=cost)[:top]
+    for k in ranked + ([current] if current not in ranked else []):
+        mark = ' current' if k == current else ''
+        print('  ths {:2d} ({:.2f}g) {} {} {:2d} ({:.2f}s)  {:5d} {:4d} {:6d}'
+              '  {:8d} {:4d}{}'.format(
+                  k[0], k[0] * fs / 32, k[1], k[2], k[3],
+                  dur_samples(k[3]) / odr, *(result[k][:4] + result[k][4:5]),
+                  mark))
+    guard_report('best', result[best], hours, guard, click_air)
+    guard_report('current', result[current], hours, guard, click_air)
+    # grid of TAP_THS x DUR at SHOCK and QUIET of the best
+    _, shock, quiet, _ = best
+    print('  FP/FN grid with guard at SHOCK {} QUIET {}, rows TAP_THS,'
+          ' columns DUR'.format(shock, quiet))
+    print('  ths' + ''.join('{:>8d}'.format(d) for d in range(16)))
+    for ths in range(1, 32):
+        print('  {:3d}'.format(ths) + ''.join(
+            '{:>8s}'.format('{}/{}'.format(*result[ths, shock, quiet, d][3:5]))
+            for d in range(16)))
+    regs = sorted(registers(best, odr, fs).items())
+    print('int1c.configure({{{}}})'.format(', '.join(
+        '0x{:02X}: 0x{:02X}'.format(a, v) for a, (m, v) in regs
+        if m == 0xFF)))
+    for a, (m, v) in regs:
+        if m != 0xFF:
+            print('int1c.update(0x{:02X}, 0x{:02X}, 0x{:02X})'.format(a, m, v))
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[2])
+    parser.add_argument('file', nargs='*', help='trace CSV')
+    parser.add_argument('--synth', type=float, metavar='HOURS',
+                        help='synthetic trace instead of files')
+    parser.add_argument('--odr', type=float, default=208,
+                        choices=sorted(ODR_CODE), help='ODR of traces [Hz]')
+    parser.add_argument('--fs', type=int, default=4, choices=sorted(FS_CODE),
+                        help='full scale [g]')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--fn-weight', type=float, default=1.0,
+                        help='cost of a missed W tap against a false one')
+    parser.add_argument('--guard', type=float, default=GUARD,
+                        help='tap guard window [s], 0: off')
+    parser.add_argument('--click-air', type=float, default=CLICK_AIR,
+                        help='radio time of a false click [s]')
+    args = parser.parse_args(argv)
+    odr = int(args.odr) if args.odr == int(args.odr) else args.odr
+    traces = []
+    if args.synth:
+        traces.append(('synth', synth(args.synth, odr, args.seed)))
+    for path in args.file:
+        traces.append((path, load(path)))
+    if not traces:
+        parser.error('no trace (file or --synth)')
+    result = {}
+    hours = 0.0
+    for name, (t, acc, events) in traces:
+        hours += (t[-1] - t[0]) / 3600
+        labels = {}
+        for _, label in events:
+            labels[label] = labels.get(label, 0) + 1
+        print('{}: {:.2f}h, {} samples, {}'.format(
+            name, (t[-1] - t[0]) / 3600, len(t), ', '.join(
+                '{} {}'.format(k, v) for k, v in sorted(labels.items()))))
+        for k, v in sweep(t, acc, events, args.fs, args.guard).items():
+            result[k] = tuple(a + b for a, b in zip(result.get(k, (0,) * 6),
+                                                    v))
+    report(result, odr, args.fs, args.fn_weight, hours=hours,
+            guard=args.guard, click_air=args.click_air)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+'''
+telemetry.py
+decode telemetry of turner/telemetry.py and project battery life.
+usage: python -m sim.telemetry [log.txt] [--capacity mAh] [--current S=mA]
+
+memo.
+input is console log which has 'TELEMETRY <hex>' line (printed at boot
+when USB is connected, the last one is used), or raw binary of
+sleep_memory. CURRENT is assumed average current of each state for XIAO
+nRF52840 (Sense) with CircuitPython, LEDs included. measure your board
+and give --current ADV=2.0 etc.
+'''
+import argparse
+import ast
+import os
+import struct
+import sys
+
+FIRMWARE = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'turner', 'telemetry.py')
+
+
+# constants of layout in turner/telemetry.py. it imports alarm and board,
+# so it is parsed, not imported
+def _layout(path=FIRMWARE):
+    with open(path) as f:
+        tree = ast.parse(f.read())
+    out = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 \
+                and isinstance(node.targets[0], ast.Name):
+            try:
+                out[node.targets[0].id] = ast.literal_eval(node.value)
+            except ValueError:
+                pass
+    return out
+
+
+_L = _layout()
+HEADER, RECORD, MAGIC, VERSION = (_L[k] for k in (
+    'HEADER', 'RECORD', 'MAGIC', 'VERSION'))
+SIZE, UNITS, STATES, WAKES = (_L[k] for k in ('SIZE', 'UNITS', 'STATES',
+                                              'WAKES'))
+
+# [mA] assumed average current of each state
+CURRENT = {
+    'ADV': 2.0,     # advertising and LED blink
+    'SLEEP': 0.8,   # light sleep, connected. IMU 208Hz, external LED
+    'ACTIVE': 9.0,  # CPU, radio and blue LED
+    'DEEP': 0.3,    # pseudo deep sleep, IMU power down
+}
+CAPACITY = 600      # [mAh]
+
+
+# records in order of time: [(boot, seq, {state: s}, {wake: n})]
+def decode(data):
+    data = bytes(data[:SIZE])
+    magic, version, head, count, boot, _ = struct.unpack_from(HEADER, data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError('no telemetry (magic {!r}, version {})'.format(
+            magic, version))
+    hsize = struct.calcsize(HEADER)
+    rsize = struct.calcsize(RECORD)
+    capacity = (SIZE - hsize) // rsize
+    order = range(count) if count < capacity \
+        else [(head + i) % capacity for i in range(capacity)]
+    records = []
+    for i in order:
+        v = struct.unpack_from(RECORD, data, hsize + i * rsize)
+        seconds = {s: n * u / 1000
+                   for s, n, u in zip(STATES, v[2:6], UNITS)}
+        wakes = dict(zip(WAKES, v[6:]))
+        records.append((v[0], v[1], seconds, wakes))
+    return records
+
+
+# total seconds of states and wakes of records
+def total(records):
+    seconds = dict.fromkeys(STATES, 0.0)
+    wakes = dict.fromkeys(WAKES, 0)
+    for _, _, s, w in records:
+        for k in STATES:
+            seconds[k] += s[k]
+        for k in WAKES:
+            wakes[k] += w[k]
+    return seconds, wakes
+
+
+# average current [mA] by residency of states
+def average_current(seconds, current=CURRENT):
+    t = sum(seconds.values())
+    if t <= 0:
+        return float('nan')
+    return sum(seconds[s] * current[s] for s in seconds) / t
+
+
+# telemetry bytes from console log, or raw binary
+def load(data):
+    for line in reversed(data.splitlines()):
+        if line.startswith(b'TELEMETRY '):
+            return bytes.fromhex(line[10:].strip().decode())
+    return data
+
+
+def report(records, current=CURRENT, capacity=CAPACITY):
+    seconds, wakes = total(records)
+    t = sum(seconds.values())
+    boots = sorted(set(r[0] for r in records))
+    print('records {} (boots {}), {:.2f}h'.format(
+        len(records), len(boots), t / 3600))
+    print('  state      time[s]  share  current[mA]  charge[mAh]')
+    for s in STATES:
+        print('  {:7s} {:10.1f} {:5.1f}% {:10.2f} {:12.3f}'.format(
+            s, seconds[s], 100 * seconds[s] / max(t, 1e-9), current[s],
+            seconds[s] * current[s] / 3600))
+    hours = max(t / 3600, 1e-9)
+    print('  wakes: ' + ', '.join('{} {} ({:.1f}/h)'.format(
+        k, wakes[k], wakes[k] / hours) for k in WAKES))
+    avg = average_current(seconds, current)
+    if avg == avg:  # not nan
+        life = capacity / avg
+        print('  average {:.3f}mA -> {:g}mAh lasts {:.0f}h ({:.1f} days)'.format(
+            avg, capacity, life, life / 24))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[2])
+    parser.add_argument('file', nargs='?', help='log or binary (default: '
+                        'stdin)')
+    parser.add_argument('--capacity', type=float, default=CAPACITY,
+                        help='battery capacity [mAh]')
+    parser.add_argument('--current', action='append', default=[],
+                        metavar='STATE=mA', help='current of a state')
+    args = parser.parse_args(argv)
+    current = dict(CURRENT)
+    for item in args.current:
+        state, value = item.split('=')
+        if state not in current:
+            parser.error('unknown state {}'.format(state))
+        current[state] = float(value)
+    if args.file:
+        with open(args.file, 'rb') as f:
+            data = f.read()
+    else:
+        data = sys.stdin.buffer.read()
+    report(decode(load(data)), current, args.capacity)
+
+
+if __name__ == '__main__':
+    main()
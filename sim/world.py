@@ -0,0 +1,558 @@
+'''
+world.py
+virtual time and virtual hardware of the host-side simulator.
+every stub module (board, digitalio, alarm, adafruit_ble, ...) talks to the
+World which is active while sim.harness.run() executes the firmware.
+
+memo.
+time only moves in time.sleep(), alarm.*sleep*(), I2C transfers and blocked
+BLE notifications, so hours of reading are simulated in milliseconds.
+pins are modelled as Line objects (list of toggle times). button pairs are
+wired in parallel like the real board: FWD:D3+4, REV:D8+9, BACK/POWER:D5+6.
+'''
+import bisect
+import heapq
+import math
+import random
+
+
+# raised to unwind the firmware. BaseException, so that 'except Exception'
+# in the firmware cannot swallow them
+class Halt(BaseException):          # end of scenario
+    pass
+
+
+class Reload(BaseException):        # supervisor.reload()
+    pass
+
+
+class DeepSleepReset(BaseException):    # alarm.exit_and_deep_sleep_until_alarms
+    pass
+
+
+_current = None
+
+
+def current():
+    if _current is None:
+        raise RuntimeError('no active World. run firmware via sim.harness')
+    return _current
+
+
+# pins of each button. first one is read, second one is used for PinAlarm
+BUTTON_PINS = {
+    'FWD': ('D3', 'D4'),
+    'REV': ('D8', 'D9'),
+    'BACK': ('D5', 'D6'),
+    'MODE': ('D7',),
+}
+# board.* names of XIAO nRF52840, and extra ones of the Sense version
+BOARD_PINS = ['D{}'.format(i) for i in range(11)] + [
+    'A0', 'A1', 'A2', 'A3', 'A4', 'A5', 'SDA', 'SCL', 'TX', 'RX',
+    'LED', 'LED_RED', 'LED_GREEN', 'LED_BLUE',
+    'VBATT', 'READ_BATT_ENABLE', 'CHARGE_STATUS',
+]
+SENSE_PINS = ['IMU_PWR', 'IMU_SCL', 'IMU_SDA', 'IMU_INT1', 'MIC_PWR']
+# free heap of CircuitPython at start of code.py [byte] (approx. nRF52840)
+HEAP = 120000
+# heap of a register descriptor object of adafruit_register with its buffer
+# [byte] (approx. instance, attribute map and bytearray on the VM)
+DESCRIPTOR_HEAP = {'RWBit': 96, 'RWBits': 128}
+# time from alarm to return of light_sleep_until_alarms() [s] (approx.
+# resume of clocks, peripherals and VM, alarms deinit)
+WAKE_TIME = 0.002
+# advertising events walked one by one before the scanned time, the wait
+# before them is skipped by the sum of advDelays (Ble.scanned)
+SCAN_WALK = 1000
+# aliases in board and microcontroller.pin (same Pin object)
+PIN_ALIASES = {
+    'A0': 'D0', 'A1': 'D1', 'A2': 'D2', 'A3': 'D3', 'A4': 'D4', 'A5': 'D5',
+    'SDA': 'D4', 'SCL': 'D5', 'TX': 'D6', 'RX': 'D7', 'LED': 'LED_RED',
+    'P0_13': 'HICHG', 'P0_14': 'READ_BATT_ENABLE', 'P0_17': 'CHARGE_STATUS',
+    'P0_31': 'VBATT',
+}
+
+
+class Pin:
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return 'board.{}'.format(self.name)
+
+
+# alarm.sleep_memory of CircuitPython: bytes by index and slice only, no
+# buffer protocol (struct.pack_into() on it raises TypeError, as on board)
+class SleepMemory:
+    def __init__(self, size):
+        self._data = bytearray(size)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return bytearray(self._data[index])
+        return self._data[index]
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice) and len(value) != len(
+                range(*index.indices(len(self._data)))):
+            raise ValueError('Slice and value different lengths.')
+        self._data[index] = value
+
+
+# digital signal as sorted toggle times from its idle level
+class Line:
+    def __init__(self, idle=True):
+        self.idle = idle
+        self.edges = []
+
+    def level(self, t):
+        return self.idle != (bisect.bisect_right(self.edges, t) % 2 == 1)
+
+    # earliest time >= t where level is value, None if never (as known now)
+    def next_time(self, t, value):
+        if self.level(t) == value:
+            return t
+        i = bisect.bisect_right(self.edges, t)
+        return self.edges[i] if i < len(self.edges) else None
+
+    # active (not idle) in [t0, t1), merged with overlapping pulses
+    def set_pulses(self, pulses):
+        self.edges = []
+        for t0, t1 in sorted(pulses):
+            self.append_pulse(t0, t1)
+
+    def append_pulse(self, t0, t1=None):
+        if self.edges and len(self.edges) % 2 == 0 and t0 <= self.edges[-1]:
+            if t1 is None:
+                self.edges.pop()
+            else:
+                self.edges[-1] = max(self.edges[-1], t1)
+            return
+        if self.edges and len(self.edges) % 2 == 1:  # still active
+            if t1 is not None:
+                self.edges.append(t1)
+            return
+        self.edges.append(t0)
+        if t1 is not None:
+            self.edges.append(t1)
+
+    # end an open pulse (latched interrupt cleared by reading)
+    def release(self, t):
+        if len(self.edges) % 2 == 1:
+            self.edges.append(max(t, self.edges[-1]))
+
+
+# LSM6DS3TR-C register file with tap detector (see ST datasheet & AN5130)
+# simplification: TAP_SRC keeps its bits until read (clear on read)
+class Imu:
+    ADDRESS = 0x6A
+    WHO_AM_I = 0x0F
+    CTRL1_XL = 0x10
+    CTRL3_C = 0x12
+    WAKE_UP_SRC = 0x1B
+    TAP_SRC = 0x1C
+    D6D_SRC = 0x1D
+    TAP_CFG = 0x58
+    WAKE_UP_THS = 0x5B
+    MD1_CFG = 0x5E
+    MD2_CFG = 0x5F
+    TAP_G = 2.0     # [g] slope of a knock
+    TAP_ODR = 104   # [Hz] lower ODR misses the knock (rings ~10ms)
+
+    def __init__(self, world):
+        self.world = world
+        self.powered = False
+        self.regs = bytearray(0x80)
+        self.pointer = 0
+        self.int1 = world.line('IMU_INT1')
+        self.reset()
+
+    def reset(self):
+        self.regs[:] = bytes(0x80)
+        self.regs[self.WHO_AM_I] = 0x6A
+        self.regs[self.CTRL3_C] = 0x04    # IF_INC
+        self.regs[0x18] = 0xE0            # CTRL9_XL: DEN_X, DEN_Y, DEN_Z
+        self.int1.release(self.world.now)
+
+    def power(self, on):
+        if on and not self.powered:
+            self.reset()
+        self.powered = on
+        self.world.record('imu_power', on)
+        self.world.record('imu_odr', self.odr_hz() if on else 0)
+
+    # ODR_XL of datasheet (not exactly 12.5 * 2^n)
+    def odr_hz(self):
+        return (0, 12.5, 26, 52, 104, 208, 416, 833, 1660, 3330, 6660,
+                1.6, 0, 0, 0, 0)[self.regs[self.CTRL1_XL] >> 4]
+
+    # [g] full scale of CTRL1_XL FS_XL: 00 +-2g, 01 +-16g, 10 +-4g, 11 +-8g
+    def full_scale(self):
+        return (2, 16, 4, 8)[self.regs[self.CTRL1_XL] >> 2 & 0x03]
+
+    # INT1 of an event routed by mask of MD1_CFG. with LIR, latched until
+    # the source register is read, otherwise a pulse of 1/ODR
+    def _interrupt(self, md1_mask):
+        tap_cfg = self.regs[self.TAP_CFG]
+        if self.regs[self.MD1_CFG] & md1_mask and tap_cfg & 0x80:
+            now = self.world.now
+            if tap_cfg & 0x01:
+                self.int1.append_pulse(now)     # latched until source read
+            else:
+                self.int1.append_pulse(now, now + 1 / self.odr_hz())
+
+    def write(self, buf):
+        if not self.powered:
+            raise OSError(19, 'No such device')     # NACK
+        reg = buf[0]
+        for b in buf[1:]:
+            if reg == self.CTRL3_C and b & 0x01:    # SW_RESET, self clear
+                self.reset()
+                b = self.regs[self.CTRL3_C]
+            self.regs[reg & 0x7F] = b
+            if reg & 0x7F == self.CTRL1_XL:
+                self.world.record('imu_odr', self.odr_hz())
+            if self.regs[self.CTRL3_C] & 0x04:
+                reg += 1
+        self.pointer = buf[0]
+
+    def read(self, n):
+        if not self.powered:
+            raise OSError(19, 'No such device')
+        out = bytearray()
+        reg = self.pointer
+        for _ in range(n):
+            out.append(self.regs[reg & 0x7F])
+            if reg in (self.WAKE_UP_SRC, self.TAP_SRC, self.D6D_SRC):
+                self.regs[reg] = 0      # source registers clear on read
+                if self.regs[self.TAP_CFG] & 0x01:  # LIR: latched INT
+                    self.int1.release(self.world.now)
+            if self.regs[self.CTRL3_C] & 0x04:
+                reg += 1
+        self.pointer = reg
+        return out
+
+    # physical tap. double: second knock of a double tap. the knock is a
+    # shock of TAP_G to the wake-up detector too
+    def tap(self, double=True):
+        self.shake(self.TAP_G, 'Z')
+        tap_cfg = self.regs[self.TAP_CFG]
+        if not self.powered or self.odr_hz() < self.TAP_ODR \
+                or not tap_cfg & 0x0E:
+            return False
+        if double and not self.regs[self.WAKE_UP_THS] & 0x80:
+            return False    # SINGLE_DOUBLE_TAP disabled
+        self.regs[self.TAP_SRC] = 0x40 | (0x10 if double else 0x20)
+        self.world.record('imu_tap', 'double' if double else 'single')
+        self._interrupt(0x08 if double else 0x40)
+        return True
+
+    # board turned to edge ('XL' .. 'ZH', the axis pointing down is high).
+    # 6D change is detected whatever SIXD_THS is (tilts are steep enough)
+    def orient(self, edge):
+        if not self.powered or self.odr_hz() == 0:
+            return False
+        bit = ('XL', 'XH', 'YL', 'YH', 'ZL', 'ZH').index(edge)
+        self.regs[self.D6D_SRC] = 0x40 | 1 << bit
+        self.world.record('imu_6d', edge)
+        self._interrupt(0x04)
+        return True
+
+    # shock or flick of g [g] along axis. wake-up event when over the
+    # threshold of WAKE_UP_THS (6bit of FS/64)
+    def shake(self, g, axis='X'):
+        if not self.powered or self.odr_hz() == 0:
+            return False
+        ths = (self.regs[self.WAKE_UP_THS] & 0x3F) * self.full_scale() / 64
+        if g <= ths:
+            return False
+        self.regs[self.WAKE_UP_SRC] = 0x08 | 1 << 'ZYX'.index(axis)
+        self.world.record('imu_wakeup', g)
+        self._interrupt(0x20)
+        return True
+
+
+# BLE link seen from the peripheral. connection events (CE) are every
+# interval from conn_t0, each CE carries up to packets_per_event notifications
+# and notifications wait in a TX queue of tx_queue depth
+class Ble:
+    def __init__(self, world, scenario):
+        self.world = world
+        self.sc = scenario
+        self.connected = False
+        self.advertising = False
+        self.adv_t0 = None
+        self.interval = scenario.conn_interval
+        self.conn_t0 = None
+        self.tx = []            # air time of queued/sent notifications
+        self.ce = (-1, 0)       # (index, used packets) of last filled CE
+        self.token = 0          # invalidates scheduled connects & updates
+        self.rnd = random.Random(1)     # advDelay of advertising events
+
+    def host_ready(self, t):
+        for t0, t1 in self.sc.host_off:
+            if t0 <= t < t1:
+                t = t1
+        return t
+
+    def start_advertising(self, interval=0.1):
+        if self.advertising:
+            raise RuntimeError('Already advertising.')
+        if self.connected:
+            raise RuntimeError('Already connected.')
+        self.advertising = True
+        self.adv_t0 = self.world.now
+        self.token += 1
+        self.world.record('adv_start', interval)
+        if self.sc.host_delay is not None:
+            t = self.host_ready(self.world.now) + self.sc.host_delay
+            if self.sc.scan is not None:
+                t = self.scanned(t, interval)
+            token = self.token
+            self.world.schedule(t, lambda: self._host_connect(token))
+
+    # first advertising event at or after t in a scan window of the tablet.
+    # events are every interval + advDelay (0~10ms random). a long wait
+    # (tablet off) is skipped at once, but for the last SCAN_WALK events:
+    # the sum of advDelays is normal (mean 5ms, sd 10ms/sqrt(12) per event)
+    def scanned(self, t, interval):
+        window, period = self.sc.scan
+        te = self.adv_t0
+        n = int((t - te) / (interval + 0.005)) - SCAN_WALK
+        if n > SCAN_WALK:
+            te += n * (interval + 0.005) \
+                + self.rnd.gauss(0, 0.010 * (n / 12) ** 0.5)
+        while te <= self.world.end:
+            te += interval + self.rnd.uniform(0, 0.010)
+            if te >= t and te % period < window:
+                return te
+        return te
+
+    def stop_advertising(self):
+        if self.advertising:
+            self.advertising = False
+            self.world.record('adv_stop')
+
+    def _host_connect(self, token):
+        if token != self.token or not self.advertising:
+            return
+        if self.host_ready(self.world.now) != self.world.now:
+            return      # host switched off meanwhile. retry on its return
+        self.advertising = False
+        self.connected = True
+        self.conn_t0 = self.world.now
+        self.interval = self.sc.conn_interval
+        self.tx = []
+        self.ce = (-1, 0)
+        self.world.record('connect', self.world.now - self.adv_t0)
+
+    # connection parameter update requested by the peripheral. the tablet
+    # clamps it to its range (or rejects it), the new interval starts at
+    # an instant update_events connection events later
+    def request_interval(self, interval):
+        w = self.world
+        if not self.connected:
+            return
+        lo, hi = self.sc.interval_range
+        if not self.sc.accept_update:
+            w.record('conn_param', interval, None)
+            return
+        new = min(hi, max(lo, interval))
+        k = math.ceil((w.now - self.conn_t0) / self.interval - 1e-9)
+        instant = self.conn_t0 + (k + self.sc.update_events) * self.interval
+        token = self.token
+        w.record('conn_param', interval, new)
+        w.schedule(instant, lambda: self._update(token, new))
+
+    def _update(self, token, interval):
+        if token != self.token or not self.connected:
+            return
+        self.conn_t0 = self.world.now
+        self.interval = interval
+        self.ce = (-1, 0)
+        self.world.record('conn_update', interval)
+
+    def disconnect(self, by='peripheral'):
+        if self.connected:
+            self.connected = False
+            self.token += 1
+            self.world.record('disconnect', by)
+
+    # send one notification. returns its air time, None when not connected
+    def notify(self, kind, nbytes):
+        w = self.world
+        if not self.connected:
+            w.record('notify_local', kind)
+            return None
+        pending = [t for t in self.tx if t > w.now]
+        if len(pending) >= self.sc.tx_queue:    # TX queue full: block
+            t0 = w.now
+            w.advance_to(pending[0])
+            w.record('notify_block', w.now - t0)
+            if not self.connected:
+                return None
+            pending = [t for t in self.tx if t > w.now]
+        k = max(0, math.ceil((w.now - self.conn_t0) / self.interval - 1e-9))
+        index, used = self.ce
+        if k <= index and used < self.sc.packets_per_event:
+            k, used = index, used + 1
+        elif k <= index:
+            k, used = index + 1, 1
+        else:
+            used = 1
+        self.ce = (k, used)
+        air = self.conn_t0 + k * self.interval
+        self.tx = pending + [air]
+        w.record('notify', kind, nbytes, air)
+        return air
+
+
+class World:
+    def __init__(self, scenario, board='sense'):
+        global _current
+        self.scenario = scenario
+        self.board = board
+        self.now = 0.0
+        self.end = scenario.end
+        self.trace = []
+        self._events = []
+        self._seq = 0
+        self.pins = {}
+        self.lines = {}
+        self.outputs = {}
+        self.claimed = set()
+        self.console = 0        # bytes printed to console
+        self.console_writes = 0
+        self.sleep_memory = SleepMemory(256)
+        self.nvm = bytearray(8192)
+        self.heap_free = HEAP
+        self.rnd = random.Random(0)     # noise of ADC
+        self.wake_alarm = None
+        names = BOARD_PINS + (SENSE_PINS if board == 'sense' else [])
+        for name in names + ['HICHG']:
+            self.pins[name] = Pin(PIN_ALIASES.get(name, name))
+        for alias, name in PIN_ALIASES.items():
+            if name in self.pins:
+                self.pins[alias] = self.pins[name]
+        self.imu = Imu(self) if board == 'sense' else None
+        self.ble = Ble(self, scenario)
+        self.charging = self.line('CHARGE_STATUS')     # low while charging
+        self.charging.set_pulses(scenario.charge)
+        self._build_inputs()
+
+    def line(self, name, idle=None):
+        if name not in self.lines:
+            if idle is None:
+                idle = name != 'IMU_INT1'
+            self.lines[name] = Line(idle)
+        return self.lines[name]
+
+    def _build_inputs(self):
+        pulses = {name: [] for name in BUTTON_PINS}
+        for ev in self.scenario.events:
+            ev.install(self, pulses)
+        for button, pins in BUTTON_PINS.items():
+            for name in pins:
+                self.line(name).set_pulses(pulses[button])
+
+    # -- time
+    def schedule(self, t, callback):
+        self._seq += 1
+        heapq.heappush(self._events, (t, self._seq, callback))
+
+    def next_event(self):
+        return self._events[0][0] if self._events else None
+
+    def advance_to(self, t):
+        if t > self.end:
+            while self._events and self._events[0][0] <= self.end:
+                self._run_event()
+            self.now = self.end
+            raise Halt()
+        while self._events and self._events[0][0] <= t:
+            self._run_event()
+        self.now = max(self.now, t)
+
+    def _run_event(self):
+        t, _, callback = heapq.heappop(self._events)
+        self.now = max(self.now, t)
+        callback()
+
+    def sleep(self, seconds):
+        self.record('sleep', seconds)
+        self.advance_to(self.now + seconds)
+
+    def record(self, kind, *data):
+        self.trace.append((self.now, kind) + data)
+
+    # -- pins
+    def pin(self, name):
+        return self.pins[name]
+
+    # library import: load time and heap of its module
+    def load(self, name, seconds, nbytes):
+        self.heap_free -= nbytes
+        self.record('import', name, seconds, nbytes)
+        self.advance_to(self.now + seconds)
+
+    # objects of libraries which the firmware keeps (descriptors etc.)
+    def alloc(self, nbytes):
+        self.heap_free -= nbytes
+
+    def claim(self, pin):
+        if pin.name in self.claimed:
+            raise ValueError('{} in use'.format(pin))
+        self.claimed.add(pin.name)
+
+    def release(self, pin):
+        self.claimed.discard(pin.name)
+
+    def drive(self, pin, value):
+        if self.outputs.get(pin.name) != value:
+            self.outputs[pin.name] = value
+            self.record('pin', pin.name, value)
+            if pin.name == 'IMU_PWR' and self.imu is not None:
+                self.imu.power(value)
+
+    def level(self, pin):
+        if pin.name in self.outputs:
+            return self.outputs[pin.name]
+        if pin.name in self.lines:
+            return self.lines[pin.name].level(self.now)
+        return True
+
+    def battery_raw(self):
+        sc = self.scenario
+        raw = sc.battery_raw - sc.battery_drain * self.now
+        return int(raw + self.rnd.gauss(0, sc.battery_noise))
+
+    # -- alarms. each alarm has .when(world) -> earliest trigger time or None
+    def light_sleep(self, alarms, kind='light_sleep'):
+        self.record(kind, len(alarms))
+        while True:
+            times = [a.when(self) for a in alarms]
+            times = [t for t in times if t is not None]
+            t = min(times) if times else self.end + 1
+            if self.next_event() is not None and self.next_event() < t:
+                self.advance_to(self.next_event())
+                continue
+            self.advance_to(t)
+            for a in alarms:
+                if a.when(self) == self.now:
+                    self.wake_alarm = a
+                    self.record('wake', a.describe())
+                    self.advance_to(self.now + WAKE_TIME)
+                    return a
+
+    # -- VM restart (reload or deep sleep). pins are reset, RAM is lost
+    def reset_vm(self, reason):
+        self.record('vm_reset', reason)
+        self.heap_free = HEAP
+        self.claimed.clear()
+        self.outputs.clear()    # all pins back to Hi-Z, LEDs off
+        if self.imu is not None and self.imu.powered:
+            self.imu.power(False)
+        self.ble.stop_advertising()
@@ -0,0 +1,4 @@
+'''
+turner
+subsystems of eBook_turner_w2. copy this directory to CIRCUITPY with main.py
+'''
@@ -0,0 +1,87 @@
+'''
+battery.py
+battery gauge: oversampled & median filtered VBATT, LiPo discharge curve
+and BatteryService level with hysteresis. read on slow schedule, not in
+page turn.
+
+memo.
+vbat[mV] = raw*3300[mV]*((1M+510k)/510k)/2^16 in linear region (Vdd>3.3V)
+experimentally, 100% : 3.7V~23900raw, 0% : 2.5V~21400raw
+see: https://twitter.com/pado3/status/1613699618092744704/photo/3
+CURVE is typical LiPo discharge curve (4.20V:100% ~ 3.27V:0%, 0.2C)
+scaled to the experimental end points above. flat 3.7~3.9V region of LiPo
+is 20~70%, linear mapping was too optimistic there
+'''
+import supervisor
+from turner.keyin import ticks_diff
+
+# (raw, percent), raw in ascending order
+CURVE = (
+    (21400, 0), (22314, 5), (22529, 10), (22637, 20), (22744, 30),
+    (22825, 40), (22932, 50), (23013, 60), (23228, 70), (23416, 80),
+    (23658, 90), (23900, 100),
+)
+
+
+# percent of raw by linear interpolation of CURVE, 0~100
+def percent(raw):
+    if raw <= CURVE[0][0]:
+        return 0
+    for (r0, p0), (r1, p1) in zip(CURVE, CURVE[1:]):
+        if raw <= r1:
+            return p0 + (p1 - p0) * (raw - r0) // (r1 - r0)
+    return 100
+
+
+def millivolt(raw):
+    return raw * (3300 / 65536) * (1510 / 510)
+
+
+class BatteryGauge:
+    # rbat: AnalogIn of VBATT, bs: BatteryService
+    # period[sec]: read interval, samples: ADC reads for 1 median
+    # step[%]: hysteresis, level is notified when it changes step or more
+    # smooth: weight of new median in average of reads (1: no average)
+    def __init__(self, rbat, bs, period=60, samples=9, step=2, smooth=0.25):
+        self.rbat = rbat
+        self.bs = bs
+        self.period = period
+        self.samples = samples
+        self.step = step
+        self.smooth = smooth
+        self.raw = 0            # averaged raw, 0: not yet
+        self.percent = None     # last notified level, None: not yet
+        self.t_read = 0         # ticks_ms of last read
+
+    # median of oversampled raw values (spikes of radio TX and LED),
+    # then averaged with the past reads (slow noise)
+    def read(self):
+        values = sorted(self.rbat.value for _ in range(self.samples))
+        median = values[len(values) // 2]
+        if self.raw:
+            self.raw += int(self.smooth * (median - self.raw))
+        else:
+            self.raw = median
+        self.t_read = supervisor.ticks_ms()
+        return self.raw
+
+    # level of the snapshot before deep sleep (turner/snapshot.py), next
+    # read after period
+    def restore(self, raw, percent):
+        self.raw = raw
+        self.percent = percent
+        self.bs.level = percent
+        self.t_read = supervisor.ticks_ms()
+
+    # read when period passed (or forced), and set level with hysteresis.
+    # return True when BatteryService.level is changed
+    def update(self, force=False):
+        if not force and self.percent is not None and ticks_diff(
+                supervisor.ticks_ms(), self.t_read) < self.period * 1000:
+            return False
+        pc = percent(self.read())
+        if self.percent is not None and abs(pc - self.percent) < self.step:
+            return False
+        self.percent = pc
+        self.bs.level = pc
+        return True
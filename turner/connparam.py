@@ -0,0 +1,82 @@
+'''
+connparam.py
+connection interval policy: short interval while pages go on (repeat and
+mashing reach the tablet sooner), usual one while reading, long one while
+idle (fewer connection events, less radio current).
+
+memo.
+steps are (idle time[s] since page turn, interval[ms]) in ascending order.
+default: 15ms for 2s after page turn, then 30ms (typical of Android), then
+150ms after 60s idle. a page turn requests 15ms only within 2s of the last
+one (the 2nd press of a burst) or for pages of a skip, from idle it
+requests 30ms. a page of
+reading pace sends no request: 2 requests a page cost 0.019mA for no
+latency, the report goes at the interval already in use. first page after
+idle waits up to 150ms for its connection event, following pages are fast
+again.
+BLEConnection.connection_interval setter sends a request to the tablet,
+which may clamp or ignore it. the value read back changes at the update
+instant (some connection events later). activity() and update() return
+the requested interval[ms] (None: no request) for the log of the caller,
+a failed request leaves its exception in error (no print in the loop).
+CircuitPython has no setting of peripheral latency, so idle power is
+saved only by the interval
+'''
+import supervisor
+from turner.keyin import ticks_diff
+
+
+class ConnPolicy:
+    def __init__(self, steps=((0, 15), (2, 30), (60, 150))):
+        self.steps = steps
+        self.conn = None
+        self.step = None        # index of requested step, None: not yet
+        self.t_turn = 0         # ticks_ms of last page turn
+        self.error = None       # exception of the last failed request
+
+    # new connection. start as right after page turn, reading is likely
+    def start(self, connection):
+        self.conn = connection
+        self.t_turn = supervisor.ticks_ms()
+        return self._request(0)
+
+    # page turn of count pages: the first step for a skip or within its
+    # time from the last turn (pages go on), else the reading step when
+    # idle. no request at reading pace
+    def activity(self, count=1):
+        now = supervisor.ticks_ms()
+        gap = ticks_diff(now, self.t_turn) / 1000
+        self.t_turn = now
+        step = 0
+        if count == 1 and len(self.steps) > 1 and gap >= self.steps[1][0]:
+            step = 1
+        if self.step is None or step < self.step:
+            return self._request(step)
+        return None
+
+    # request the interval of idle time, when it goes to next step
+    def update(self):
+        idle = ticks_diff(supervisor.ticks_ms(), self.t_turn) / 1000
+        step = self.step
+        while step + 1 < len(self.steps) and idle >= self.steps[step + 1][0]:
+            step += 1
+        if step != self.step:
+            return self._request(step)
+        return None
+
+    # [s] until next step, None at the last step
+    def left(self):
+        if self.step + 1 >= len(self.steps):
+            return None
+        idle = ticks_diff(supervisor.ticks_ms(), self.t_turn) / 1000
+        return max(0, self.steps[self.step + 1][0] - idle)
+
+    def _request(self, step):
+        self.step = step
+        interval = self.steps[step][1]
+        try:
+            self.conn.connection_interval = interval
+        except Exception as e:  # not supported, or disconnected
+            self.error = e
+            return None
+        return interval
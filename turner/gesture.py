@@ -0,0 +1,75 @@
+'''
+gesture.py
+gestures by the built-in detectors of LSM6DS3TR-C: double & single tap,
+6D orientation and wake-up (slope). the MCU light sleeps until the sensor
+fires INT1, then reads the 3 source registers in one burst. acceleration
+samples are never read by the MCU.
+
+memo.
+XIAO nRF52840 Sense connects INT1 only (board.IMU_INT1), INT2 of the sensor
+is open. so all detectors of a configuration are OR-ed to INT1 by MD1_CFG
+and told apart by WAKE_UP_SRC, TAP_SRC, D6D_SRC (1Bh-1Dh, clear on read).
+CONFIGS name: ({address: value} over the W tap setting of imu.py, rules)
+rules: (index of source byte, mask, gesture) in priority order, the first
+match is the gesture. gesture is FWD, REV (turner/keyin.py) or TOUCH.
+ODR is the lowest each detector works with: tap needs 208Hz (tuned in
+r1.x), 6D and wake-up work at 26Hz/52Hz in low-power mode, so tilt or
+flick alone saves most of the accelerometer current (~85uA at 208Hz).
+tilt: board tilted over 60deg to Y high/low edge down -> FWD/REV. back to
+flat is a 6D event too, it wakes without gesture.
+flick: slope over 1g -> FWD. WAKE_UP_SRC has axis but no sign, so only
+one direction. a bump over 1g turns a page too.
+LIR latches sources and INT1 until read, a short event is not lost while
+waking (wtap keeps the pulse of r1.x)
+'''
+from micropython import const
+from turner.keyin import FWD, REV
+
+TOUCH = const(4)    # click almost center of screen
+
+# source bytes 0:WAKE_UP_SRC, 1:TAP_SRC, 2:D6D_SRC
+W_TAP = (1, 0x10, TOUCH)    # DOUBLE_TAP
+S_TAP = (1, 0x20, FWD)      # SINGLE_TAP
+TILT_FWD = (2, 0x08, FWD)   # YH
+TILT_REV = (2, 0x04, REV)   # YL
+FLICK = (0, 0x08, FWD)      # WU_IA
+
+CONFIGS = {
+    # double tap only (as r2.x)
+    'wtap': ({}, (W_TAP,)),
+    # double tap to touch, single tap to forward. 208Hz
+    'tap': ({
+        0x58: 0x8F,     # TAP_CFG, INT_EN, XYZ tap, LIR
+        0x5E: 0x48,     # MD1_CFG, single & double tap
+    }, (W_TAP, S_TAP)),
+    # double tap and tilt. 208Hz for tap
+    'wtap_tilt': ({
+        0x58: 0x8F,     # TAP_CFG, INT_EN, XYZ tap, LIR
+        0x59: 0x4A,     # TAP_THS_6D, SIXD_THS 60deg, tap ths 10/32
+        0x5E: 0x0C,     # MD1_CFG, double tap & 6D
+    }, (W_TAP, TILT_FWD, TILT_REV)),
+    # tilt only. 26Hz low-power
+    'tilt': ({
+        0x10: 0x28,     # CTRL1_XL, 26Hz, FS+-4g
+        0x58: 0x81,     # TAP_CFG, INT_EN, LIR, no tap axis
+        0x59: 0x40,     # TAP_THS_6D, SIXD_THS 60deg
+        0x5B: 0x00,     # WAKE_UP_THS, no double tap
+        0x5E: 0x04,     # MD1_CFG, 6D
+    }, (TILT_FWD, TILT_REV)),
+    # flick only. 52Hz low-power
+    'flick': ({
+        0x10: 0x38,     # CTRL1_XL, 52Hz, FS+-4g
+        0x58: 0x81,     # TAP_CFG, INT_EN, LIR, no tap axis, slope filter
+        0x5B: 0x10,     # WAKE_UP_THS, no double tap, ths 16/64 FS (1g)
+        0x5C: 0x20,     # WAKE_UP_DUR, WAKE_DUR 1 sample
+        0x5E: 0x20,     # MD1_CFG, wake-up
+    }, (FLICK,)),
+}
+
+
+# gesture of the sources read at INT1 wake, None if no rule matches
+def decode(src, rules):
+    for i, mask, gesture in rules:
+        if src[i] & mask:
+            return gesture
+    return None
@@ -0,0 +1,225 @@
+'''
+imu.py
+W tap (double tap) and gesture detection (turner/gesture.py) with
+LSM6DS3TR-C on XIAO nRF52840 Sense.
+imported only when the board has IMU (board.IMU_PWR), sensor libraries are
+not loaded on XIAO nRF52840 without Sense.
+
+memo.
+I2C address and WHO_AM_I are both 6Ah, full LSM6DS3TRC driver is not used
+'''
+import board
+import busio        # use .I2C() only
+import digitalio
+import time
+from adafruit_bus_device.i2c_device import I2CDevice
+from adafruit_register.i2c_bits import RWBits
+from adafruit_register.i2c_bits import ROBits
+from micropython import const
+from turner.gesture import CONFIGS, decode
+
+IMU_ADDRESS = const(0x6A)
+
+# control register values after SW_RESET (see datasheet). CTRL3_C:IF_INC
+IMU_RESET = {0x0D: 0x00, 0x0E: 0x00, 0x10: 0x00, 0x11: 0x00, 0x12: 0x04,
+             0x13: 0x00, 0x14: 0x00, 0x15: 0x00, 0x16: 0x00, 0x17: 0x00,
+             0x18: 0xE0, 0x19: 0x00, 0x58: 0x00, 0x59: 0x00, 0x5A: 0x00,
+             0x5B: 0x00, 0x5C: 0x00, 0x5D: 0x00, 0x5E: 0x00, 0x5F: 0x00}
+
+
+# register map, see ST_LSM6DS3TR-C datasheet. a field per entry: name,
+# 00h, address, lowest bit, bits (+80h: read only). used: in this project
+# (by address in configure() & update()). one bytes constant instead of a
+# descriptor object per field, field() makes the descriptor of a name when
+# it is used
+REGMAP = (
+    b'INT1_CTRL\x00\x0D\x00\x08'
+    b'WHO_AM_I\x00\x0F\x00\x88'         # fixed 6Ah, same as I2C address
+    b'CTRL1_XL\x00\x10\x00\x08'         # ODR_XL is upper 4bit
+    b'ODR_XL\x00\x10\x04\x04'           # Accelerometer Output Data Rate
+    b'CTRL2_G\x00\x11\x00\x08'
+    b'CTRL3_C\x00\x12\x00\x08'          # use 1bit as SW_RESET
+    b'SW_RESET\x00\x12\x00\x01'         # CTRL3_C bit0
+    b'CTRL4_C\x00\x13\x00\x08'
+    b'CTRL5_C\x00\x14\x00\x08'
+    b'CTRL6_C\x00\x15\x00\x08'          # use 1bit as XL_HM_MODE
+    b'XL_HM_MODE\x00\x15\x04\x01'       # CTRL6_C bit4
+    b'CTRL7_C\x00\x16\x00\x08'          # use 1bit as G_HM_MODE
+    b'G_HM_MODE\x00\x16\x07\x01'        # CTRL7_C bit7
+    b'CTRL8_XL\x00\x17\x00\x08'
+    b'CTRL9_XL\x00\x18\x00\x08'
+    b'CTRL10_C\x00\x19\x00\x08'
+    b'MASTER_CONFIG\x00\x1A\x00\x08'
+    b'WAKE_UP_SRC\x00\x1B\x00\x88'      # 1Bh-1Dh burst read by gesture()
+    b'FF_IA\x00\x1B\x05\x81'
+    b'SLEEP_STATE_IA\x00\x1B\x04\x81'
+    b'WU_IA\x00\x1B\x03\x81'
+    b'X_WU\x00\x1B\x02\x81'
+    b'Y_WU\x00\x1B\x01\x81'
+    b'Z_WU\x00\x1B\x00\x81'
+    b'TAP_SRC\x00\x1C\x00\x88'          # used
+    b'TAP_IA\x00\x1C\x06\x81'
+    b'SINGLE_TAP\x00\x1C\x05\x81'
+    b'DOUBLE_TAP\x00\x1C\x04\x81'       # W tap detection
+    b'TAP_SIGN\x00\x1C\x03\x81'
+    b'X_TAP\x00\x1C\x02\x81'
+    b'Y_TAP\x00\x1C\x01\x81'
+    b'Z_TAP\x00\x1C\x00\x81'
+    b'D6D_SRC\x00\x1D\x00\x88'          # used
+    b'DEN_DRDY\x00\x1D\x07\x81'
+    b'D6D_IA\x00\x1D\x06\x81'
+    b'ZH\x00\x1D\x05\x81'
+    b'ZL\x00\x1D\x04\x81'
+    b'YH\x00\x1D\x03\x81'
+    b'YL\x00\x1D\x02\x81'
+    b'XH\x00\x1D\x01\x81'
+    b'XL\x00\x1D\x00\x81'
+    b'TAP_CFG\x00\x58\x00\x08'          # used
+    b'TAP_THS_6D\x00\x59\x00\x08'       # used
+    b'INT_DUR2\x00\x5A\x00\x08'         # used
+    b'WAKE_UP_THS\x00\x5B\x00\x08'      # used
+    b'WAKE_UP_DUR\x00\x5C\x00\x08'
+    b'FREE_FALL\x00\x5D\x00\x08'
+    b'MD1_CFG\x00\x5E\x00\x08'          # used
+    b'MD2_CFG\x00\x5F\x00\x08'
+)
+
+
+# descriptor of a field of REGMAP. RWBits/ROBits, or RWBit/ROBit for 1 bit
+# (adafruit_register.i2c_bit is imported only then)
+def field(name):
+    key = name.encode()
+    i = 0
+    while i < len(REGMAP):
+        j = REGMAP.index(b'\x00', i)
+        if REGMAP[i:j] == key:
+            address, lowest, bits = REGMAP[j + 1], REGMAP[j + 2], REGMAP[j + 3]
+            ro = bits & 0x80
+            bits &= 0x7F
+            if bits == 1:
+                from adafruit_register.i2c_bit import ROBit, RWBit
+                return (ROBit if ro else RWBit)(address, lowest)
+            return (ROBits if ro else RWBits)(bits, address, lowest)
+        i = j + 4
+    raise AttributeError(name)
+
+
+# IMU interrupt configuration and readout registers
+# control registers are written by configure() & update() with the shadow,
+# descriptors of field() are read-modify-write (2 transactions) and bypass it
+class ImuInt1Control:
+    GAP = 4     # [byte] burst through unchanged registers, cheaper than stop
+    #             & start of next transaction (~4.5 byte time at 400kHz)
+
+    def __init__(self, i2c):
+        self.i2c_device = i2c  # self.i2c_device required by RWBit class
+        self.shadow = {}        # {address: value} known control registers
+        self.transactions = 0   # I2C transactions of configure()
+        self.rules = ()         # gesture rules of CONFIGS
+        self.src = bytearray(3)
+
+    # software reset, all control registers go to reset value
+    def reset(self):
+        self.shadow = {0x12: 0x04}
+        self.configure({0x12: 0x05})    # CTRL3_C, SW_RESET with IF_INC
+        self.shadow = dict(IMU_RESET)   # SW_RESET bit is self cleared
+
+    # write {address: value}. registers same as shadow are skipped, near
+    # ones are written in one auto-increment burst (IF_INC=1)
+    def configure(self, regs):
+        addrs = sorted(a for a in regs if self.shadow.get(a) != regs[a])
+        i = 0
+        while i < len(addrs):
+            j = i
+            while j + 1 < len(addrs) \
+                    and addrs[j + 1] - addrs[j] <= self.GAP + 1 \
+                    and all(a in self.shadow
+                            for a in range(addrs[j] + 1, addrs[j + 1])):
+                j += 1
+            first, last = addrs[i], addrs[j]
+            buf = bytearray(last - first + 2)
+            buf[0] = first
+            for a in range(first, last + 1):
+                buf[a - first + 1] = regs.get(a, self.shadow.get(a))
+            with self.i2c_device as i2c:
+                i2c.write(buf)
+            self.transactions += 1
+            for a in range(first, last + 1):
+                self.shadow[a] = buf[a - first + 1]
+            i = j + 1
+
+    # change bits of mask in a control register, without read
+    def update(self, address, mask, value):
+        value = self.shadow[address] & ~mask | value & mask
+        self.configure({address: value})
+
+    # ODR_XL=0, accelerometer power down (85uA -> 3uA typ.)
+    def power_down(self):
+        self.update(0x10, 0xF0, 0x00)
+
+    # WAKE_UP_SRC, TAP_SRC, D6D_SRC in 1 burst read (clear on read), and
+    # the gesture of them. None: no gesture (e.g. back to flat)
+    def gesture(self):
+        with self.i2c_device as i2c:
+            i2c.write_then_readinto(bytes((0x1B,)), self.src)
+        return decode(self.src, self.rules)
+
+    # register fields of REGMAP as descriptors of the class, for debugging
+    # (e.g. ImuInt1Control.use('TAP_SRC', 'TAP_IA'), then int1c.TAP_IA)
+    @classmethod
+    def use(cls, *names):
+        for name in names:
+            if name not in cls.__dict__:
+                setattr(cls, name, field(name))
+
+    WHO_AM_I = field('WHO_AM_I')    # the only field read by name
+
+
+# define and initialize sensor as W-tap & gesture detector (gesture: name
+# of CONFIGS), return interrupt object
+def define_imu(gesture='wtap'):
+    # define IMU power and turn on
+    imupwr = digitalio.DigitalInOut(board.IMU_PWR)
+    imupwr.switch_to_output(value=True)
+    time.sleep(0.1)
+    imu_i2c = busio.I2C(board.IMU_SCL, board.IMU_SDA, frequency=400000)
+    imu_device = I2CDevice(imu_i2c, IMU_ADDRESS)
+    int1c = ImuInt1Control(imu_device)
+    if int1c.WHO_AM_I != IMU_ADDRESS:
+        raise RuntimeError('LSM6DS3TR-C is not found')
+    # reset IMU, then whole settings in 2 burst writes (10h-16h, 58h-5Eh)
+    int1c.reset()
+    regs, int1c.rules = CONFIGS[gesture]
+    # W tap settings, then overwritten by the gesture configuration
+    config = {
+        # INT1 settings. (*):tuning factor, others:fixed parameter
+        # upper 4bit of 10h=ODR_XL is important for response & current.
+        # ODR: Output Data Rate. I set 208Hz (~5ms), max in normal power mode
+        0x10: 0x58,     # CTRL1_XL, 0101 1000 Power-up, 208Hz(*), FS+-4g
+        # low/normal power mode
+        0x15: 0x10,     # CTRL6_C, XL_HM_MODE=1
+        0x16: 0x80,     # CTRL7_C, G_HM_MODE=1
+        0x58: 0x8E,     # TAP_CFG, 1000 1110 INT_EN, keep ODR, XYZ
+        0x59: 0x0A,     # TAP_THS_6D, 0000 1010 ths:10/32(=1.25g)(*)
+        # INT_DUR2, ODR_XL time is 1/f at CTRL1_XL. GAP~.5s,Q~.04s,DURmax~.08s
+        0x5A: 0x3A,     # INT_DUR2, 0011 1010 duration, quiet setting (all*)
+        0x5B: 0x88,     # WAKE_UP_THS, 1000 1000 S&W tap EN, wakeup ths:8/64(*)
+        0x5E: 0x08,     # MD1_CFG, 0000 1000 routing W tap only
+    }
+    config.update(regs)
+    int1c.configure(config)
+    print('IMU config: {} I2C transactions, '.format(int1c.transactions),
+          end='')
+    '''
+    # sample parameters by chuck '22/5 on Seeed forum (same as AN5130 of STM)
+    # title: 'XIAO BLE Sense - LSM6DS3 INT1 Single Tap Interrupt'
+    ImuInt1Control.use('CTRL1_XL', 'TAP_CFG', 'TAP_THS_6D', 'INT_DUR2',
+                       'WAKE_UP_THS', 'MD1_CFG')
+    int1c.CTRL1_XL = 0x60       # 10h, 0110 0000 416Hz(~2.5ms), FS_XL+-2g
+    int1c.TAP_CFG = 0x8E        # 58h, 1000 1110 INT_EN, SLOPE_FDS, XYZ
+    int1c.TAP_THS_6D = 0x8C     # 59h, 1000 1100 6D, ths:12/32(=0.75g) (why 6D?)
+    int1c.INT_DUR2 = 0x7F       # 5Ah, 0111 1111 GAP~.6s, Q~.03, DURmax~.06s
+    int1c.WAKE_UP_THS = 0x80    # 5Bh, 1000 0000 S&W EN, ths:none
+    int1c.MD1_CFG = 0x08        # 5Eh, 0000 1000 W to INT1
+    '''
+    return int1c
@@ -0,0 +1,69 @@
+'''
+imupower.py
+accelerometer ODR by activity: tap-capable ODR (208Hz) while the device is
+handled, low-power ODR with the wake-up detector after timeout seconds
+without input. the wake-up interrupt (device picked up or knocked) brings
+the tap ODR back before the reader taps.
+
+memo.
+idle: CTRL1_XL ODR to odr (12.5Hz, ~9uA against ~85uA at 208Hz, FS kept),
+MD1_CFG routes wake-up (WAKE_UP_THS 6bit, 0.5g of r1.x) and 6D of the
+gesture config, tap is not routed (windows of INT_DUR2 are in 1/ODR).
+TAP_CFG LIR latches INT1 until the sources are read at the wake, a pulse
+of 1/ODR (80ms) would wake the MCU again and again while it is high.
+active: the registers of define_imu() again (10h, 58h, 5Eh).
+a W tap on the idle device wakes it but is lost (the tap detector was not
+running), the next one works. handling before the tap (picking it up)
+is enough. activity() is called at every input, update() after left().
+configs without tap routing (tilt, flick) already run at low ODR and are
+never switched. timeout None: always the tap ODR
+'''
+import supervisor
+from micropython import const
+from turner.keyin import ticks_diff
+
+CTRL1_XL = const(0x10)
+TAP_CFG = const(0x58)
+MD1_CFG = const(0x5E)
+ODR_CODE = {12.5: 0x10, 26: 0x20, 52: 0x30}     # ODR_XL of CTRL1_XL
+
+
+class ImuPower:
+    # int1c: ImuInt1Control configured by define_imu(), timeout[s]: no input
+    # until idle ODR, odr[Hz]: idle ODR
+    def __init__(self, int1c, timeout=30, odr=12.5):
+        self.int1c = int1c
+        self.timeout = timeout
+        shadow = int1c.shadow
+        self.active = {r: shadow[r] for r in (CTRL1_XL, TAP_CFG, MD1_CFG)}
+        self.idle = {CTRL1_XL: ODR_CODE[odr] | shadow[CTRL1_XL] & 0x0F,
+                     TAP_CFG: shadow[TAP_CFG] | 0x01,          # LIR
+                     MD1_CFG: 0x20 | shadow[MD1_CFG] & 0x04}   # WU & 6D
+        # switched only when tap is routed to INT1 (DOUBLE_TAP, SINGLE_TAP)
+        self.enabled = timeout is not None and shadow[MD1_CFG] & 0x48 != 0
+        self.low = False        # idle ODR now
+        self.t_input = supervisor.ticks_ms()
+
+    # input (switch, INT1), back to the tap ODR. True when switched
+    def activity(self):
+        self.t_input = supervisor.ticks_ms()
+        if not self.low:
+            return False
+        self.int1c.configure(self.active)
+        self.low = False
+        return True
+
+    # to idle ODR after timeout without input. True when switched
+    def update(self):
+        if self.left() != 0:
+            return False
+        self.int1c.configure(self.idle)
+        self.low = True
+        return True
+
+    # [s] until idle ODR, None if it is not due (idle, or not switched)
+    def left(self):
+        if not self.enabled or self.low:
+            return None
+        idle = ticks_diff(supervisor.ticks_ms(), self.t_input) / 1000
+        return max(0, self.timeout - idle)
@@ -0,0 +1,52 @@
+'''
+keepalive.py
+adaptive light sleep timer while connected. short while reading, longer
+and longer while the device is left alone.
+
+memo.
+after a page turn the timer is k times the average gap between page turns,
+limited to t_min~t_max. each timer wake without page turn multiplies it by
+growth up to t_max (ceiling), next page turn sets it back.
+gaps longer than t_max are pauses, not reading pace, and not averaged.
+timer wake is what notices disconnection (pin wake does too), so t_max is
+the longest time to notice it while nobody touches the device
+'''
+import supervisor
+from turner.keyin import ticks_diff
+
+
+class KeepAlive:
+    # t_min, t_max[s]: range of timer, k: timer per average gap
+    # growth: multiplier per idle timer wake, smooth: weight of new gap
+    def __init__(self, t_min=60, t_max=900, k=2.0, growth=2.0, smooth=0.25):
+        self.t_min = t_min
+        self.t_max = max(t_min, t_max)
+        self.k = k
+        self.growth = growth
+        self.smooth = smooth
+        self.gap = None         # [s] average gap of page turns, None: not yet
+        self.t_turn = None      # ticks_ms of last page turn
+        self.interval = t_min   # [s] timer of next light sleep
+
+    # timer right after a page turn
+    def base(self):
+        if self.gap is None:
+            return self.t_min
+        return min(self.t_max, max(self.t_min, self.k * self.gap))
+
+    # page turn (or any action sent), tighten the timer
+    def activity(self):
+        now = supervisor.ticks_ms()
+        if self.t_turn is not None:
+            gap = ticks_diff(now, self.t_turn) / 1000
+            if gap < self.t_max:
+                if self.gap is None:
+                    self.gap = gap
+                else:
+                    self.gap += self.smooth * (gap - self.gap)
+        self.t_turn = now
+        self.interval = self.base()
+
+    # timer wake without any action, stretch the timer
+    def idle(self):
+        self.interval = min(self.t_max, self.interval * self.growth)
@@ -0,0 +1,80 @@
+'''
+keyin.py
+debounced and timestamped switch events, made with keypad module.
+events are scanned in background, so no press is lost while the firmware
+is busy with sending or LED blinking.
+
+memo.
+key_number is same order as old sw_array. 0:FWD(D3), 1:REV(D8),
+2:BACK/POWER(D5), 3:mode(D7, pressed=Kinoppy mode)
+D3, D8 use internal pullup. D5, D7 have external 100k pullup, so they are
+scanned by another Keys without pull (internal is too small for D7)
+timestamp is supervisor.ticks_ms() of the scan which found the change
+'''
+import board
+import keypad
+
+FWD = 0
+REV = 1
+BACK = 2
+MODE = 3
+
+_TICKS_PERIOD = 1 << 29
+_TICKS_MAX = _TICKS_PERIOD - 1
+_TICKS_HALF = _TICKS_PERIOD // 2
+
+
+# signed difference of supervisor.ticks_ms() values, t1 - t2 [ms]
+def ticks_diff(t1, t2):
+    diff = (t1 - t2) & _TICKS_MAX
+    return ((diff + _TICKS_HALF) & _TICKS_MAX) - _TICKS_HALF
+
+
+class KeyInput:
+    # interval[sec]: scan interval, also works as debounce time
+    def __init__(self, interval=0.01, max_events=32):
+        self.interval = interval
+        self._keys = (
+            keypad.Keys((board.D3, board.D8), value_when_pressed=False,
+                        pull=True, interval=interval, max_events=max_events),
+            keypad.Keys((board.D5, board.D7), value_when_pressed=False,
+                        pull=False, interval=interval, max_events=max_events),
+        )
+        self._queue = []    # [(timestamp, key_number, pressed)]
+        self.pressed = [False] * 4  # state after the last taken event
+        self.overflowed = False
+
+    # move events of both Keys to queue in order of time. True if any
+    def update(self):
+        n = len(self._queue)
+        for offset, keys in ((0, self._keys[0]), (2, self._keys[1])):
+            ev = keys.events.get()
+            while ev:
+                self._queue.append((ev.timestamp, ev.key_number + offset,
+                                    ev.pressed))
+                ev = keys.events.get()
+            if keys.events.overflowed:  # queue is empty now, reset the flag
+                keys.events.clear()
+                self.overflowed = True
+        if len(self._queue) > n:
+            base = self._queue[0][0]
+            self._queue.sort(key=lambda e: ticks_diff(e[0], base))
+        return len(self._queue) > 0
+
+    # take queued events in order: (key_number, pressed, timestamp)
+    def events(self):
+        self.update()
+        while self._queue:
+            ts, key, pressed = self._queue.pop(0)
+            self.pressed[key] = pressed
+            yield key, pressed, ts
+
+    # current state of key. queued events are taken and thrown away
+    def state(self, key):
+        for _ in self.events():
+            pass
+        return self.pressed[key]
+
+    def deinit(self):
+        for keys in self._keys:
+            keys.deinit()
@@ -0,0 +1,79 @@
+'''
+led.py
+non-blocking LED patterns over led_array. LEDs are switched on time by
+update() at each wake, light sleep wakes at left() when a change is due,
+so blinks run while the CPU sleeps or handles input.
+
+memo.
+timer-driven with digitalio, not pwmio: PWM of nRF52840 needs HFCLK
+(16MHz) running, which keeps light sleep current high while it blinks.
+flash(): one LED on for seconds, then off
+play(): steps of (index of led_array, on, seconds to next step)
+sleep(): time.sleep with the LEDs switched on time (advertising & deep
+sleep, where nothing else is done)
+'''
+import supervisor
+import time
+from turner.keyin import ticks_diff
+
+
+class LedEngine:
+    # led_array: DigitalInOut of LEDs, on: value to light (False on XIAO)
+    def __init__(self, led_array, on=False):
+        self.leds = led_array
+        self.on = on
+        self.off_at = {}        # {index: ticks_ms to turn off}
+        self.steps = []         # [(index, on, seconds)] of pattern
+        self.t_step = 0         # ticks_ms of next step
+
+    def set(self, i, on):
+        self.leds[i].value = self.on if on else not self.on
+
+    def flash(self, i, seconds):
+        self.set(i, True)
+        self.off_at[i] = supervisor.ticks_ms() + int(seconds * 1000)
+
+    def play(self, steps):
+        self.steps = list(steps)
+        self.t_step = supervisor.ticks_ms()
+        self.update()
+
+    # switch LEDs which are due
+    def update(self):
+        now = supervisor.ticks_ms()
+        for i, t in list(self.off_at.items()):
+            if ticks_diff(now, t) >= 0:
+                self.set(i, False)
+                del self.off_at[i]
+        while self.steps and ticks_diff(now, self.t_step) >= 0:
+            i, on, seconds = self.steps.pop(0)
+            self.set(i, on)
+            self.t_step += int(seconds * 1000)
+
+    # [s] until next change, None if nothing is due. 1ms late, so that
+    # ticks_ms surely reaches it
+    def left(self):
+        ts = list(self.off_at.values())
+        if self.steps:
+            ts.append(self.t_step)
+        if not ts:
+            return None
+        now = supervisor.ticks_ms()
+        return max(0, min(ticks_diff(t, now) for t in ts) + 1) / 1000
+
+    # sleep for seconds (None: until all done), switching LEDs on time
+    def sleep(self, seconds=None):
+        t_end = None
+        if seconds is not None:
+            t_end = supervisor.ticks_ms() + int(seconds * 1000)
+        while True:
+            self.update()
+            dt = self.left()
+            if t_end is not None:
+                rest = ticks_diff(t_end, supervisor.ticks_ms()) / 1000
+                if rest <= 0:
+                    return
+                dt = rest if dt is None else min(dt, rest)
+            elif dt is None:
+                return
+            time.sleep(dt)
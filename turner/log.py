@@ -0,0 +1,58 @@
+'''
+log.py
+console log in RAM ring buffer, written to USB CDC only when USB is
+connected. on battery, nothing is sent and the last size bytes are kept
+until USB is connected.
+
+memo.
+levels are const flags of the caller (LOG_INFO, LOG_DEBUG in
+ebook_turner_w2.py). call as 'if LOG_DEBUG: log.write(fmt, args)', then
+the MicroPython compiler removes the whole statement when the flag is
+const(0): neither formatting nor call is left. (const is folded only in
+the module where it is defined, so the flags cannot live here)
+a line starts with ticks_ms of its first write, end() closes it.
+only ASCII is written, the buffer may be cut at any byte
+'''
+import supervisor
+
+
+class RingLog:
+    def __init__(self, size=1024):
+        self.buf = bytearray(size)
+        self.size = size
+        self.n = 0              # bytes written since last flush
+        self.open = False       # line is not closed by end()
+
+    def write(self, fmt, *args):
+        if not self.open:
+            self.open = True
+            self._put('{} '.format(supervisor.ticks_ms()).encode())
+        self._put((fmt.format(*args) if args else fmt).encode())
+
+    # close the line
+    def end(self):
+        if self.open:
+            self.open = False
+            self._put(b'\n')
+
+    def _put(self, b):
+        if len(b) > self.size:  # keep the tail only
+            self.n += len(b) - self.size
+            b = b[-self.size:]
+        i = self.n % self.size
+        k = min(len(b), self.size - i)
+        self.buf[i:i + k] = b[:k]
+        self.buf[0:len(b) - k] = b[k:]
+        self.n += len(b)
+
+    # print buffered log when USB is connected. '...' when some is lost
+    def flush(self):
+        if not self.n or not supervisor.runtime.usb_connected:
+            return
+        i = self.n % self.size
+        if self.n > self.size:
+            out = b'...' + self.buf[i:] + self.buf[:i]
+        else:
+            out = self.buf[:self.n]
+        print(out.decode(), end='')
+        self.n = 0
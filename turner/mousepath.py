@@ -0,0 +1,45 @@
+'''
+mousepath.py
+relative mouse path to touch a point of the screen, for readers which take
+no absolute pointer (USE_ABS_POINTER=0): home to the upper left corner,
+then to the point, in the fewest HID reports of +-step counts.
+
+memo.
+SCREENS name: (width, height [px], gain [counts/px]). gain 1.0 is the
+tuned path of r1.x on BOOX Poke Pro (Android pointer speed default): 5
+moves of (108, 133) went to (0.50, 0.46) of 1072x1448. measure gain of
+other readers with pointer speed of the tablet, and keep it away from
+acceleration (step: largest count per report the reader takes linearly).
+home overshoots by the whole screen, the cursor stops at the edge.
+a report per connection event (wait of the interval, up to 30ms), so
+that they are not merged or dropped in the TX queue, instead of 60ms
+sleeps after each move.
+r1.x path: 15 moves of up to (108, 145) = 30 reports by 127 limit, 0.9s
+'''
+
+SCREENS = {
+    'poke_pro': (1072, 1448, 1.0),      # BOOX Poke Pro/Poke2/Poke3 6"
+    'poke5': (1072, 1448, 1.0),         # BOOX Poke5 6"
+    'leaf': (1264, 1680, 1.0),          # BOOX Leaf/Leaf2 7"
+    'note_air': (1404, 1872, 1.0),      # BOOX Note Air 10.3"
+    'tab_fhd': (1200, 1920, 1.0),       # 10" Android tablet, portrait
+    'phone_fhd': (1080, 2400, 1.0),     # 6.5" Android phone, portrait
+}
+
+
+# reports of (dx, dy) in counts, fewest within +-step, spread evenly
+def split(dx, dy, step=127):
+    n = max(1, -(-max(abs(dx), abs(dy)) // step))    # ceil
+    out = []
+    for i in range(n):
+        out.append((round(dx * (i + 1) / n) - round(dx * i / n),
+                    round(dy * (i + 1) / n) - round(dy * i / n)))
+    return out
+
+
+# (home reports, target reports) to touch (x, y) in ratio of screen
+def plan(screen, x, y, step=127):
+    width, height, gain = screen
+    home = split(-round(width * gain), -round(height * gain), step)
+    target = split(round(x * width * gain), round(y * height * gain), step)
+    return home, target
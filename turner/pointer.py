@@ -0,0 +1,105 @@
+'''
+pointer.py
+HID report descriptor with absolute pointer (single touch digitizer) for
+W tap. imported only when the board has IMU, XIAO nRF52840 without Sense
+uses the default descriptor of HIDService.
+'''
+from adafruit_hid import find_device
+
+
+# HID report descriptor: mouse, consumer control and absolute pointer.
+# absolute pointer is single touch digitizer, touch anywhere with 1 report
+HID_DESCRIPTOR = (
+    b'\x05\x01'     # Usage Page (Generic Desktop Ctrls)
+    b'\x09\x02'     # Usage (Mouse)
+    b'\xA1\x01'     # Collection (Application)
+    b'\x09\x01'     #   Usage (Pointer)
+    b'\xA1\x00'     #   Collection (Physical)
+    b'\x85\x02'     #     Report ID (2)
+    b'\x05\x09'     #     Usage Page (Button)
+    b'\x19\x01'     #     Usage Minimum (0x01)
+    b'\x29\x05'     #     Usage Maximum (0x05)
+    b'\x15\x00'     #     Logical Minimum (0)
+    b'\x25\x01'     #     Logical Maximum (1)
+    b'\x95\x05'     #     Report Count (5)
+    b'\x75\x01'     #     Report Size (1)
+    b'\x81\x02'     #     Input (Data,Var,Abs)
+    b'\x95\x01'     #     Report Count (1)
+    b'\x75\x03'     #     Report Size (3)
+    b'\x81\x01'     #     Input (Const,Array,Abs)
+    b'\x05\x01'     #     Usage Page (Generic Desktop Ctrls)
+    b'\x09\x30'     #     Usage (X)
+    b'\x09\x31'     #     Usage (Y)
+    b'\x15\x81'     #     Logical Minimum (-127)
+    b'\x25\x7F'     #     Logical Maximum (127)
+    b'\x75\x08'     #     Report Size (8)
+    b'\x95\x02'     #     Report Count (2)
+    b'\x81\x06'     #     Input (Data,Var,Rel)
+    b'\x09\x38'     #     Usage (Wheel)
+    b'\x15\x81'     #     Logical Minimum (-127)
+    b'\x25\x7F'     #     Logical Maximum (127)
+    b'\x75\x08'     #     Report Size (8)
+    b'\x95\x01'     #     Report Count (1)
+    b'\x81\x06'     #     Input (Data,Var,Rel)
+    b'\xC0'         #   End Collection
+    b'\xC0'         # End Collection
+    b'\x05\x0C'     # Usage Page (Consumer)
+    b'\x09\x01'     # Usage (Consumer Control)
+    b'\xA1\x01'     # Collection (Application)
+    b'\x85\x03'     #   Report ID (3)
+    b'\x75\x10'     #   Report Size (16)
+    b'\x95\x01'     #   Report Count (1)
+    b'\x15\x01'     #   Logical Minimum (1)
+    b'\x26\x8C\x02' #   Logical Maximum (652)
+    b'\x19\x01'     #   Usage Minimum (Consumer Control)
+    b'\x2A\x8C\x02' #   Usage Maximum (AC Send)
+    b'\x81\x00'     #   Input (Data,Array,Abs)
+    b'\xC0'         # End Collection
+    b'\x05\x0D'     # Usage Page (Digitizer)
+    b'\x09\x04'     # Usage (Touch Screen)
+    b'\xA1\x01'     # Collection (Application)
+    b'\x85\x04'     #   Report ID (4)
+    b'\x09\x22'     #   Usage (Finger)
+    b'\xA1\x00'     #   Collection (Physical)
+    b'\x09\x42'     #     Usage (Tip Switch)
+    b'\x09\x32'     #     Usage (In Range)
+    b'\x15\x00'     #     Logical Minimum (0)
+    b'\x25\x01'     #     Logical Maximum (1)
+    b'\x75\x01'     #     Report Size (1)
+    b'\x95\x02'     #     Report Count (2)
+    b'\x81\x02'     #     Input (Data,Var,Abs)
+    b'\x95\x06'     #     Report Count (6)
+    b'\x81\x01'     #     Input (Const,Array,Abs)
+    b'\x05\x01'     #     Usage Page (Generic Desktop Ctrls)
+    b'\x09\x30'     #     Usage (X)
+    b'\x09\x31'     #     Usage (Y)
+    b'\x15\x00'     #     Logical Minimum (0)
+    b'\x26\xFF\x7F' #     Logical Maximum (32767)
+    b'\x75\x10'     #     Report Size (16)
+    b'\x95\x02'     #     Report Count (2)
+    b'\x81\x02'     #     Input (Data,Var,Abs)
+    b'\xC0'         #   End Collection
+    b'\xC0'         # End Collection
+)
+
+
+# absolute pointer (single touch digitizer) of HID_DESCRIPTOR
+class AbsPointer:
+    def __init__(self, devices):
+        self._device = find_device(devices, usage_page=0x0D, usage=0x04)
+        self._report = bytearray(5)     # status, X(16bit), Y(16bit)
+
+    def _send(self, status, x, y):
+        self._report[0] = status
+        self._report[1] = x & 0xFF
+        self._report[2] = x >> 8
+        self._report[3] = y & 0xFF
+        self._report[4] = y >> 8
+        self._device.send_report(self._report)
+
+    # touch and release at (x, y) in ratio of screen (0.0~1.0)
+    def tap(self, x, y):
+        x = int(x * 32767)
+        y = int(y * 32767)
+        self._send(0x03, x, y)  # Tip Switch & In Range
+        self._send(0x00, x, y)  # release
@@ -0,0 +1,55 @@
+'''
+reconnect.py
+advertising schedule for reconnection to the bonded tablet, and bond record
+in microcontroller.nvm.
+
+memo.
+bonding keys are stored in flash by CircuitPython itself (_bleio), the
+record here only tells that a tablet was bonded (survives power off).
+bonded tablet scans in background with low duty and reconnects by itself,
+so advertising starts with short high duty burst to be found in its first
+scan window, then backs off to slow intervals (Apple Accessory Design
+Guidelines: 20ms for 30s, then 152.5ms, 1022.5ms etc.). not bonded yet,
+user is on pairing screen and tablet scans in foreground: flat 100ms.
+link lost in session (RF glitch, BT off for a moment): the tablet was just
+connected and reconnects at once, or when its BT is back within seconds.
+short burst, then 62.5ms and 152.5ms for the rest of the grace time.
+adafruit_ble has no directed advertising nor whitelist, advertising is
+undirected in both cases.
+nvm[0:3] : 'BD', 1 when bonded (written only when it changes)
+'''
+import microcontroller
+
+MAGIC = b'BD'
+# (seconds, interval[s]), the last stage lasts until tadv
+BONDED = ((5, 0.020), (25, 0.1525), (None, 1.0225))
+PAIRING = ((None, 0.100),)
+LOST = ((2, 0.020), (8, 0.0625), (None, 0.1525))
+
+
+class BondRecord:
+    def __init__(self, nvm=None):
+        self.nvm = microcontroller.nvm if nvm is None else nvm
+        self.bonded = self.nvm[0:2] == MAGIC and self.nvm[2] == 1
+
+    # write to nvm only when changed, to save flash erase cycles
+    def save(self, bonded):
+        if bonded != self.bonded:
+            self.nvm[0:3] = MAGIC + bytes((1 if bonded else 0,))
+            self.bonded = bonded
+
+
+# stages of advertising [(seconds, interval)] within tadv[s] in total,
+# lost: link lost in session
+def schedule(tadv, bonded, lost=False):
+    stages = []
+    t = 0
+    for seconds, interval in (LOST if lost else
+                              BONDED if bonded else PAIRING):
+        if seconds is None or t + seconds > tadv:
+            seconds = tadv - t
+        stages.append((seconds, interval))
+        t += seconds
+        if t >= tadv:
+            break
+    return stages
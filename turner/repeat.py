@@ -0,0 +1,65 @@
+'''
+repeat.py
+hold-to-repeat of FWD/REV with acceleration.
+
+memo.
+first repeat after delay[s], then rate[pages/s] multiplied by accel every
+second of holding, up to rate_max. rate_max is also limited by connection
+interval (limit()), 1 page (press & release report) per connection event.
+if the firmware was busy and repeats are late, only 1 page is sent and the
+next one is scheduled from now (no burst after busy time)
+'''
+import supervisor
+from turner.keyin import ticks_diff
+
+
+class KeyRepeat:
+    def __init__(self, delay=0.5, rate=4.0, accel=2.0, rate_max=10.0):
+        self.delay = delay
+        self.rate0 = rate
+        self.accel = accel
+        self.rate_max = rate_max
+        self.key = None         # repeating key_number, None: not repeating
+        self.t_press = 0        # ticks_ms of press
+        self.t_next = 0         # [ms] next repeat from t_press
+
+    # cap rate by connection interval[ms]
+    def limit(self, interval):
+        self.rate_max = min(self.rate_max, 1000 / interval)
+
+    def press(self, key, ts):
+        self.key = key
+        self.t_press = ts
+        self.t_next = int(self.delay * 1000)
+
+    def release(self, key):
+        if key == self.key:
+            self.key = None
+
+    def stop(self):
+        self.key = None
+
+    # [pages/s] at held time t[ms]
+    def rate(self, t):
+        r = self.rate0 * self.accel ** max(0, t / 1000 - self.delay)
+        return min(r, self.rate_max)
+
+    # number of repeats due now (0 or 1)
+    def due(self):
+        if self.key is None:
+            return 0
+        held = ticks_diff(supervisor.ticks_ms(), self.t_press)
+        if held < self.t_next:
+            return 0
+        self.t_next += int(1000 / self.rate(self.t_next))
+        if self.t_next < held:  # late, schedule from now
+            self.t_next = held + int(1000 / self.rate(held))
+        return 1
+
+    # [s] until next repeat, None if not repeating. 1ms late, so that
+    # ticks_ms surely reaches it
+    def left(self):
+        if self.key is None:
+            return None
+        held = ticks_diff(supervisor.ticks_ms(), self.t_press)
+        return max(0, (self.t_next - held + 1) / 1000)
@@ -0,0 +1,111 @@
+'''
+sched.py
+plumbing of the asyncio tasks of ebook_turner_w2.py: named timers with
+known deadlines (woken early by wake()), and a bounded queue of actions.
+
+memo.
+tasks wait only in Timers.sleep() or on an Event, never in time.sleep().
+when the queue is idle, the other tasks are all waiting, and the input task
+light sleeps until Timers.left() or a pin alarm. asyncio finds their
+timeouts passed right after the wake and runs them.
+wake() of a task which is running is kept, its next sleep() returns at once
+a woken task resumes a few loop steps later (wait_for runs aw in a task,
+which cancels the sleep of the waiter). left() is 0 until it resumes, then
+it runs to its next sleep() without waiting on anything else, so no new
+deadline is missed by light sleep
+'''
+import asyncio
+import supervisor
+from turner.keyin import ticks_diff
+
+
+class Timers:
+    def __init__(self):
+        self.due = {}           # {name: ticks_ms of deadline}
+        self.events = {}        # {name: Event of wake()}
+        self.waiting = set()    # names in sleep()
+        self.woken = set()      # names woken in sleep(), not resumed yet
+
+    def _event(self, name):
+        if name not in self.events:
+            self.events[name] = asyncio.Event()
+        return self.events[name]
+
+    # sleep seconds (None: until wake), or until wake(name)
+    async def sleep(self, name, seconds=None):
+        ev = self._event(name)
+        if ev.is_set():
+            ev.clear()
+            return
+        self.waiting.add(name)
+        try:
+            if seconds is None:
+                await ev.wait()
+            else:
+                self.due[name] = supervisor.ticks_ms() + int(seconds * 1000)
+                try:
+                    await asyncio.wait_for(ev.wait(), seconds)
+                except asyncio.TimeoutError:
+                    pass
+                finally:
+                    del self.due[name]
+        finally:
+            self.waiting.discard(name)
+            self.woken.discard(name)
+        ev.clear()
+
+    def wake(self, name):
+        if name in self.waiting:
+            self.woken.add(name)
+        self._event(name).set()
+
+    # [s] until the first deadline, default if no timer. 1ms late, so that
+    # asyncio surely finds it passed. 0: passed or woken, its task is yet
+    # to run
+    def left(self, default):
+        if self.woken:
+            return 0
+        if not self.due:
+            return default
+        now = supervisor.ticks_ms()
+        return max(0, min(ticks_diff(t, now) for t in self.due.values())
+                   + 1) / 1000
+
+
+# FIFO of actions [keycode, count, blink] between input and HID tasks.
+# put() never waits: an action of the same keycode as the last one adds its
+# count to it, when full otherwise the oldest is dropped (keypad queues
+# switch events by itself) and put() returns False for the log
+class ActionQueue:
+    def __init__(self, size=8):
+        self.items = []
+        self.size = size
+        self.busy = False       # consumer handles an item
+        self.dropped = 0
+        self.event = asyncio.Event()
+
+    def put(self, keycode, count, blink):
+        taken = True
+        if self.items and self.items[-1][0] == keycode:
+            self.items[-1][1] += count
+            self.items[-1][2] = blink
+        else:
+            if len(self.items) >= self.size:
+                self.items.pop(0)
+                self.dropped += 1
+                taken = False
+            self.items.append([keycode, count, blink])
+        self.event.set()
+        return taken
+
+    async def get(self):
+        while not self.items:
+            self.busy = False
+            self.event.clear()
+            await self.event.wait()
+        self.busy = True
+        return self.items.pop(0)
+
+    # nothing to send
+    def idle(self):
+        return not self.items and not self.busy
@@ -0,0 +1,42 @@
+'''
+snapshot.py
+state of the turner in alarm.sleep_memory before pseudo deep sleep and
+reload, so that the next boot does not read again what it knew: battery
+level.
+
+memo.
+sleep_memory[192:198] (after turner/telemetry.py)
+'SN', version, battery raw (uint16), battery %
+read once at boot and cleared, a snapshot is never used by a later boot
+(reset button or crash starts from the hardware)
+sleep_memory is read and written by slices (no buffer protocol), struct
+works on a copy
+mode switch is read from its pin (define_switch()), bond is in nvm
+(turner/reconnect.py)
+'''
+import alarm
+import struct
+
+MAGIC = b'SN'
+VERSION = 3
+FORMAT = '<2sBHB'
+OFFSET = 192    # [byte] of sleep_memory, turner/telemetry.py uses 0~191
+NONE = 0xFF     # battery % not known
+
+
+class Snapshot:
+    def __init__(self, memory=None):
+        self.mem = alarm.sleep_memory if memory is None else memory
+        end = OFFSET + struct.calcsize(FORMAT)
+        magic, version, raw, percent = struct.unpack(
+            FORMAT, bytes(self.mem[OFFSET:end]))
+        if magic != MAGIC or version != VERSION:
+            raw, percent = 0, NONE      # power on
+        self.raw = raw                  # battery raw, 0: not known
+        self.percent = None if percent == NONE else percent
+        self.mem[OFFSET:OFFSET + 2] = b'\x00\x00'   # used once
+
+    def save(self):
+        percent = NONE if self.percent is None else self.percent
+        buf = struct.pack(FORMAT, MAGIC, VERSION, self.raw, percent)
+        self.mem[OFFSET:OFFSET + len(buf)] = buf
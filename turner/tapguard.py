@@ -0,0 +1,37 @@
+'''
+tapguard.py
+tap/switch cross-talk filter. a switch click shakes the case at press and
+at release, and the IMU may take the pair for a W tap. a tap within window
+of a switch edge is dropped, instead of the ~1s mouse path (or a touch) in
+the middle of the page.
+
+memo.
+switch edge: keypad timestamp (supervisor.ticks_ms of the scan).
+tap: ticks_ms at the INT1 wake. the double tap of a click is reported
+after QUIET of the release shock (~40ms at 208Hz), after the release edge.
+a switch still held at the tap drops it too (get_keycodes()).
+the TIMESTAMP registers (40h-42h) of LSM6DS3TR-C count time, but the time
+of a tap is latched only in FIFO. read at the wake, they tell no more than
+ticks_ms and cost an I2C transaction per tap, so they are not used.
+edges after the tap are not waited for, it would delay every W tap.
+'''
+from turner.keyin import ticks_diff
+
+
+class TapGuard:
+    # window[s]: switch edge to tap, 0: off
+    def __init__(self, window=0.1):
+        self.window = int(window * 1000)
+        self.t_edge = None      # ticks_ms of the last switch edge
+        self.dropped = 0        # taps dropped
+
+    def edge(self, ts):
+        self.t_edge = ts
+
+    # True when the tap at ticks_ms ts is taken
+    def tap(self, ts):
+        if self.window and self.t_edge is not None \
+                and abs(ticks_diff(ts, self.t_edge)) <= self.window:
+            self.dropped += 1
+            return False
+        return True
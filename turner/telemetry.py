@@ -0,0 +1,126 @@
+'''
+telemetry.py
+residency of power states and wake counts by alarm source, in a ring
+buffer of alarm.sleep_memory. it survives supervisor.reload() and deep
+sleep (not power off or reset button). decoded by sim/telemetry.py on PC
+
+memo.
+sleep_memory[0:192] is used, [192:256] is for turner/snapshot.py
+header (8B) : 'TL', version, head (next record), count, boot, reserved(2B)
+record (16B): boot, seq, residency of ADV, SLEEP, ACTIVE, DEEP in UNITS
+              (uint16 x4, saturated), wakes by D4, D9, D6, IMU_INT1, TIME,
+              CHARGE_STATUS (uint8 x6, saturated)
+a record is closed every PERIOD seconds (checked at state change), before
+reload, and when a wake count reaches 255. 11 records, ~5.5h of reading.
+DEEP is counted in 10s, so a night of pseudo deep sleep is 1 record and
+does not push the reading session out of the ring
+time is time.monotonic_ns() (no wrap of ticks_ms in long deep sleep)
+sleep_memory is read and written by slices (no buffer protocol), struct
+works on a copy
+'''
+import alarm
+import board
+import struct
+import time
+
+# power states
+ADV = 0         # advertising, waiting for connection
+SLEEP = 1       # light sleep while connected
+ACTIVE = 2      # awake, handling keys & taps
+DEEP = 3        # pseudo deep sleep in deep_sleep()
+STATES = ('ADV', 'SLEEP', 'ACTIVE', 'DEEP')
+# wake sources. TIME is TimeAlarm, others are PinAlarm of the pin
+WAKES = ('D4', 'D9', 'D6', 'IMU_INT1', 'TIME', 'CHARGE_STATUS')
+
+MAGIC = b'TL'
+VERSION = 2
+HEADER = '<2sBBBBH'
+RECORD = '<BB4H6B'
+SIZE = 192      # [byte] of sleep_memory from 0
+# [ms] residency unit of ADV, SLEEP, ACTIVE, DEEP in record. uint16 is up
+# to ~54min in 50ms, ~7.5 days in 10s
+UNITS = (50, 50, 50, 10000)
+PERIOD = 1800   # [s] of a record
+
+
+def _ms():
+    return time.monotonic_ns() // 1000000
+
+
+class Telemetry:
+    def __init__(self, memory=None):
+        self.mem = alarm.sleep_memory if memory is None else memory
+        self.capacity = (SIZE - struct.calcsize(HEADER)) \
+            // struct.calcsize(RECORD)
+        magic, version, head, count, boot, _ = struct.unpack(
+            HEADER, bytes(self.mem[0:struct.calcsize(HEADER)]))
+        if magic != MAGIC or version != VERSION \
+                or head >= self.capacity or count > self.capacity:
+            head = count = boot = 0     # power on, or other layout
+        self.head = head
+        self.count = count
+        self.boot = (boot + 1) & 0xFF
+        self.seq = 0
+        self._header()
+        self.ms = [0] * len(STATES)
+        self.wakes = [0] * len(WAKES)
+        self.state = ACTIVE
+        self.t_state = _ms()
+        self.t_record = self.t_state
+
+    def _header(self):
+        buf = struct.pack(HEADER, MAGIC, VERSION, self.head, self.count,
+                          self.boot, 0)
+        self.mem[0:len(buf)] = buf
+
+    # change power state, time of the previous one is counted
+    def enter(self, state):
+        now = _ms()
+        self.ms[self.state] += now - self.t_state
+        self.t_state = now
+        self.state = state
+        if now - self.t_record >= PERIOD * 1000:
+            self.flush()
+
+    # count wake by the alarm returned from light_sleep_until_alarms()
+    def wake(self, wake):
+        if isinstance(wake, alarm.time.TimeAlarm):
+            name = 'TIME'
+        elif isinstance(wake, alarm.pin.PinAlarm):
+            name = None
+            for n in WAKES:
+                if getattr(board, n, None) is wake.pin:
+                    name = n
+            if name is None:
+                return
+        else:
+            return
+        i = WAKES.index(name)
+        self.wakes[i] += 1
+        if self.wakes[i] >= 255:
+            self.flush()
+
+    # close the record and write it to ring buffer. residency longer than
+    # uint16 is saturated, a record is never split
+    def flush(self):
+        now = _ms()
+        self.ms[self.state] += now - self.t_state
+        self.t_state = now
+        self.t_record = now
+        units = [min((ms + u // 2) // u, 0xFFFF)
+                 for ms, u in zip(self.ms, UNITS)]
+        offset = struct.calcsize(HEADER) + self.head * struct.calcsize(RECORD)
+        buf = struct.pack(RECORD, self.boot, self.seq & 0xFF,
+                          *(units + self.wakes))
+        self.mem[offset:offset + len(buf)] = buf
+        self.seq += 1
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        self._header()
+        self.ms = [0] * len(STATES)
+        self.wakes = [0] * len(WAKES)
+
+    # print sleep_memory of telemetry in hex, for sim/telemetry.py
+    def dump(self):
+        print('TELEMETRY ' + ''.join(
+            '{:02x}'.format(b) for b in self.mem[:SIZE]))